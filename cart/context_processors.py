@@ -1,22 +1,27 @@
+from store.memo import memoize
 from .models import Cart
 
 
+def _cart_badge(user):
+    # Items and their products are loaded once for both totals
+    cart = Cart.objects.filter(user=user).prefetch_related('items__product').first()
+    if cart is None:
+        return {
+            'cart': None,
+            'cart_items_count': 0,
+            'cart_total': 0,
+        }
+    return {
+        'cart': cart,
+        'cart_items_count': cart.total_items,
+        'cart_total': cart.total_price,
+    }
+
+
 def cart(request):
     """Context processor to make cart available in all templates"""
     if request.user.is_authenticated:
-        try:
-            cart = Cart.objects.get(user=request.user)
-            return {
-                'cart': cart,
-                'cart_items_count': cart.total_items,
-                'cart_total': cart.total_price,
-            }
-        except Cart.DoesNotExist:
-            return {
-                'cart': None,
-                'cart_items_count': 0,
-                'cart_total': 0,
-            }
+        return memoize(request, 'cart_badge', lambda: _cart_badge(request.user))
     return {
         'cart': None,
         'cart_items_count': 0,
@@ -0,0 +1,130 @@
+"""Push cart summary changes to a user's open tabs.
+
+Cart changes publish a summary to a per-user channel on the configured
+broker (``CART_EVENTS_BROKER``). The default ``LocalBroker`` is an
+in-process pub/sub, which is enough for a single ASGI process; a broker
+backed by Redis pub/sub or similar can be dropped in for multi-process
+deployments as long as it provides the same three methods.
+"""
+import asyncio
+import json
+import threading
+from collections import defaultdict
+from functools import lru_cache
+
+from django.conf import settings
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+
+HEARTBEAT_INTERVAL = 15
+
+
+class LocalBroker:
+    """In-process pub/sub keyed by channel name.
+
+    ``publish`` may be called from any thread (sync views run in a thread
+    pool under ASGI); messages are handed to each subscriber's event loop
+    with ``call_soon_threadsafe``.
+    """
+
+    def __init__(self):
+        self._subscribers = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def has_subscribers(self, channel):
+        return bool(self._subscribers.get(channel))
+
+    def publish(self, channel, message):
+        with self._lock:
+            subscribers = list(self._subscribers.get(channel, ()))
+        for loop, queue in subscribers:
+            loop.call_soon_threadsafe(queue.put_nowait, message)
+
+    async def subscribe(self, channel, heartbeat=HEARTBEAT_INTERVAL):
+        """Yield messages for ``channel``, or None every ``heartbeat`` seconds"""
+        subscriber = (asyncio.get_running_loop(), asyncio.Queue())
+        with self._lock:
+            self._subscribers[channel].add(subscriber)
+        try:
+            while True:
+                try:
+                    yield await asyncio.wait_for(subscriber[1].get(), timeout=heartbeat)
+                except asyncio.TimeoutError:
+                    yield None
+        finally:
+            with self._lock:
+                self._subscribers[channel].discard(subscriber)
+                if not self._subscribers[channel]:
+                    del self._subscribers[channel]
+
+
+@lru_cache(maxsize=None)
+def get_broker():
+    """Return the process-wide broker instance"""
+    return import_string(getattr(settings, 'CART_EVENTS_BROKER', 'cart.events.LocalBroker'))()
+
+
+def user_channel(user_id):
+    return f'cart:{user_id}'
+
+
+def cart_summary(user_id):
+    """Item count and subtotal for a user's cart in a single query"""
+    from .models import CartItem
+
+    count, subtotal = 0, 0
+    rows = CartItem.objects.filter(cart__user_id=user_id).values_list(
+        'quantity', 'product__price', 'product__discount'
+    )
+    for quantity, price, discount in rows:
+        count += quantity
+        subtotal += price * (1 - discount / 100) * quantity
+    return {
+        'count': count,
+        'subtotal': float(subtotal),
+    }
+
+
+def format_event(summary):
+    """Serialise a summary as a server-sent event"""
+    return f'event: cart\ndata: {json.dumps(summary)}\n\n'
+
+
+def publish_summary(user_ids):
+    """Publish fresh cart summaries to users that have open streams"""
+    broker = get_broker()
+    for user_id in user_ids:
+        channel = user_channel(user_id)
+        if broker.has_subscribers(channel):
+            broker.publish(channel, cart_summary(user_id))
+
+
+def publish_carts(cart_ids):
+    """Publish summaries for the owners of ``cart_ids``, looked up in one query"""
+    from .models import Cart
+
+    publish_summary(set(Cart.objects.filter(pk__in=cart_ids).values_list('user_id', flat=True)))
+
+
+_pending = threading.local()
+
+
+def schedule_publish(cart_id):
+    """Publish the cart owner's summary once the current transaction commits.
+
+    Multiple changes in one transaction (e.g. clearing a cart) collapse
+    into a single owner lookup and one summary per user.
+    """
+    connection = transaction.get_connection()
+    if not connection.in_atomic_block:
+        publish_carts([cart_id])
+        return
+    # Django replaces run_on_commit with a new list after every commit or
+    # rollback, so its identity tells us whether a batch is still open
+    batch = getattr(_pending, 'batch', None)
+    if batch is None or batch[0] is not connection.run_on_commit:
+        cart_ids = set()
+        _pending.batch = (connection.run_on_commit, cart_ids)
+        transaction.on_commit(lambda: publish_carts(cart_ids))
+    _pending.batch[1].add(cart_id)
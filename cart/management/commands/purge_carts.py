@@ -0,0 +1,51 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from cart import retention
+
+
+class Command(BaseCommand):
+    help = 'Delete carts idle for longer than CART_RETENTION_DAYS in small batches; schedule it daily'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=float, help='Idle age in days (default: CART_RETENTION_DAYS)')
+        parser.add_argument('--chunk-size', type=int, default=1000, help='Cart IDs per batch (default: 1000)')
+        parser.add_argument('--pause', type=float, default=0.1, help='Seconds to sleep between batches (default: 0.1)')
+        parser.add_argument('--dry-run', action='store_true', help='Only count the carts that would be deleted')
+        parser.add_argument(
+            '--vacuum', action='store_true',
+            help='Compact the tables afterwards (VACUUM; on SQLite this locks the whole database)',
+        )
+
+    def handle(self, *args, **options):
+        if options['chunk_size'] <= 0 or options['pause'] < 0:
+            raise CommandError('--chunk-size must be positive and --pause not negative.')
+        if options['days'] is not None and options['days'] < 0:
+            raise CommandError('--days must not be negative.')
+
+        if options['dry_run']:
+            carts, items = retention.purge(days=options['days'], dry_run=True)
+            self.stdout.write(f'{carts} idle cart(s) with {items} item(s) would be deleted.')
+            return
+
+        before = retention.relation_sizes()
+        started = time.perf_counter()
+
+        def progress(last_id, carts, items):
+            if options['verbosity'] > 1:
+                self.stdout.write(f'  up to id {last_id}: {carts} cart(s), {items} item(s)')
+
+        carts, items = retention.purge(
+            days=options['days'], chunk_size=options['chunk_size'], pause=options['pause'], progress=progress,
+        )
+        if options['vacuum']:
+            retention.compact()
+        after = retention.relation_sizes()
+
+        for name in sorted(before):
+            self.stdout.write(f'  {name}: {before[name] / 1024:.0f} KiB -> {after.get(name, 0) / 1024:.0f} KiB')
+        if not before:
+            self.stdout.write('  (relation sizes are not available on this database)')
+        self.stdout.write(self.style.SUCCESS(
+            f'Deleted {carts} cart(s) and {items} item(s) in {time.perf_counter() - started:.2f}s.'
+        ))
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.6 on 2026-10-19 04:59
+
+from django.db import migrations, models
+
+
+def mark_reserved(apps, schema_editor):
+    # Lines for flash-sale products were reserved against the flash counter when added
+    CartItem = apps.get_model('cart', 'CartItem')
+    CartItem.objects.filter(product__flash_sale=True).update(reserved=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cart', '0002_cart_updated_idx'),
+        ('store', '0003_product_flash_sale'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cartitem',
+            name='reserved',
+            field=models.BooleanField(default=False, help_text='The quantity is reserved against the flash-sale counter rather than stock'),
+        ),
+        migrations.RunPython(mark_reserved, migrations.RunPython.noop),
+    ]
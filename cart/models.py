@@ -1,5 +1,6 @@
 from django.db import models
 from django.contrib.auth.models import User
+from store import flash_sale
 from store.models import Product
 
 
@@ -11,6 +12,9 @@ class Cart(models.Model):
 
     class Meta:
         ordering = ['-updated_at']
+        indexes = [
+            models.Index(fields=['updated_at'], name='cart_updated_idx'),
+        ]
 
     def __str__(self):
         return f"Cart for {self.user.username}"
@@ -25,12 +29,12 @@ class Cart(models.Model):
         """Calculate total price of all items in cart"""
         return sum(item.total_price for item in self.items.all())
 
-    def add_item(self, product, quantity=1):
+    def add_item(self, product, quantity=1, reserved=False):
         """Add item to cart or update quantity if already exists"""
         cart_item, created = CartItem.objects.get_or_create(
             cart=self,
             product=product,
-            defaults={'quantity': quantity}
+            defaults={'quantity': quantity, 'reserved': reserved}
         )
         if not created:
             cart_item.quantity += quantity
@@ -41,6 +45,7 @@ class Cart(models.Model):
         """Remove item from cart"""
         try:
             cart_item = CartItem.objects.get(cart=self, product=product)
+            cart_item.release()
             cart_item.delete()
             return True
         except CartItem.DoesNotExist:
@@ -51,8 +56,14 @@ class Cart(models.Model):
         try:
             cart_item = CartItem.objects.get(cart=self, product=product)
             if quantity <= 0:
+                cart_item.release()
                 cart_item.delete()
             else:
+                delta = quantity - cart_item.quantity
+                if cart_item.reserved and delta > 0 and not flash_sale.reserve(product, delta):
+                    return False
+                if cart_item.reserved and delta < 0:
+                    flash_sale.release(cart_item.product_id, -delta)
                 cart_item.quantity = quantity
                 cart_item.save()
             return True
@@ -60,7 +71,10 @@ class Cart(models.Model):
             return False
 
     def clear(self):
-        """Clear all items from cart"""
+        """Clear all items from cart, releasing any flash-sale reservations"""
+        reserved = self.items.filter(reserved=True).values_list('product_id', 'quantity')
+        for product_id, quantity in reserved:
+            flash_sale.release(product_id, quantity)
         self.items.all().delete()
 
 
@@ -69,6 +83,10 @@ class CartItem(models.Model):
     cart = models.ForeignKey(Cart, on_delete=models.CASCADE, related_name='items')
     product = models.ForeignKey(Product, on_delete=models.CASCADE)
     quantity = models.PositiveIntegerField(default=1)
+    reserved = models.BooleanField(
+        default=False,
+        help_text='The quantity is reserved against the flash-sale counter rather than stock',
+    )
     added_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -84,9 +102,15 @@ class CartItem(models.Model):
         """Calculate total price for this cart item"""
         return self.product.discounted_price * self.quantity
 
+    def release(self):
+        """Return this line's flash-sale reservation, if it holds one"""
+        if self.reserved:
+            flash_sale.release(self.product_id, self.quantity)
+
     def save(self, *args, **kwargs):
-        # Ensure quantity doesn't exceed stock
-        if self.quantity > self.product.stock_quantity:
+        # Ensure quantity doesn't exceed stock; reserved lines were
+        # already checked against the cache counter
+        if not self.reserved and self.quantity > self.product.stock_quantity:
             self.quantity = self.product.stock_quantity
         super().save(*args, **kwargs)
 
@@ -0,0 +1,141 @@
+"""Retention for abandoned carts.
+
+A cart is idle when neither the cart nor any of its items changed within
+``CART_RETENTION_DAYS`` and its owner has not signed in since. ``purge()``
+walks the cart table in primary-key ranges of ``chunk_size`` IDs, deletes
+the idle carts of each range (items first) in its own short transaction
+and sleeps between ranges, so no statement scans or locks more than one
+range and concurrent requests are never blocked for long. Rows are
+removed with plain DELETE statements, bypassing the deletion collector
+and the cart summary signal (nobody is watching an abandoned cart).
+Flash-sale reservations held by purged items are released after each
+commit.
+"""
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import DatabaseError, connection, transaction
+from django.db.models import Exists, Max, Min, OuterRef
+from django.utils import timezone
+
+from store import flash_sale
+
+from .models import Cart, CartItem
+
+
+TABLES = [Cart._meta.db_table, CartItem._meta.db_table]
+
+
+def cutoff(days=None):
+    if days is None:
+        days = getattr(settings, 'CART_RETENTION_DAYS', 90)
+    return timezone.now() - timedelta(days=days)
+
+
+def idle_carts(before):
+    """Carts with no cart, item or sign-in activity since ``before``"""
+    recent_items = CartItem.objects.filter(cart=OuterRef('pk'), updated_at__gte=before)
+    return (
+        Cart.objects.filter(updated_at__lt=before)
+        .exclude(user__last_login__gte=before)
+        .exclude(Exists(recent_items))
+    )
+
+
+def _purge_range(before, low, high):
+    """Delete the idle carts with ``low < id <= high``; return ``(carts, items)``"""
+    with transaction.atomic():
+        # Carts being written right now are locked; leave them for the next run
+        ids = list(
+            idle_carts(before).filter(id__gt=low, id__lte=high)
+            .select_for_update(skip_locked=True, of=('self',))
+            .order_by().values_list('id', flat=True)
+        )
+        if not ids:
+            return 0, 0
+        reserved = list(
+            CartItem.objects.filter(cart_id__in=ids, reserved=True)
+            .values_list('product_id', 'quantity')
+        )
+        # Raw deletes: CartItem's post_delete receiver would otherwise make the
+        # collector fetch every item and load its cart to publish a summary
+        items = CartItem.objects.filter(cart_id__in=ids)
+        items = items._raw_delete(items.db)
+        carts = Cart.objects.filter(id__in=ids)
+        carts = carts._raw_delete(carts.db)
+
+        def release():
+            for product_id, quantity in reserved:
+                flash_sale.release(product_id, quantity)
+        transaction.on_commit(release)
+    return carts, items
+
+
+def purge(days=None, chunk_size=1000, pause=0.1, dry_run=False, progress=None):
+    """Delete idle carts range by range; return ``(carts, items)`` removed.
+
+    With ``dry_run`` nothing is deleted and the counts are what would be.
+    ``progress`` is called with ``(last id, carts, items)`` after each range.
+    """
+    before = cutoff(days)
+    if dry_run:
+        carts = idle_carts(before)
+        return carts.count(), CartItem.objects.filter(cart__in=carts).count()
+
+    bounds = Cart.objects.filter(updated_at__lt=before).aggregate(low=Min('id'), high=Max('id'))
+    if bounds['low'] is None:
+        return 0, 0
+    total_carts = total_items = 0
+    low = bounds['low'] - 1
+    while low < bounds['high']:
+        high = low + chunk_size
+        carts, items = _purge_range(before, low, high)
+        total_carts += carts
+        total_items += items
+        if progress:
+            progress(high, total_carts, total_items)
+        low = high
+        if carts and pause:
+            time.sleep(pause)
+    return total_carts, total_items
+
+
+def relation_sizes():
+    """Return ``{table or index name: bytes on disk}`` for the cart tables.
+
+    Empty if the database cannot report sizes (e.g. SQLite built without
+    the ``dbstat`` virtual table).
+    """
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute(
+                'SELECT relname, pg_relation_size(relid) FROM pg_stat_user_tables WHERE relname = ANY(%s) '
+                'UNION ALL '
+                'SELECT indexrelname, pg_relation_size(indexrelid) FROM pg_stat_user_indexes WHERE relname = ANY(%s)',
+                [TABLES, TABLES],
+            )
+        elif connection.vendor == 'sqlite':
+            placeholders = ', '.join(['%s'] * len(TABLES))
+            try:
+                cursor.execute(
+                    'SELECT name, SUM(pgsize) FROM dbstat WHERE name IN '
+                    f'(SELECT name FROM sqlite_master WHERE tbl_name IN ({placeholders})) GROUP BY name',
+                    TABLES,
+                )
+            except DatabaseError:
+                return {}
+        else:
+            return {}
+        return {name: size for name, size in cursor.fetchall()}
+
+
+def compact():
+    """Return freed space to the database after a large purge"""
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            for table in TABLES:
+                cursor.execute(f'VACUUM (ANALYZE) {connection.ops.quote_name(table)}')
+        elif connection.vendor == 'sqlite':
+            # Rewrites the whole database file and locks it while running
+            cursor.execute('VACUUM')
@@ -0,0 +1,12 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .events import schedule_publish
+from .models import CartItem
+
+
+@receiver(post_save, sender=CartItem)
+@receiver(post_delete, sender=CartItem)
+def push_cart_summary(sender, instance, **kwargs):
+    """Push the new cart summary to the owner's open tabs"""
+    schedule_publish(instance.cart_id)
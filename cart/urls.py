@@ -10,5 +10,6 @@ urlpatterns = [
     path('remove/<int:item_id>/', views.remove_from_cart, name='remove_from_cart'),
     path('clear/', views.clear_cart, name='clear_cart'),
     path('count/', views.cart_count, name='cart_count'),
+    path('events/', views.cart_events, name='cart_events'),
 ]
 
@@ -1,11 +1,16 @@
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.decorators import login_required
-from django.http import JsonResponse
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from django.core.handlers.asgi import ASGIRequest
+from asgiref.sync import sync_to_async
 from django.views.decorators.http import require_http_methods
 from django.contrib import messages
 from django.db import transaction
+from .events import cart_summary, format_event, get_broker, user_channel
 from .models import Cart, CartItem
+from store import flash_sale, popularity
 from store.models import Product
+from store.throttling import throttle
 
 
 @login_required
@@ -23,21 +28,38 @@ def cart_view(request):
 
 @login_required
 @require_http_methods(["POST"])
+@throttle('add_to_cart', rate='30/m', burst=10)
 def add_to_cart(request):
     """Add product to cart"""
     try:
         product_id = request.POST.get('product_id')
         quantity = int(request.POST.get('quantity', 1))
         
+        if quantity < 1:
+            raise ValueError('Quantity must be positive')
+        
         product = get_object_or_404(Product, id=product_id, is_active=True)
+        cart, created = Cart.objects.get_or_create(user=request.user)
         
-        # Check stock availability
-        if quantity > product.stock_quantity:
+        # Check stock availability; flash-sale lines reserve against the cache counter.
+        # An existing line keeps the mode it was created in.
+        existing = CartItem.objects.filter(cart=cart, product=product).values_list('reserved', flat=True).first()
+        reserve = product.flash_sale if existing is None else existing
+        if reserve:
+            if not flash_sale.reserve(product, quantity):
+                messages.error(request, f'Only {flash_sale.available(product)} items available in stock.')
+                return redirect('store:product_detail', slug=product.slug)
+        elif quantity > product.stock_quantity:
             messages.error(request, f'Only {product.stock_quantity} items available in stock.')
             return redirect('store:product_detail', slug=product.slug)
         
-        cart, created = Cart.objects.get_or_create(user=request.user)
-        cart_item = cart.add_item(product, quantity)
+        try:
+            cart_item = cart.add_item(product, quantity, reserved=reserve)
+        except Exception:
+            if reserve:
+                flash_sale.release(product.id, quantity)
+            raise
+        popularity.record_cart_add(product.id)
         
         messages.success(request, f'{product.name} added to cart successfully!')
 
@@ -68,9 +90,21 @@ def update_cart_item(request, item_id):
         cart_item = get_object_or_404(CartItem, id=item_id, cart__user=request.user)
         quantity = int(request.POST.get('quantity', 1))
         
+        if quantity < 1:
+            raise ValueError('Quantity must be positive')
+        
         # Check stock availability
-        if quantity > cart_item.product.stock_quantity:
-            messages.error(request, f'Only {cart_item.product.stock_quantity} items available in stock.')
+        product = cart_item.product
+        if cart_item.reserved:
+            delta = quantity - cart_item.quantity
+            if delta > 0 and not flash_sale.reserve(product, delta):
+                available = cart_item.quantity + flash_sale.available(product)
+                messages.error(request, f'Only {available} items available in stock.')
+                return redirect('cart:cart_view')
+            if delta < 0:
+                flash_sale.release(product.id, -delta)
+        elif quantity > product.stock_quantity:
+            messages.error(request, f'Only {product.stock_quantity} items available in stock.')
             return redirect('cart:cart_view')
         
         cart_item.quantity = quantity
@@ -104,6 +138,7 @@ def remove_from_cart(request, item_id):
     try:
         cart_item = get_object_or_404(CartItem, id=item_id, cart__user=request.user)
         product_name = cart_item.product.name
+        cart_item.release()
         cart_item.delete()
         
         messages.success(request, f'{product_name} removed from cart.')
@@ -152,6 +187,7 @@ def clear_cart(request):
 
 
 @require_http_methods(["GET"])
+@throttle('cart_count', rate='2/s', burst=10)
 def cart_count(request):
     """API endpoint to get cart item count"""
     if request.user.is_authenticated:
@@ -165,3 +201,28 @@ def cart_count(request):
     
     return JsonResponse({'count': count})
 
+
+@require_http_methods(["GET"])
+async def cart_events(request):
+    """Server-sent events stream of cart summary changes.
+
+    Only served under ASGI; under WSGI (or for anonymous users) a 204 tells
+    the EventSource not to reconnect, and clients keep polling cart_count.
+    """
+    user = await request.auser()
+    if not user.is_authenticated or not isinstance(request, ASGIRequest):
+        return HttpResponse(status=204)
+
+    async def stream():
+        yield format_event(await sync_to_async(cart_summary)(user.id))
+        async for summary in get_broker().subscribe(user_channel(user.id)):
+            if summary is None:
+                yield ': keep-alive\n\n'
+            else:
+                yield format_event(summary)
+
+    response = StreamingHttpResponse(stream(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
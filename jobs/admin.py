@@ -0,0 +1,25 @@
+from django.contrib import admin, messages
+from django.db import IntegrityError
+from django.utils import timezone
+from .models import Job
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    """Admin configuration for Job model"""
+    list_display = ['id', 'name', 'status', 'attempts', 'max_attempts', 'run_at', 'locked_by', 'finished_at']
+    list_filter = ['status', 'name']
+    search_fields = ['=id', 'name', 'dedupe_key']
+    readonly_fields = ['created_at', 'finished_at', 'locked_by', 'locked_at', 'last_error']
+    actions = ['retry_jobs']
+
+    @admin.action(description='Retry selected failed jobs now')
+    def retry_jobs(self, request, queryset):
+        try:
+            updated = queryset.filter(status=Job.STATUS_FAILED).update(
+                status=Job.STATUS_QUEUED, attempts=0, run_at=timezone.now(), finished_at=None,
+            )
+        except IntegrityError:
+            self.message_user(request, 'A selected job already has a queued duplicate.', messages.ERROR)
+            return
+        self.message_user(request, f'{updated} job(s) queued for retry.', messages.SUCCESS)
@@ -0,0 +1,37 @@
+import signal
+import threading
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from jobs.registry import registry
+from jobs.worker import Worker
+
+
+class Command(BaseCommand):
+    help = 'Run queued background jobs with a thread pool until stopped'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=4, help='Concurrent handler threads')
+        parser.add_argument('--batch-size', type=int, default=100, help='Jobs claimed per poll')
+        parser.add_argument('--poll', type=float, default=1.0, help='Seconds to wait when the queue is empty')
+        parser.add_argument('--only', nargs='*', metavar='NAME', help='Only run these job types')
+        parser.add_argument('--once', action='store_true', help='Exit once no due jobs are left')
+
+    def handle(self, *args, **options):
+        if options['threads'] < 1 or options['batch_size'] < 1:
+            raise CommandError('--threads and --batch-size must be positive.')
+        unknown = set(options['only'] or ()) - set(registry)
+        if unknown:
+            raise CommandError(f'Unknown job type(s): {", ".join(sorted(unknown))}')
+
+        stop = threading.Event()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(sig, lambda *_: stop.set())
+
+        worker = Worker(threads=options['threads'], batch_size=options['batch_size'], names=options['only'])
+        self.stdout.write(f'Worker {worker.worker_id} running {len(registry)} job type(s): {", ".join(sorted(registry))}')
+        started = time.perf_counter()
+        processed = worker.run(stop, poll_interval=options['poll'], once=options['once'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Processed {processed} job(s) in {time.perf_counter() - started:.1f}s.'
+        ))
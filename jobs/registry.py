@@ -0,0 +1,73 @@
+"""Job handler registry and enqueueing.
+
+Handlers are registered with the ``job`` decorator in an app's ``jobs.py``
+(``JobsConfig`` imports them at startup)::
+
+    @job('store.process_product_image')
+    def process_product_image(image_id):
+        ...
+
+    @job('store.refresh_derived_catalog', batch=True)
+    def refresh_derived_catalog(payloads):
+        ...
+
+Plain handlers are called with the payload as keyword arguments. Batch
+handlers get the payloads of every claimed job of their type in one call.
+``enqueue`` is a single INSERT. With a ``dedupe_key`` it is an
+INSERT ... ON CONFLICT DO NOTHING against a partial unique index, so a
+burst of identical requests leaves one queued job.
+"""
+from dataclasses import dataclass
+from datetime import timedelta
+
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Job
+
+
+@dataclass(frozen=True)
+class JobType:
+    name: str
+    func: object
+    batch: bool
+    max_attempts: int
+    backoff: float
+
+
+registry = {}
+
+
+def job(name, batch=False, max_attempts=5, backoff=10):
+    """Register a handler; ``backoff`` is the base retry delay in seconds"""
+    def decorator(func):
+        if name in registry:
+            raise ValueError(f'Job {name!r} is already registered')
+        registry[name] = JobType(name, func, batch, max_attempts, backoff)
+        func.job_name = name
+        return func
+    return decorator
+
+
+def enqueue(name, payload=None, dedupe_key=None, delay=0, on_commit=False):
+    """Queue a job with one INSERT; ``name`` may also be a registered handler.
+
+    With ``on_commit=True`` the insert waits for the current transaction
+    to commit, so workers never see work for rolled-back changes.
+    """
+    name = getattr(name, 'job_name', name)
+    if name not in registry:
+        raise ValueError(f'Unknown job {name!r}')
+    if on_commit:
+        transaction.on_commit(lambda: enqueue(name, payload, dedupe_key, delay))
+        return
+    Job.objects.bulk_create(
+        [Job(
+            name=name,
+            payload=payload or {},
+            dedupe_key=dedupe_key,
+            max_attempts=registry[name].max_attempts,
+            run_at=timezone.now() + timedelta(seconds=delay),
+        )],
+        ignore_conflicts=dedupe_key is not None,
+    )
@@ -0,0 +1,171 @@
+"""Database-backed job worker.
+
+Each poll claims up to ``batch_size`` due jobs with one conditional
+UPDATE (``status='queued'`` -> ``'running'``), so several workers can
+share the table without double-running a job, on SQLite as well as
+Postgres. Claimed jobs are grouped by type: batch handlers get one call
+per group and other handlers one call per job, all on a thread pool.
+Failures are retried with exponential backoff and jitter until
+``max_attempts`` is reached. Jobs left ``running`` by a crashed worker
+are requeued after ``JOBS_LOCK_TIMEOUT`` seconds.
+"""
+import logging
+import os
+import random
+import socket
+import threading
+import time
+import traceback
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, close_old_connections, connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Job
+from .registry import registry
+
+
+logger = logging.getLogger(__name__)
+
+MAX_BACKOFF = 3600
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def retry_delay(job_type, attempts):
+    """Exponential backoff with +/-50% jitter, capped at an hour"""
+    delay = min(job_type.backoff * 2 ** max(attempts - 1, 0), MAX_BACKOFF)
+    return delay * random.uniform(0.5, 1.5)
+
+
+class Worker:
+    def __init__(self, threads=4, batch_size=100, names=None):
+        self.threads = threads
+        self.batch_size = batch_size
+        self.names = names
+        self.worker_id = f'{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}'
+        self._last_maintenance = 0.0
+
+    def claim(self):
+        """Atomically mark up to ``batch_size`` due jobs as running for this worker"""
+        now = timezone.now()
+        due = Job.objects.filter(status=Job.STATUS_QUEUED, run_at__lte=now)
+        if self.names:
+            due = due.filter(name__in=self.names)
+        ids = list(due.order_by('run_at').values_list('id', flat=True)[:self.batch_size])
+        if not ids:
+            return []
+        Job.objects.filter(id__in=ids, status=Job.STATUS_QUEUED).update(
+            status=Job.STATUS_RUNNING,
+            locked_by=self.worker_id,
+            locked_at=now,
+            attempts=F('attempts') + 1,
+        )
+        return list(Job.objects.filter(
+            id__in=ids, status=Job.STATUS_RUNNING, locked_by=self.worker_id, locked_at=now,
+        ))
+
+    def maintenance(self):
+        """Requeue jobs from crashed workers and drop old finished jobs"""
+        now = timezone.now()
+        stale = Job.objects.filter(
+            status=Job.STATUS_RUNNING,
+            locked_at__lt=now - timedelta(seconds=_setting('JOBS_LOCK_TIMEOUT', 600)),
+        )
+        for stale_job in stale:
+            self._retry(stale_job, 'Worker lock expired')
+        Job.objects.filter(
+            status=Job.STATUS_DONE,
+            finished_at__lt=now - timedelta(seconds=_setting('JOBS_RETENTION', 86400)),
+        ).delete()
+
+    def run_once(self, executor):
+        """Claim and run one round of jobs; return how many were claimed"""
+        if time.monotonic() - self._last_maintenance > 60:
+            self.maintenance()
+            self._last_maintenance = time.monotonic()
+        jobs = self.claim()
+        if not jobs:
+            return 0
+
+        tasks = []
+        groups = {}
+        for claimed in jobs:
+            groups.setdefault(claimed.name, []).append(claimed)
+        for name, group in groups.items():
+            job_type = registry.get(name)
+            if job_type is None:
+                for claimed in group:
+                    self._fail(claimed, f'No handler registered for {name!r}', final=True)
+            elif job_type.batch:
+                tasks.append(executor.submit(self._execute, job_type, group))
+            else:
+                tasks.extend(executor.submit(self._execute, job_type, [claimed]) for claimed in group)
+        for task in tasks:
+            task.result()
+        return len(jobs)
+
+    def _execute(self, job_type, group):
+        try:
+            if job_type.batch:
+                job_type.func([claimed.payload for claimed in group])
+            else:
+                job_type.func(**group[0].payload)
+        except Exception:
+            error = traceback.format_exc()
+            logger.warning('Job %s failed (%d job(s))', job_type.name, len(group))
+            for claimed in group:
+                self._retry(claimed, error)
+        else:
+            Job.objects.filter(id__in=[claimed.id for claimed in group]).update(
+                status=Job.STATUS_DONE, finished_at=timezone.now(), locked_by='', last_error='',
+            )
+        finally:
+            connection.close()
+
+    def _retry(self, failed, error):
+        job_type = registry.get(failed.name)
+        if job_type is None or failed.attempts >= failed.max_attempts:
+            self._fail(failed, error, final=True)
+            return
+        try:
+            with transaction.atomic():
+                Job.objects.filter(id=failed.id).update(
+                    status=Job.STATUS_QUEUED,
+                    run_at=timezone.now() + timedelta(seconds=retry_delay(job_type, failed.attempts)),
+                    locked_by='',
+                    locked_at=None,
+                    last_error=error,
+                )
+        except IntegrityError:
+            # A newer queued job with the same dedupe key will do the work
+            self._fail(failed, f'{error}\nSuperseded by a queued duplicate.', final=False)
+
+    def _fail(self, failed, error, final):
+        Job.objects.filter(id=failed.id).update(
+            status=Job.STATUS_FAILED if final else Job.STATUS_DONE,
+            finished_at=timezone.now(),
+            locked_by='',
+            last_error=error,
+        )
+
+    def run(self, stop_event=None, poll_interval=1.0, once=False):
+        """Process jobs until ``stop_event`` is set (or the queue is empty with ``once``)"""
+        stop_event = stop_event or threading.Event()
+        processed = 0
+        with ThreadPoolExecutor(max_workers=self.threads, thread_name_prefix='job') as executor:
+            while not stop_event.is_set():
+                close_old_connections()
+                claimed = self.run_once(executor)
+                processed += claimed
+                if not claimed:
+                    if once:
+                        break
+                    stop_event.wait(poll_interval)
+        return processed
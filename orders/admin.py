@@ -0,0 +1,25 @@
+from django.contrib import admin
+from .models import Order, OrderLine
+
+
+class OrderLineInline(admin.TabularInline):
+    """Read-only inline for the lines of an order"""
+    model = OrderLine
+    extra = 0
+    fields = ['product', 'product_name', 'price', 'discount', 'unit_price', 'quantity']
+    readonly_fields = fields
+    can_delete = False
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(Order)
+class OrderAdmin(admin.ModelAdmin):
+    """Admin configuration for Order model"""
+    list_display = ['id', 'user', 'status', 'total_items', 'total_price', 'created_at']
+    list_filter = ['status']
+    list_select_related = ['user']
+    search_fields = ['=id', 'user__email', 'user__username']
+    readonly_fields = ['user', 'total_items', 'total_price', 'created_at', 'updated_at']
+    inlines = [OrderLineInline]
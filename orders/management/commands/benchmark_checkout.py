@@ -0,0 +1,104 @@
+import time
+import uuid
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from cart.models import Cart, CartItem
+from orders.models import OrderLine
+from orders.services import CheckoutError, checkout
+from store.models import Category, Product
+
+
+class Command(BaseCommand):
+    help = 'Run concurrent checkouts against one product and verify stock is never oversold'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--orders', type=int, default=200, help='Number of checkout attempts')
+        parser.add_argument('--threads', type=int, default=16, help='Concurrent checkout workers')
+        parser.add_argument('--stock', type=int, default=100, help='Starting stock of the benchmark product')
+        parser.add_argument('--quantity', type=int, default=1, help='Units per cart')
+        parser.add_argument('--keep', action='store_true', help='Keep the benchmark data afterwards')
+
+    def handle(self, *args, **options):
+        if options['orders'] < 1 or options['threads'] < 1 or options['quantity'] < 1:
+            raise CommandError('--orders, --threads and --quantity must be positive.')
+
+        run_id = uuid.uuid4().hex[:8]
+        category, _ = Category.objects.get_or_create(
+            slug='checkout-benchmark', defaults={'name': 'Checkout Benchmark'}
+        )
+        product = Product.objects.create(
+            name=f'Checkout Benchmark {run_id}',
+            slug=f'checkout-benchmark-{run_id}',
+            description='Product created by benchmark_checkout.',
+            price=Decimal('10.00'),
+            category=category,
+            stock_quantity=options['stock'],
+        )
+        User.objects.bulk_create([
+            User(username=f'bench-{run_id}-{i}', email=f'bench-{run_id}-{i}@example.com')
+            for i in range(options['orders'])
+        ])
+        users = User.objects.filter(username__startswith=f'bench-{run_id}-')
+        Cart.objects.bulk_create([Cart(user=user) for user in users])
+        carts = list(Cart.objects.filter(user__in=users))
+        CartItem.objects.bulk_create([
+            CartItem(cart=cart, product=product, quantity=options['quantity']) for cart in carts
+        ])
+
+        self.stdout.write(
+            f'Checking out {len(carts)} carts of {options["quantity"]} unit(s) '
+            f'against stock {options["stock"]} with {options["threads"]} threads...'
+        )
+
+        def run(cart):
+            try:
+                checkout(cart)
+                return 'placed'
+            except CheckoutError:
+                return 'rejected'
+            except Exception as e:
+                return f'error: {e.__class__.__name__}'
+            finally:
+                connection.close()
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options['threads']) as executor:
+            outcomes = list(executor.map(run, carts))
+        elapsed = time.perf_counter() - started
+
+        placed = outcomes.count('placed')
+        rejected = outcomes.count('rejected')
+        errors = len(outcomes) - placed - rejected
+
+        product.refresh_from_db()
+        sold = sum(
+            OrderLine.objects.filter(product=product).values_list('quantity', flat=True)
+        )
+        expected_stock = options['stock'] - sold
+
+        self.stdout.write(f'Placed:      {placed}')
+        self.stdout.write(f'Rejected:    {rejected}')
+        self.stdout.write(f'Errors:      {errors}')
+        for outcome, count in Counter(o for o in outcomes if o.startswith('error')).items():
+            self.stdout.write(f'  {outcome}: {count}')
+        self.stdout.write(f'Units sold:  {sold} of {options["stock"]}')
+        self.stdout.write(f'Final stock: {product.stock_quantity}')
+        self.stdout.write(f'Elapsed:     {elapsed:.3f}s')
+        self.stdout.write(f'Throughput:  {placed / elapsed:.1f} orders/s')
+
+        oversold = sold > options['stock'] or product.stock_quantity != expected_stock
+
+        if not options['keep']:
+            users.delete()
+            product.delete()
+            if not category.products.exists():
+                category.delete()
+
+        if oversold:
+            raise CommandError('Stock was oversold or does not match the orders placed.')
+        self.stdout.write(self.style.SUCCESS('No oversell detected.'))
@@ -0,0 +1,59 @@
+from django.db import models
+from django.contrib.auth.models import User
+from django.urls import reverse
+from store.models import Product
+
+
+class Order(models.Model):
+    """Model for an order placed from a cart"""
+    STATUS_PLACED = 'placed'
+    STATUS_PAID = 'paid'
+    STATUS_SHIPPED = 'shipped'
+    STATUS_CANCELLED = 'cancelled'
+    STATUS_CHOICES = [
+        (STATUS_PLACED, 'Placed'),
+        (STATUS_PAID, 'Paid'),
+        (STATUS_SHIPPED, 'Shipped'),
+        (STATUS_CANCELLED, 'Cancelled'),
+    ]
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='orders')
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_PLACED)
+    total_items = models.PositiveIntegerField(default=0)
+    total_price = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', '-created_at'], name='order_user_created_idx'),
+        ]
+
+    def __str__(self):
+        return f"Order #{self.id} for {self.user.username}"
+
+    def get_absolute_url(self):
+        return reverse('orders:order_detail', kwargs={'order_id': self.id})
+
+
+class OrderLine(models.Model):
+    """Model for a product line in an order, with prices snapshotted at checkout"""
+    order = models.ForeignKey(Order, on_delete=models.CASCADE, related_name='lines')
+    product = models.ForeignKey(Product, on_delete=models.SET_NULL, null=True, related_name='order_lines')
+    product_name = models.CharField(max_length=200)
+    price = models.DecimalField(max_digits=10, decimal_places=2)
+    discount = models.DecimalField(max_digits=5, decimal_places=2, default=0)
+    unit_price = models.DecimalField(max_digits=10, decimal_places=2)
+    quantity = models.PositiveIntegerField()
+
+    class Meta:
+        ordering = ['id']
+
+    def __str__(self):
+        return f"{self.quantity} x {self.product_name} in {self.order}"
+
+    @property
+    def total_price(self):
+        """Calculate total price for this order line"""
+        return self.unit_price * self.quantity
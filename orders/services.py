@@ -0,0 +1,118 @@
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Q, Value, When
+from django.utils import timezone
+
+from cart.models import Cart
+from store import category_stats
+from store.caching import invalidate_catalog
+from store.models import Product
+from .models import Order, OrderLine
+
+
+class CheckoutError(Exception):
+    """Raised when a cart cannot be converted into an order.
+
+    ``shortages`` maps product IDs to the quantity still available for
+    products that could not cover the requested quantity.
+    """
+
+    def __init__(self, message, shortages=None):
+        super().__init__(message)
+        self.shortages = shortages or {}
+
+
+def decrement_stock(demand):
+    """Decrement stock for ``{product_id: quantity}`` in one UPDATE.
+
+    Each product is only matched while it is active and still has enough
+    stock, so a concurrent checkout that got there first makes the row drop
+    out of the WHERE clause instead of driving stock negative. Returns True
+    if every product was decremented.
+    """
+    if not demand:
+        return True
+    condition = Q()
+    for product_id, quantity in demand.items():
+        condition |= Q(id=product_id, stock_quantity__gte=quantity)
+    decrement = Case(
+        *[When(id=product_id, then=Value(quantity)) for product_id, quantity in demand.items()],
+        default=Value(0),
+        output_field=IntegerField(),
+    )
+    # A stock counter write; catalog caches are invalidated after commit
+    updated = Product.objects.filter(condition, is_active=True).update(
+        bump=False,
+        stock_quantity=F('stock_quantity') - decrement,
+        updated_at=timezone.now(),
+    )
+    return updated == len(demand)
+
+
+def _shortages(demand):
+    """Return ``{product_id: available}`` for products that cannot cover demand"""
+    available = dict(
+        Product.objects.filter(id__in=demand, is_active=True).values_list('id', 'stock_quantity')
+    )
+    return {
+        product_id: available.get(product_id, 0)
+        for product_id, quantity in demand.items()
+        if available.get(product_id, 0) < quantity
+    }
+
+
+def checkout(cart):
+    """Convert a cart into an order in a single transaction.
+
+    Stock for all lines is decremented with one conditional UPDATE, prices
+    are snapshotted onto the order lines and the cart is emptied. Raises
+    CheckoutError (and rolls everything back) if the cart is empty or any
+    product is out of stock.
+    """
+    demand = {}
+    try:
+        with transaction.atomic():
+            # Serialise concurrent checkouts of the same cart
+            cart = Cart.objects.select_for_update().get(pk=cart.pk)
+            items = list(cart.items.select_related('product'))
+            if not items:
+                raise CheckoutError('Your cart is empty.')
+
+            for item in items:
+                # Reserved units were taken from the flash-sale counter at
+                # add-to-cart and are written back by the flash-sale flusher
+                if item.reserved:
+                    continue
+                demand[item.product_id] = demand.get(item.product_id, 0) + item.quantity
+
+            if not decrement_stock(demand):
+                raise CheckoutError('Some items in your cart are no longer available.')
+
+            lines = []
+            for item in items:
+                product = item.product
+                lines.append(OrderLine(
+                    product=product,
+                    product_name=product.name,
+                    price=product.price,
+                    discount=product.discount,
+                    unit_price=round(product.discounted_price, 2),
+                    quantity=item.quantity,
+                ))
+
+            order = Order.objects.create(
+                user=cart.user,
+                total_items=sum(line.quantity for line in lines),
+                total_price=sum(line.total_price for line in lines),
+            )
+            for line in lines:
+                line.order = order
+            OrderLine.objects.bulk_create(lines)
+
+            cart.items.all().delete()
+            transaction.on_commit(lambda: invalidate_catalog(list(demand)))
+            transaction.on_commit(lambda: category_stats.refresh_sold_out(list(demand)))
+    except CheckoutError as e:
+        if demand and not e.shortages:
+            e.shortages = _shortages(demand)
+        raise
+    return order
@@ -0,0 +1,61 @@
+from django.shortcuts import render, get_object_or_404, redirect
+from django.contrib.auth.decorators import login_required
+from django.http import JsonResponse
+from django.views.decorators.http import require_http_methods
+from django.contrib import messages
+from cart.models import Cart
+from .models import Order
+from .services import CheckoutError, checkout as checkout_cart
+
+
+@login_required
+@require_http_methods(["POST"])
+def checkout(request):
+    """Place an order for the contents of the user's cart"""
+    is_ajax = request.headers.get('x-requested-with') == 'XMLHttpRequest'
+    try:
+        cart = Cart.objects.get(user=request.user)
+        order = checkout_cart(cart)
+    except (Cart.DoesNotExist, CheckoutError) as e:
+        message = str(e) if isinstance(e, CheckoutError) else 'Your cart is empty.'
+        if is_ajax:
+            return JsonResponse({
+                'success': False,
+                'message': message,
+                'shortages': getattr(e, 'shortages', {}),
+            })
+        messages.error(request, message)
+        return redirect('cart:cart_view')
+
+    if is_ajax:
+        return JsonResponse({
+            'success': True,
+            'message': f'Order #{order.id} placed successfully!',
+            'order_id': order.id,
+            'order_url': order.get_absolute_url(),
+        })
+
+    messages.success(request, f'Order #{order.id} placed successfully!')
+    return redirect(order.get_absolute_url())
+
+
+@login_required
+def order_list(request):
+    """View for displaying the user's orders"""
+    orders = Order.objects.filter(user=request.user)
+
+    context = {
+        'orders': orders,
+    }
+    return render(request, 'orders/order_list.html', context)
+
+
+@login_required
+def order_detail(request, order_id):
+    """View for displaying a single order"""
+    order = get_object_or_404(Order.objects.prefetch_related('lines'), id=order_id, user=request.user)
+
+    context = {
+        'order': order,
+    }
+    return render(request, 'orders/order_detail.html', context)
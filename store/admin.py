@@ -1,6 +1,27 @@
-from django.contrib import admin
+from django import forms
+from django.contrib import admin, messages
+from django.contrib.admin.helpers import ActionForm
 from django.utils.html import format_html
-from .models import Category, Product, ProductImage
+from . import bulk, promotions
+from .models import Category, Product, ProductImage, Promotion
+from .pagination import EstimatedCountPaginator
+from .search import search_products
+
+
+def is_changelist_request(request, model_admin):
+    """Return True if the request is for the model admin's changelist page"""
+    opts = model_admin.model._meta
+    match = request.resolver_match
+    return bool(match) and match.url_name == f'{opts.app_label}_{opts.model_name}_changelist'
+
+
+class ProductActionForm(ActionForm):
+    """Action bar form with a value for the bulk pricing and stock actions"""
+    value = forms.DecimalField(
+        required=False,
+        label='Value',
+        help_text='Percentage or quantity used by the selected action',
+    )
 
 
 class ProductImageInline(admin.TabularInline):
@@ -13,11 +34,14 @@ class ProductImageInline(admin.TabularInline):
 @admin.register(Category)
 class CategoryAdmin(admin.ModelAdmin):
     """Admin configuration for Category model"""
-    list_display = ['name', 'slug', 'created_at']
+    list_display = ['name', 'slug', 'product_count', 'in_stock_count', 'min_price', 'created_at']
     list_filter = ['created_at']
     search_fields = ['name', 'description']
     prepopulated_fields = {'slug': ('name',)}
-    readonly_fields = ['created_at', 'updated_at']
+    readonly_fields = [
+        'created_at', 'updated_at', 'product_count', 'in_stock_count',
+        'min_price', 'max_price', 'newest_product_at', 'stats_updated_at',
+    ]
 
 
 @admin.register(Product)
@@ -25,26 +49,45 @@ class ProductAdmin(admin.ModelAdmin):
     """Admin configuration for Product model"""
     list_display = [
         'name', 'category', 'price', 'discount', 'discounted_price_display', 
-        'stock_quantity', 'is_active', 'is_featured', 'created_at'
+        'stock_quantity', 'is_active', 'is_featured', 'flash_sale', 'created_at'
     ]
-    list_filter = ['category', 'is_active', 'is_featured', 'created_at']
+    list_filter = ['category', 'is_active', 'is_featured', 'flash_sale', 'created_at']
     search_fields = ['name', 'description']
     prepopulated_fields = {'slug': ('name',)}
-    readonly_fields = ['created_at', 'updated_at', 'discounted_price_display']
+    readonly_fields = [
+        'created_at', 'updated_at', 'discount', 'promotion', 'discounted_price_display',
+        'view_count', 'cart_add_count', 'popularity',
+    ]
     inlines = [ProductImageInline]
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    list_select_related = ['category']
+    changelist_fields = [
+        'name', 'category__name', 'price', 'discount', 'stock_quantity',
+        'is_active', 'is_featured', 'flash_sale', 'created_at',
+    ]
+    action_form = ProductActionForm
+    actions = [
+        'set_discount', 'adjust_discount', 'reprice', 'restock',
+        'activate', 'deactivate', 'feature', 'unfeature',
+    ]
     
     fieldsets = (
         ('Basic Information', {
             'fields': ('name', 'slug', 'description', 'category')
         }),
         ('Pricing & Stock', {
-            'fields': ('price', 'discount', 'discounted_price_display', 'stock_quantity')
+            'fields': ('price', 'base_discount', 'discount', 'promotion', 'discounted_price_display', 'stock_quantity')
         }),
         ('Media', {
             'fields': ('image',)
         }),
         ('Status', {
-            'fields': ('is_active', 'is_featured')
+            'fields': ('is_active', 'is_featured', 'flash_sale')
+        }),
+        ('Popularity', {
+            'fields': ('view_count', 'cart_add_count', 'popularity'),
+            'classes': ('collapse',)
         }),
         ('Timestamps', {
             'fields': ('created_at', 'updated_at'),
@@ -59,7 +102,61 @@ class ProductAdmin(admin.ModelAdmin):
 
     def get_queryset(self, request):
         """Optimize queryset for admin list view"""
-        return super().get_queryset(request).select_related('category')
+        queryset = super().get_queryset(request).select_related('category')
+        if is_changelist_request(request, self):
+            queryset = queryset.only(*self.changelist_fields)
+        return queryset
+
+    def get_search_results(self, request, queryset, search_term):
+        """Search through the indexed full-text backend instead of icontains"""
+        return search_products(queryset, search_term), False
+
+    def _run_bulk(self, request, func, *args, needs_value=False):
+        """Run a bulk operation and report the outcome in the admin"""
+        if needs_value:
+            value = request.POST.get('value')
+            if value in (None, ''):
+                self.message_user(request, 'Enter a value for this action.', messages.ERROR)
+                return
+            args = (value,) + args
+        try:
+            updated = func(*args)
+        except ValueError as e:
+            self.message_user(request, str(e), messages.ERROR)
+            return
+        self.message_user(request, f'{updated} product(s) updated.', messages.SUCCESS)
+
+    @admin.action(description='Set discount to value (%%)')
+    def set_discount(self, request, queryset):
+        self._run_bulk(request, lambda value: bulk.set_discount(queryset, value), needs_value=True)
+
+    @admin.action(description='Adjust discount by value (percentage points)')
+    def adjust_discount(self, request, queryset):
+        self._run_bulk(request, lambda value: bulk.adjust_discount(queryset, value), needs_value=True)
+
+    @admin.action(description='Change price by value (%%)')
+    def reprice(self, request, queryset):
+        self._run_bulk(request, lambda value: bulk.reprice(queryset, value), needs_value=True)
+
+    @admin.action(description='Restock by value (units)')
+    def restock(self, request, queryset):
+        self._run_bulk(request, lambda value: bulk.restock(queryset, value), needs_value=True)
+
+    @admin.action(description='Activate selected %(verbose_name_plural)s')
+    def activate(self, request, queryset):
+        self._run_bulk(request, bulk.set_active, queryset, True)
+
+    @admin.action(description='Deactivate selected %(verbose_name_plural)s')
+    def deactivate(self, request, queryset):
+        self._run_bulk(request, bulk.set_active, queryset, False)
+
+    @admin.action(description='Feature selected %(verbose_name_plural)s')
+    def feature(self, request, queryset):
+        self._run_bulk(request, bulk.set_featured, queryset, True)
+
+    @admin.action(description='Unfeature selected %(verbose_name_plural)s')
+    def unfeature(self, request, queryset):
+        self._run_bulk(request, bulk.set_featured, queryset, False)
 
 
 @admin.register(ProductImage)
@@ -67,8 +164,26 @@ class ProductImageAdmin(admin.ModelAdmin):
     """Admin configuration for ProductImage model"""
     list_display = ['product', 'image_preview', 'alt_text', 'is_primary', 'created_at']
     list_filter = ['is_primary', 'created_at']
-    search_fields = ['product__name', 'alt_text']
+    search_fields = ['product__name']
     readonly_fields = ['created_at']
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    list_select_related = ['product']
+    changelist_fields = ['image', 'alt_text', 'is_primary', 'created_at', 'product__name']
+
+    def get_queryset(self, request):
+        """Only load the columns shown in the changelist"""
+        queryset = super().get_queryset(request)
+        if is_changelist_request(request, self):
+            queryset = queryset.only(*self.changelist_fields)
+        return queryset
+
+    def get_search_results(self, request, queryset, search_term):
+        """Match images by their product through the indexed search backend"""
+        if not search_term.strip():
+            return queryset, False
+        products = search_products(Product.objects.all(), search_term)
+        return queryset.filter(product__in=products.values('id')), False
 
     def image_preview(self, obj):
         """Display image preview in admin"""
@@ -80,3 +195,18 @@ class ProductImageAdmin(admin.ModelAdmin):
         return "No Image"
     image_preview.short_description = 'Preview'
 
+
+@admin.register(Promotion)
+class PromotionAdmin(admin.ModelAdmin):
+    """Admin configuration for Promotion model"""
+    list_display = ['name', 'percent', 'starts_at', 'ends_at', 'is_enabled', 'status', 'applied_at', 'finished_at']
+    list_filter = ['is_enabled', 'starts_at']
+    search_fields = ['name']
+    filter_horizontal = ['categories']
+    autocomplete_fields = ['products']
+    readonly_fields = ['applied_at', 'finished_at', 'created_at']
+
+    def save_related(self, request, form, formsets, change):
+        """Schedule the promotion once its categories and products are saved"""
+        super().save_related(request, form, formsets, change)
+        promotions.schedule(form.instance)
@@ -0,0 +1,158 @@
+"""Sparse-fieldset serialisation of products for the JSON APIs.
+
+Clients pick fields with ``?fields=id,name,price``. Only the columns those
+fields need are selected with ``values()``, so no model instances are
+built. Responses are encoded with ``orjson`` when it is installed and with
+Django's JSON encoder otherwise.
+
+``lookup_products`` serves batch lookups by ID or slug from per-product
+cache entries (``product_cache_key``, dropped by ``invalidate_catalog``)
+and loads only the misses, with one product query and one image query.
+"""
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from django.http import HttpResponse, JsonResponse
+from django.urls import reverse
+
+from .caching import PRODUCT_KEY_PREFIX, product_cache_key
+from .models import Product, ProductImage
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _image_url(name):
+    return Product._meta.get_field('image').storage.url(name) if name else None
+
+
+def _discounted_price(row):
+    price, discount = row['price'], row['discount']
+    return float(price * (1 - discount / Decimal(100)) if discount > 0 else price)
+
+
+# Field name -> (columns to select, function building the value from a row)
+FIELDS = {
+    'id': (['id'], lambda row: row['id']),
+    'name': (['name'], lambda row: row['name']),
+    'slug': (['slug'], lambda row: row['slug']),
+    'price': (['price'], lambda row: float(row['price'])),
+    'discount': (['discount'], lambda row: float(row['discount'])),
+    'discounted_price': (['price', 'discount'], _discounted_price),
+    'in_stock': (['stock_quantity'], lambda row: row['stock_quantity'] > 0),
+    'category': (['category__slug'], lambda row: row['category__slug']),
+    'image': (['image'], lambda row: _image_url(row['image'])),
+    'url': (['slug'], lambda row: reverse('store:product_detail', kwargs={'slug': row['slug']})),
+    'is_featured': (['is_featured'], lambda row: row['is_featured']),
+    'created_at': (['created_at'], lambda row: row['created_at']),
+}
+DEFAULT_FIELDS = ['id', 'name', 'price', 'discounted_price', 'image', 'url']
+
+
+def parse_fields(value, default=DEFAULT_FIELDS):
+    """Parse a ``fields=`` parameter, raising ValueError for unknown names"""
+    if not value:
+        return list(default)
+    fields = list(dict.fromkeys(name.strip() for name in value.split(',') if name.strip()))
+    unknown = [name for name in fields if name not in FIELDS]
+    if unknown:
+        raise ValueError(f'Unknown field(s): {", ".join(unknown)}')
+    return fields
+
+
+def serialize_products(queryset, fields):
+    """Serialise ``queryset`` selecting only the columns ``fields`` need"""
+    columns = list(dict.fromkeys(column for name in fields for column in FIELDS[name][0]))
+    builders = [(name, FIELDS[name][1]) for name in fields]
+    return [
+        {name: build(row) for name, build in builders}
+        for row in queryset.values(*columns)
+    ]
+
+
+def serialize_product_ids(product_ids, fields):
+    """Serialise active products by ID, in the order given"""
+    if 'id' in fields:
+        rows = serialize_products(Product.objects.filter(id__in=product_ids, is_active=True), fields)
+        by_id = {row['id']: row for row in rows}
+    else:
+        with_id = ['id'] + fields
+        rows = serialize_products(Product.objects.filter(id__in=product_ids, is_active=True), with_id)
+        by_id = {row.pop('id'): row for row in rows}
+    return [by_id[pk] for pk in product_ids if pk in by_id]
+
+
+def _slug_key(slug):
+    return f'{PRODUCT_KEY_PREFIX}:slug:{slug}'
+
+
+def _load_entries(ids, slugs):
+    """Full entries (every field) for active products matching ``ids`` or ``slugs``"""
+    columns = list(dict.fromkeys(column for columns, _ in FIELDS.values() for column in columns))
+    rows = list(
+        Product.objects.filter(Q(id__in=ids) | Q(slug__in=slugs), is_active=True).values(*columns)
+    )
+    # Products without their own image fall back to the primary (or first) gallery image
+    without_image = [row['id'] for row in rows if not row['image']]
+    gallery = {}
+    if without_image:
+        images = (
+            ProductImage.objects.filter(product_id__in=without_image)
+            .order_by('product_id', '-is_primary', 'created_at')
+            .values_list('product_id', 'image')
+        )
+        for product_id, image in images:
+            gallery.setdefault(product_id, image)
+    entries = {}
+    for row in rows:
+        row['image'] = row['image'] or gallery.get(row['id'])
+        entries[row['id']] = {name: build(row) for name, (_, build) in FIELDS.items()}
+    return entries
+
+
+def lookup_products(ids=(), slugs=()):
+    """Return ``{'id': {pk: entry}, 'slug': {slug: entry}}`` for active products.
+
+    Entries come from the product cache where possible; misses are loaded
+    in one query and cached for ``PRODUCT_CACHE_TTL`` seconds.
+    """
+    slug_ids = {}
+    if slugs:
+        found = cache.get_many([_slug_key(slug) for slug in slugs])
+        slug_ids = {slug: found[_slug_key(slug)] for slug in slugs if _slug_key(slug) in found}
+    keys = {product_cache_key(pk): pk for pk in [*ids, *slug_ids.values()]}
+    cached = {keys[key]: entry for key, entry in cache.get_many(keys).items()}
+
+    by_id = {pk: cached[pk] for pk in ids if pk in cached}
+    # A cached slug mapping is only trusted if the product still has that slug
+    by_slug = {
+        slug: cached[pk] for slug, pk in slug_ids.items()
+        if pk in cached and cached[pk]['slug'] == slug
+    }
+    missing_ids = [pk for pk in ids if pk not in by_id]
+    missing_slugs = [slug for slug in slugs if slug not in by_slug]
+    if missing_ids or missing_slugs:
+        loaded = _load_entries(missing_ids, missing_slugs)
+        timeout = getattr(settings, 'PRODUCT_CACHE_TTL', 3600)
+        cache.set_many({product_cache_key(pk): entry for pk, entry in loaded.items()}, timeout=timeout)
+        cache.set_many({_slug_key(entry['slug']): pk for pk, entry in loaded.items()}, timeout=timeout)
+        for pk, entry in loaded.items():
+            by_id.setdefault(pk, entry)
+            by_slug.setdefault(entry['slug'], entry)
+    return {'id': by_id, 'slug': by_slug}
+
+
+def json_response(data, status=200):
+    """JsonResponse that uses orjson for encoding when available"""
+    if orjson is None:
+        return JsonResponse(data, status=status, encoder=DjangoJSONEncoder)
+    return HttpResponse(
+        orjson.dumps(data, option=orjson.OPT_PASSTHROUGH_DATETIME, default=DjangoJSONEncoder().default),
+        status=status,
+        content_type='application/json',
+    )
@@ -5,3 +5,5 @@ class StoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'store'
 
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,49 @@
+import atexit
+import logging
+import threading
+
+from django.db import connection
+
+
+logger = logging.getLogger(__name__)
+
+
+class PeriodicFlusher:
+    """Run ``flush`` every ``interval`` seconds on a per-process daemon thread.
+
+    The thread is started lazily by the first ``start()`` call, so it is
+    created in each worker after forking rather than in the master. A
+    final flush also runs at interpreter exit.
+    """
+
+    def __init__(self, flush, interval):
+        self.flush = flush
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stopped = threading.Event()
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, daemon=True, name=f'flusher-{self.flush.__module__}')
+            self._thread.start()
+            atexit.register(self.run_once)
+
+    def run_once(self):
+        try:
+            self.flush()
+        except Exception:
+            logger.exception('Periodic flush %s failed', self.flush.__qualname__)
+        finally:
+            connection.close()
+
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            self.run_once()
+
+    def stop(self):
+        self._stopped.set()
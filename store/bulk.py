@@ -0,0 +1,106 @@
+from decimal import Decimal, InvalidOperation
+
+from django.db.models import Case, DecimalField, F, OuterRef, Subquery, Value, When
+from django.db.models.functions import Greatest, Least, Round
+from django.utils import timezone
+
+from . import category_stats, flash_sale
+from .caching import invalidate_catalog_on_commit
+from .models import Promotion
+from .signals import schedule_catalog_refresh
+
+
+DISCOUNT_FIELD = DecimalField(max_digits=5, decimal_places=2)
+PRICE_FIELD = DecimalField(max_digits=10, decimal_places=2)
+
+
+def _to_decimal(value):
+    """Convert user input to Decimal, raising ValueError on bad input"""
+    try:
+        return Decimal(str(value))
+    except (InvalidOperation, TypeError):
+        raise ValueError(f'Invalid number: {value!r}')
+
+
+def _apply(queryset, **updates):
+    """Run a single UPDATE over the queryset and invalidate caches once.
+
+    ``QuerySet.update`` bypasses ``Product.save()`` and ``auto_now``, so
+    ``updated_at`` is set explicitly. Returns the number of rows updated.
+    """
+    rows = list(queryset.values_list('id', 'category_id'))
+    if not rows:
+        return 0
+    product_ids = [product_id for product_id, _ in rows]
+    updates['updated_at'] = timezone.now()
+    updated = queryset.update(**updates)
+    invalidate_catalog_on_commit(product_ids)
+    category_stats.refresh_on_commit({category_id for _, category_id in rows})
+    schedule_catalog_refresh()
+    return updated
+
+
+def _discount_updates(base):
+    """Set the base discount; a running promotion still applies if it is higher"""
+    promotion_percent = Subquery(Promotion.objects.filter(pk=OuterRef('promotion_id')).values('percent')[:1])
+    return {
+        'base_discount': base,
+        'discount': Case(
+            When(promotion__isnull=True, then=base),
+            default=Greatest(base, promotion_percent),
+            output_field=DISCOUNT_FIELD,
+        ),
+    }
+
+
+def set_discount(queryset, percent):
+    """Set the discount of every product to ``percent`` (0-100)"""
+    percent = _to_decimal(percent)
+    if not 0 <= percent <= 100:
+        raise ValueError('Discount must be between 0 and 100.')
+    return _apply(queryset, **_discount_updates(Value(percent, output_field=DISCOUNT_FIELD)))
+
+
+def adjust_discount(queryset, delta):
+    """Add ``delta`` percentage points to each discount, clamped to 0-100"""
+    delta = _to_decimal(delta)
+    zero = Value(Decimal('0'), output_field=DISCOUNT_FIELD)
+    hundred = Value(Decimal('100'), output_field=DISCOUNT_FIELD)
+    adjusted = F('base_discount') + Value(delta, output_field=DISCOUNT_FIELD)
+    return _apply(queryset, **_discount_updates(Least(Greatest(adjusted, zero), hundred)))
+
+
+def reprice(queryset, percent):
+    """Change prices by ``percent`` (e.g. 10 or -10), rounded to cents"""
+    percent = _to_decimal(percent)
+    if percent <= -100:
+        raise ValueError('Price change must be greater than -100%.')
+    factor = Value(1 + percent / 100, output_field=PRICE_FIELD)
+    return _apply(
+        queryset,
+        price=Round(F('price') * factor, 2, output_field=PRICE_FIELD),
+    )
+
+
+def restock(queryset, quantity):
+    """Add ``quantity`` units to the stock of every product"""
+    try:
+        quantity = int(quantity)
+    except (TypeError, ValueError):
+        raise ValueError(f'Invalid quantity: {quantity!r}')
+    if quantity <= 0:
+        raise ValueError('Restock quantity must be positive.')
+    updated = _apply(queryset, stock_quantity=F('stock_quantity') + quantity)
+    for product in queryset.filter(flash_sale=True).only('id', 'stock_quantity'):
+        flash_sale.resync(product)
+    return updated
+
+
+def set_active(queryset, active):
+    """Activate or deactivate products"""
+    return _apply(queryset.exclude(is_active=active), is_active=active)
+
+
+def set_featured(queryset, featured):
+    """Feature or unfeature products"""
+    return _apply(queryset.exclude(is_featured=featured), is_featured=featured)
@@ -0,0 +1,62 @@
+from django.core.cache import cache
+from django.db import transaction
+
+
+CATALOG_VERSION_KEY = 'catalog:version'
+PRODUCT_KEY_PREFIX = 'catalog:product'
+
+
+def get_catalog_version():
+    """Return the current catalog version, initialising it if missing"""
+    version = cache.get(CATALOG_VERSION_KEY)
+    if version is None:
+        cache.add(CATALOG_VERSION_KEY, 1, timeout=None)
+        version = cache.get(CATALOG_VERSION_KEY, 1)
+    return version
+
+
+def bump_catalog_version():
+    """Increment the catalog version so every versioned catalog key goes stale"""
+    try:
+        return cache.incr(CATALOG_VERSION_KEY)
+    except ValueError:
+        # Key was evicted or never set; start a fresh version sequence
+        cache.add(CATALOG_VERSION_KEY, 1, timeout=None)
+        return cache.incr(CATALOG_VERSION_KEY)
+
+
+def prime_catalog_caches():
+    """Warm-up primer: initialise the catalog version and flash-sale counters"""
+    from . import flash_sale
+    from .models import Product
+
+    get_catalog_version()
+    for product in Product.objects.filter(flash_sale=True).only('id', 'stock_quantity'):
+        flash_sale.seed(product)
+
+
+def product_cache_key(product_id):
+    """Cache key for a single product entry"""
+    return f'{PRODUCT_KEY_PREFIX}:{product_id}'
+
+
+def invalidate_catalog(product_ids=None):
+    """Invalidate catalog caches after products change.
+
+    Bumps the catalog version once and drops the per-product entries for
+    ``product_ids`` in a single ``delete_many`` call, so bulk operations pay
+    for one invalidation regardless of how many rows they touched.
+    """
+    if product_ids:
+        cache.delete_many([product_cache_key(pk) for pk in product_ids])
+    return bump_catalog_version()
+
+
+def invalidate_catalog_on_commit(product_ids=None):
+    """Invalidate once the current transaction commits (immediately outside one).
+
+    Invalidating inside the transaction lets a concurrent request re-cache
+    the old rows before the change becomes visible.
+    """
+    product_ids = list(product_ids or [])
+    transaction.on_commit(lambda: invalidate_catalog(product_ids))
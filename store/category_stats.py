@@ -0,0 +1,104 @@
+"""Denormalized per-category product stats.
+
+``Category`` stores the active product count, the in-stock count, the
+lowest and highest effective (discounted) price and the newest product's
+creation time, so navigation and category pages render them without
+aggregating over ``Product``.
+
+Stats are recomputed per category, with one grouped aggregate over the
+affected categories' products (answered from the ``category_id`` index)
+and one UPDATE. Product saves and deletes refresh the product's category
+(and its previous one if it moved), bulk admin actions refresh the
+categories they touched, and checkouts and flash-sale flushes refresh the
+categories of products that sold out. ``manage.py reconcile_category_stats``
+recomputes everything to repair drift from writes that bypass these paths.
+"""
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, DecimalField, ExpressionWrapper, F, Max, Min, Q, Value
+from django.utils import timezone
+
+from .models import Category, Product
+
+
+STATS_FIELDS = [
+    'product_count', 'in_stock_count', 'min_price', 'max_price', 'newest_product_at', 'stats_updated_at',
+]
+
+EFFECTIVE_PRICE = ExpressionWrapper(
+    F('price') * (Value(Decimal('100')) - F('discount')) / Value(Decimal('100')),
+    output_field=DecimalField(max_digits=10, decimal_places=2),
+)
+
+
+def _round(value):
+    return None if value is None else Decimal(value).quantize(Decimal('0.01'))
+
+
+def compute(category_ids=None):
+    """Return ``{category_id: stats}`` for the given (or every) category"""
+    categories = Category.objects.all()
+    if category_ids is not None:
+        categories = categories.filter(id__in=category_ids)
+    stats = {
+        pk: {'product_count': 0, 'in_stock_count': 0, 'min_price': None, 'max_price': None, 'newest_product_at': None}
+        for pk in categories.values_list('id', flat=True)
+    }
+    if not stats:
+        return stats
+    rows = (
+        Product.objects.filter(category_id__in=stats, is_active=True)
+        .values('category_id')
+        .annotate(
+            product_count=Count('id'),
+            in_stock_count=Count('id', filter=Q(stock_quantity__gt=0)),
+            min_price=Min(EFFECTIVE_PRICE),
+            max_price=Max(EFFECTIVE_PRICE),
+            newest_product_at=Max('created_at'),
+        )
+        .order_by()
+    )
+    for row in rows:
+        category_id = row.pop('category_id')
+        row['min_price'] = _round(row['min_price'])
+        row['max_price'] = _round(row['max_price'])
+        stats[category_id] = row
+    return stats
+
+
+def refresh(category_ids=None):
+    """Recompute and store stats; return the categories whose stats changed"""
+    stats = compute(category_ids)
+    if not stats:
+        return []
+    current = list(Category.objects.filter(id__in=stats).only('name', *STATS_FIELDS))
+    now = timezone.now()
+    changed = []
+    for category in current:
+        values = stats[category.pk]
+        if any(getattr(category, field) != value for field, value in values.items()):
+            changed.append(category)
+        for field, value in values.items():
+            setattr(category, field, value)
+        category.stats_updated_at = now
+    # bulk_update is one UPDATE (via CachingQuerySet.update, which bumps the
+    # query cache version) and leaves updated_at, and so sitemaps, alone
+    Category.objects.bulk_update(current, STATS_FIELDS)
+    return changed
+
+
+def refresh_on_commit(category_ids):
+    """Refresh ``category_ids`` once the current transaction commits"""
+    category_ids = {pk for pk in category_ids if pk is not None}
+    if category_ids:
+        transaction.on_commit(lambda: refresh(category_ids))
+
+
+def refresh_sold_out(product_ids):
+    """Refresh the categories of any of ``product_ids`` now out of stock"""
+    if product_ids:
+        refresh_on_commit(
+            Product.objects.filter(id__in=product_ids, stock_quantity=0)
+            .values_list('category_id', flat=True).distinct()
+        )
@@ -0,0 +1,170 @@
+"""Cache-backed stock counters for products in flash-sale mode.
+
+While ``Product.flash_sale`` is set, add-to-cart reserves stock against an
+atomic counter in the shared cache instead of reading and writing the
+product row. Reserved units accumulate in a per-product pending counter,
+and ``flush()`` writes the net change back to ``stock_quantity`` in one
+batched UPDATE.
+"""
+import logging
+
+from django.core.cache import cache
+from django.db import DatabaseError, IntegrityError, transaction
+from django.db.models import Case, F, IntegerField, Value, When
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from . import category_stats
+from .caching import invalidate_catalog_on_commit
+from .models import Product
+
+
+logger = logging.getLogger(__name__)
+
+REGISTRY_KEY = 'flash:registry'
+
+
+def stock_key(product_id):
+    return f'flash:stock:{product_id}'
+
+
+def pending_key(product_id):
+    return f'flash:pending:{product_id}'
+
+
+def _incr(key, delta):
+    """Atomically add ``delta`` to a counter, creating it at zero if missing"""
+    cache.add(key, 0, timeout=None)
+    return cache.incr(key, delta)
+
+
+def pending(product_id):
+    """Units reserved in the cache but not yet written to the database"""
+    return cache.get(pending_key(product_id), 0)
+
+
+def _register(product_id):
+    registry = cache.get(REGISTRY_KEY, [])
+    if product_id not in registry:
+        cache.set(REGISTRY_KEY, registry + [product_id], timeout=None)
+
+
+def seed(product):
+    """Initialise the stock counter from the database if it is missing.
+
+    The database lags behind by the pending (unflushed) reservations, so
+    those are subtracted from ``stock_quantity``.
+    """
+    if cache.add(stock_key(product.id), product.stock_quantity - pending(product.id), timeout=None):
+        _register(product.id)
+
+
+def available(product):
+    """Stock still available to reserve for a flash-sale product"""
+    seed(product)
+    return max(cache.get(stock_key(product.id), 0), 0)
+
+
+def resync(product):
+    """Re-seed the counter after stock was changed outside the flash-sale flow"""
+    cache.set(stock_key(product.id), product.stock_quantity - pending(product.id), timeout=None)
+    _register(product.id)
+
+
+def reserve(product, quantity):
+    """Reserve ``quantity`` units, returning False if not enough are left"""
+    seed(product)
+    remaining = _incr(stock_key(product.id), -quantity)
+    if remaining < 0:
+        _incr(stock_key(product.id), quantity)
+        return False
+    _incr(pending_key(product.id), quantity)
+    return True
+
+
+def release(product_id, quantity):
+    """Return ``quantity`` previously reserved units to the counter"""
+    if quantity <= 0:
+        return
+    _incr(stock_key(product_id), quantity)
+    _incr(pending_key(product_id), -quantity)
+
+
+def _write_back(deltas):
+    """Apply ``{product_id: units}`` decrements in a single UPDATE"""
+    decrement = Case(
+        *[When(id=product_id, then=Value(delta)) for product_id, delta in deltas.items()],
+        default=Value(0),
+        output_field=IntegerField(),
+    )
+    with transaction.atomic():
+        Product.objects.filter(id__in=deltas).update(
+            bump=False,
+            stock_quantity=F('stock_quantity') - decrement,
+            updated_at=timezone.now(),
+        )
+
+
+def reconcile(product_id, delta):
+    """Recover from a failed write-back for one product.
+
+    The database is treated as the source of truth: the decrement is
+    applied clamped at zero and the cache counter is re-seeded from the
+    resulting stock.
+    """
+    with transaction.atomic():
+        Product.objects.filter(id=product_id).update(
+            bump=False,
+            stock_quantity=Greatest(F('stock_quantity') - delta, 0),
+            updated_at=timezone.now(),
+        )
+        _incr(pending_key(product_id), -delta)
+        stock = Product.objects.filter(id=product_id).values_list('stock_quantity', flat=True).first()
+    cache.set(stock_key(product_id), (stock or 0) - pending(product_id), timeout=None)
+    logger.warning('Reconciled flash-sale stock for product %s to %s', product_id, stock)
+
+
+def flush():
+    """Write pending reservations back to the database.
+
+    Returns the ``{product_id: units}`` that were written. Products whose
+    batched write fails are retried individually; a product that cannot
+    be written (for example because stock would go negative) is
+    reconciled, and anything left over stays pending for the next flush.
+    """
+    flash_ids = set(Product.objects.filter(flash_sale=True).values_list('id', flat=True))
+    registry = cache.get(REGISTRY_KEY, [])
+    product_ids = flash_ids | set(registry)
+
+    keys = {pending_key(pk): pk for pk in product_ids}
+    deltas = {keys[key]: value for key, value in cache.get_many(keys).items() if value}
+
+    flushed = {}
+    if deltas:
+        try:
+            _write_back(deltas)
+            flushed = dict(deltas)
+        except DatabaseError:
+            logger.exception('Batched flash-sale flush failed, retrying per product')
+            for product_id, delta in deltas.items():
+                try:
+                    _write_back({product_id: delta})
+                    flushed[product_id] = delta
+                except IntegrityError:
+                    reconcile(product_id, delta)
+                except DatabaseError:
+                    logger.exception('Flash-sale flush failed for product %s', product_id)
+        # Subtract exactly what was written; reservations made meanwhile stay pending
+        for product_id, delta in flushed.items():
+            _incr(pending_key(product_id), -delta)
+        if flushed:
+            invalidate_catalog_on_commit(flushed)
+            category_stats.refresh_sold_out(list(flushed))
+
+    # Forget products that left flash-sale mode once they are fully flushed
+    retired = [pk for pk in registry if pk not in flash_ids and not pending(pk)]
+    if retired:
+        cache.delete_many([stock_key(pk) for pk in retired] + [pending_key(pk) for pk in retired])
+        cache.set(REGISTRY_KEY, [pk for pk in registry if pk not in retired], timeout=None)
+
+    return flushed
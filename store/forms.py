@@ -44,6 +44,7 @@ class ProductSearchForm(forms.Form):
             ('price_high', 'Price: High to Low'),
             ('name', 'Name: A to Z'),
             ('discount', 'Best Discount'),
+            ('popular', 'Most Popular'),
         ],
         required=False,
         initial='newest',
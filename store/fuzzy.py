@@ -0,0 +1,201 @@
+"""Typo-tolerant product search and "did you mean" suggestions.
+
+Words are compared by trigram similarity, the same measure ``pg_trgm``
+uses: shared trigrams divided by the size of their union. On Postgres,
+products are matched with the ``%>`` (word similarity) operator, which is
+answered by the ``product_name_trgm`` GIN index from migration 0006. On
+other databases (SQLite in development and tests) an in-process index
+over the words of active product and category names does the same job:
+trigram -> words and word -> product IDs postings, so a lookup only
+touches words that share a trigram with the query.
+
+Suggestions always come from the in-process word index. Once a worker has
+an index, rebuilds after catalog changes run on a background thread while
+requests keep using the previous index.
+"""
+import logging
+import threading
+import time
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.contrib.postgres.lookups import TrigramWordSimilar
+from django.db import connections
+from django.db.models import F, Value
+
+from .caching import get_catalog_version
+from .search_cache import TOKEN_RE
+
+
+logger = logging.getLogger(__name__)
+
+
+MIN_WORD_LENGTH = 3
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def trigrams(word):
+    """pg_trgm-style trigrams of a single lower-case word"""
+    padded = f'  {word} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def tokenize(text):
+    return TOKEN_RE.findall((text or '').lower())
+
+
+class FuzzyIndex:
+    """Trigram index over catalog words with word -> product ID postings"""
+
+    def __init__(self, rows):
+        """``rows`` is an iterable of ``(product_id, text)``"""
+        self.postings = defaultdict(set)
+        self.frequency = Counter()
+        for product_id, text in rows:
+            for word in tokenize(text):
+                if len(word) >= MIN_WORD_LENGTH:
+                    if product_id is not None:
+                        self.postings[word].add(product_id)
+                    self.frequency[word] += 1
+        self.words = list(self.frequency)
+        self.gram_counts = []
+        self.grams = defaultdict(list)
+        for position, word in enumerate(self.words):
+            word_grams = trigrams(word)
+            self.gram_counts.append(len(word_grams))
+            for gram in word_grams:
+                self.grams[gram].append(position)
+
+    def candidates(self, word, threshold):
+        """Catalog words similar to ``word``, best first, as ``(word, score)``"""
+        if word in self.frequency:
+            return [(word, 1.0)]
+        grams = trigrams(word)
+        shared = Counter()
+        for gram in grams:
+            shared.update(self.grams.get(gram, ()))
+        matches = []
+        for position, count in shared.items():
+            score = count / (len(grams) + self.gram_counts[position] - count)
+            if score >= threshold:
+                matches.append((self.words[position], score))
+        matches.sort(key=lambda match: (-match[1], -self.frequency[match[0]]))
+        return matches
+
+    def suggest(self, query, threshold):
+        """Corrected query string, or None if every word is already known"""
+        words = tokenize(query)
+        corrected, changed = [], False
+        for word in words:
+            matches = self.candidates(word, threshold) if len(word) >= MIN_WORD_LENGTH else []
+            if matches and matches[0][0] != word:
+                corrected.append(matches[0][0])
+                changed = True
+            else:
+                corrected.append(word)
+        return ' '.join(corrected) if changed else None
+
+    def product_ids(self, query, threshold):
+        """IDs of products matching every query word, most similar first"""
+        scores = None
+        for word in tokenize(query):
+            if len(word) < MIN_WORD_LENGTH:
+                continue
+            word_scores = {}
+            for candidate, score in self.candidates(word, threshold):
+                for product_id in self.postings.get(candidate, ()):
+                    word_scores[product_id] = max(word_scores.get(product_id, 0), score)
+            if scores is None:
+                scores = word_scores
+            else:
+                scores = {pk: scores[pk] + s for pk, s in word_scores.items() if pk in scores}
+        if not scores:
+            return []
+        return sorted(scores, key=lambda pk: -scores[pk])
+
+
+_index = None
+_index_state = (None, 0.0)
+_index_lock = threading.Lock()
+
+
+def _is_fresh(version):
+    indexed, built = _index_state
+    return indexed == version or time.monotonic() - built < _setting('FUZZY_INDEX_MIN_AGE', 60)
+
+
+def _build():
+    from .models import Category, Product
+
+    version = get_catalog_version()
+    rows = list(Product.objects.filter(is_active=True).values_list('id', 'name').iterator(chunk_size=5000))
+    rows.extend((None, name) for name in Category.objects.values_list('name', flat=True))
+    return FuzzyIndex(rows), (version, time.monotonic())
+
+
+def _rebuild():
+    """Replace the index in the background; runs holding ``_index_lock``"""
+    global _index, _index_state
+    try:
+        if not _is_fresh(get_catalog_version()):
+            _index, _index_state = _build()
+    except Exception:
+        logger.exception('Rebuilding the fuzzy search index failed')
+        # Keep serving the old index and retry after FUZZY_INDEX_MIN_AGE
+        _index_state = (_index_state[0], time.monotonic())
+    finally:
+        connections.close_all()
+        _index_lock.release()
+
+
+def get_index():
+    """The worker's FuzzyIndex, rebuilt when the catalog version moves.
+
+    The first call builds the index; later rebuilds happen at most every
+    ``FUZZY_INDEX_MIN_AGE`` seconds on a background thread, and the current
+    index is returned meanwhile.
+    """
+    global _index, _index_state
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index, _index_state = _build()
+        return _index
+    if not _is_fresh(get_catalog_version()) and _index_lock.acquire(blocking=False):
+        try:
+            threading.Thread(target=_rebuild, daemon=True, name='fuzzy-index').start()
+        except RuntimeError:
+            _index_lock.release()
+            raise
+    return _index
+
+
+def suggest(query):
+    """ "Did you mean" text for ``query``, or None"""
+    return get_index().suggest(query, _setting('FUZZY_SEARCH_THRESHOLD', 0.3))
+
+
+def configure_connection(sender, connection, **kwargs):
+    """``connection_created`` receiver applying the threshold to ``%>`` on Postgres"""
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT set_config('pg_trgm.word_similarity_threshold', %s, false)",
+                [str(_setting('FUZZY_SEARCH_THRESHOLD', 0.3))],
+            )
+
+
+def uses_trigram_index(queryset):
+    return connections[queryset.db].vendor == 'postgresql'
+
+
+def fuzzy_filter(queryset, query):
+    """Restrict a Product queryset to names similar to ``query``"""
+    if uses_trigram_index(queryset):
+        # %> is answered from the gin_trgm_ops index on name
+        return queryset.filter(TrigramWordSimilar(F('name'), Value(query)))
+    product_ids = get_index().product_ids(query, _setting('FUZZY_SEARCH_THRESHOLD', 0.3))
+    return queryset.filter(id__in=product_ids[:_setting('FUZZY_SEARCH_MAX_RESULTS', 500)])
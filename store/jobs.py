@@ -0,0 +1,58 @@
+"""Background jobs for the store app (run by ``manage.py run_jobs``)"""
+import os
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from jobs.registry import job
+
+from . import promotions, sitemaps, snapshot
+from .caching import invalidate_catalog
+from .models import ProductImage
+
+
+@job('store.process_product_image', max_attempts=3)
+def process_product_image(image_id):
+    """Apply EXIF rotation, strip metadata and downscale oversized uploads"""
+    from PIL import Image, ImageOps
+
+    image = ProductImage.objects.filter(id=image_id).first()
+    if image is None or not image.has_image:
+        return
+    max_size = getattr(settings, 'PRODUCT_IMAGE_MAX_SIZE', 1600)
+    with image.image.open('rb') as f:
+        original = Image.open(f)
+        original.load()
+    image_format = original.format or 'JPEG'
+    processed = ImageOps.exif_transpose(original)
+    processed.thumbnail((max_size, max_size))
+    if processed.mode not in ('RGB', 'L') and image_format == 'JPEG':
+        processed = processed.convert('RGB')
+
+    buffer = BytesIO()
+    processed.save(buffer, format=image_format, optimize=True, **({'quality': 85} if image_format == 'JPEG' else {}))
+    storage, name = image.image.storage, image.image.name
+    # Write a new file and repoint the row before removing the original, so
+    # the row never references a missing file if a step fails
+    new_name = storage.save(name, ContentFile(buffer.getvalue()))
+    # update() skips post_save, so this does not queue the image again
+    if not ProductImage.objects.filter(id=image_id, image=name).update(image=new_name):
+        # Deleted or replaced meanwhile
+        storage.delete(new_name)
+        return
+    storage.delete(name)
+    invalidate_catalog([image.product_id])
+
+
+@job('store.refresh_derived_catalog', batch=True)
+def refresh_derived_catalog(payloads):
+    """Rebuild sitemaps and the catalog snapshot once for a burst of catalog edits"""
+    sitemaps.build()
+    if os.path.exists(snapshot.snapshot_path()):
+        snapshot.build_locked(wait=snapshot.LOCK_TIMEOUT)
+
+
+@job('store.apply_promotions', batch=True)
+def apply_promotions(payloads):
+    """Start and end promotions; queued for every promotion boundary"""
+    promotions.apply()
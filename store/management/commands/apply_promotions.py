@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+from store import promotions
+
+
+class Command(BaseCommand):
+    help = (
+        'Start due promotions and end finished ones; run_jobs does this at every boundary, '
+        'schedule this as a fallback and to cover products added to running promotions'
+    )
+
+    def handle(self, *args, **options):
+        started, ended, changed = promotions.apply()
+        self.stdout.write(self.style.SUCCESS(
+            f'{started} promotion(s) started, {ended} ended, {changed} product(s) repriced.'
+        ))
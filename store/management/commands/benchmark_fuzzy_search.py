@@ -0,0 +1,109 @@
+import random
+import string
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from store import fuzzy
+from store.models import Product
+
+
+COLORS = ['black', 'white', 'navy', 'olive', 'crimson', 'beige', 'charcoal', 'ivory', 'mustard', 'teal']
+MATERIALS = ['cotton', 'linen', 'denim', 'leather', 'suede', 'wool', 'cashmere', 'silk', 'canvas', 'velvet']
+ITEMS = [
+    'jeans', 'sneakers', 'blazer', 'dress', 'hoodie', 'sweater', 'jacket', 'shirt', 'skirt', 'boots',
+    'sandals', 'cardigan', 'trousers', 'shorts', 'scarf', 'beanie', 'backpack', 'loafers', 'parka', 'tote',
+]
+STYLES = ['classic', 'slim', 'relaxed', 'vintage', 'oversized', 'cropped', 'tailored', 'distressed', 'quilted']
+
+
+def synthetic_names(count, rng):
+    """Product names built from fashion vocabulary plus model numbers"""
+    return [
+        f'{rng.choice(STYLES)} {rng.choice(COLORS)} {rng.choice(MATERIALS)} {rng.choice(ITEMS)} '
+        f'{"".join(rng.choices(string.ascii_lowercase, k=3))}{index}'
+        for index in range(count)
+    ]
+
+
+def typo(word, rng):
+    """Apply one random edit: substitution, insertion, deletion or transposition"""
+    if len(word) < 4:
+        return word
+    position = rng.randrange(1, len(word) - 1)
+    edit = rng.choice('sidt')
+    letter = rng.choice(string.ascii_lowercase)
+    if edit == 's':
+        return word[:position] + letter + word[position + 1:]
+    if edit == 'i':
+        return word[:position] + letter + word[position:]
+    if edit == 'd':
+        return word[:position] + word[position + 1:]
+    return word[:position - 1] + word[position] + word[position - 1] + word[position + 1:]
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+class Command(BaseCommand):
+    help = 'Measure fuzzy search latency (p50/p95/p99) on a large synthetic catalog or the live database'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--products', type=int, default=100000, help='Synthetic catalog size')
+        parser.add_argument('--queries', type=int, default=2000, help='Number of misspelled queries')
+        parser.add_argument('--words', type=int, default=2, help='Words per query')
+        parser.add_argument('--threshold', type=float, default=0.3, help='Trigram similarity threshold')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--db', action='store_true',
+            help='Query the live catalog through fuzzy_filter (pg_trgm on Postgres) instead',
+        )
+
+    def handle(self, *args, **options):
+        if options['products'] < 1 or options['queries'] < 1 or options['words'] < 1:
+            raise CommandError('--products, --queries and --words must be positive.')
+        rng = random.Random(options['seed'])
+
+        if options['db']:
+            names = list(Product.objects.filter(is_active=True).values_list('name', flat=True))
+            if not names:
+                raise CommandError('The catalog has no active products.')
+            index = None
+            self.stdout.write(f'Live catalog: {len(names)} active products')
+        else:
+            names = synthetic_names(options['products'], rng)
+            started = time.perf_counter()
+            index = fuzzy.FuzzyIndex(enumerate(names))
+            self.stdout.write(
+                f'Indexed {len(names)} products ({len(index.words)} distinct words) '
+                f'in {time.perf_counter() - started:.2f}s'
+            )
+
+        queries = []
+        for _ in range(options['queries']):
+            words = [w for w in fuzzy.tokenize(rng.choice(names)) if len(w) >= 4 and not w[-1].isdigit()]
+            words = rng.sample(words, min(options['words'], len(words)))
+            queries.append((' '.join(words), ' '.join(typo(word, rng) for word in words)))
+
+        timings, corrected, found = [], 0, 0
+        for original, query in queries:
+            started = time.perf_counter()
+            if index is None:
+                suggestion = fuzzy.suggest(query)
+                matches = list(fuzzy.fuzzy_filter(Product.objects.filter(is_active=True), query)
+                               .values_list('id', flat=True)[:24])
+            else:
+                suggestion = index.suggest(query, options['threshold'])
+                matches = index.product_ids(query, options['threshold'])[:24]
+            timings.append((time.perf_counter() - started) * 1000)
+            corrected += (suggestion or query) == original
+            found += bool(matches)
+
+        total = len(queries)
+        self.stdout.write(f'Queries:        {total}')
+        self.stdout.write(f'Corrected:      {corrected / total:.1%}')
+        self.stdout.write(f'With results:   {found / total:.1%}')
+        for pct in (50, 95, 99):
+            self.stdout.write(f'p{pct}:            {percentile(timings, pct):.2f} ms')
+        self.stdout.write(f'max:            {max(timings):.2f} ms')
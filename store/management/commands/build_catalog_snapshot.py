@@ -0,0 +1,33 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from store import snapshot
+
+
+class Command(BaseCommand):
+    help = 'Build or incrementally update the memory-mapped catalog snapshot'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true', help='Re-read every product')
+        parser.add_argument(
+            '--watch', type=float, metavar='SECONDS',
+            help='Keep running and update the snapshot every SECONDS',
+        )
+
+    def handle(self, *args, **options):
+        full = options['full']
+        while True:
+            started = time.perf_counter()
+            # Wait for a build already running in a worker or job
+            result = snapshot.build_locked(full=full, wait=snapshot.LOCK_TIMEOUT)
+            if result is None:
+                raise CommandError('Another snapshot build held the lock too long; try again later')
+            reread, removed = result
+            self.stdout.write(
+                f'{reread} product(s) re-read, {removed} removed in '
+                f'{time.perf_counter() - started:.2f}s ({snapshot.snapshot_path()})'
+            )
+            if not options['watch']:
+                break
+            full = False
+            time.sleep(options['watch'])
@@ -0,0 +1,23 @@
+import time
+
+from django.core.management.base import BaseCommand
+from store import sitemaps
+
+
+class Command(BaseCommand):
+    help = 'Write product and category sitemaps, regenerating only shards whose products changed'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help='Rewrite every shard')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        written, removed, unchanged = sitemaps.build(force=options['force'])
+        for name in written:
+            self.stdout.write(f'  wrote {sitemaps.shard_filename(name)}')
+        for name in removed:
+            self.stdout.write(f'  removed {sitemaps.shard_filename(name)}')
+        self.stdout.write(self.style.SUCCESS(
+            f'{len(written)} shard(s) written, {len(removed)} removed, {unchanged} unchanged '
+            f'in {time.perf_counter() - started:.2f}s ({sitemaps.sitemap_root()}).'
+        ))
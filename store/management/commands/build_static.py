@@ -0,0 +1,55 @@
+import json
+import os
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from stylette.staticfiles import COMPRESSED_MANIFEST_NAME, brotli
+
+
+class Command(BaseCommand):
+    help = 'Collect, hash and precompress static files, then report the byte savings'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top', type=int, default=10, help='Number of largest files to list')
+        parser.add_argument('--report-only', action='store_true', help='Skip collectstatic and only report')
+        parser.add_argument('--json', action='store_true', help='Print the report as JSON')
+
+    def handle(self, *args, **options):
+        if not options['report_only']:
+            call_command('collectstatic', interactive=False, verbosity=0)
+        if brotli is None and not options['json']:
+            self.stdout.write(self.style.WARNING('brotli is not installed; only gzip variants were written.'))
+
+        path = os.path.join(settings.STATIC_ROOT, COMPRESSED_MANIFEST_NAME)
+        with open(path) as f:
+            files = json.load(f)['files']
+
+        totals = {'files': len(files), 'size': 0, 'gzip': 0, 'br': 0}
+        for entry in files.values():
+            totals['size'] += entry['size']
+            # Files without a variant are served uncompressed
+            totals['gzip'] += entry.get('gzip', entry['size'])
+            totals['br'] += entry.get('br', entry.get('gzip', entry['size']))
+
+        largest = sorted(files.items(), key=lambda item: item[1]['size'], reverse=True)[:options['top']]
+
+        if options['json']:
+            self.stdout.write(json.dumps({
+                'totals': totals,
+                'largest': [dict(entry, name=name) for name, entry in largest],
+            }, indent=2))
+            return
+
+        def saving(compressed, size):
+            return f'{compressed:>12,} B  ({100 - 100 * compressed / size:5.1f}% saved)' if size else '-'
+
+        self.stdout.write(f'Compressed files: {totals["files"]}')
+        self.stdout.write(f'Original:         {totals["size"]:>12,} B')
+        self.stdout.write(f'gzip:             {saving(totals["gzip"], totals["size"])}')
+        self.stdout.write(f'brotli:           {saving(totals["br"], totals["size"])}')
+        self.stdout.write('')
+        self.stdout.write('Largest files:')
+        for name, entry in largest:
+            best = min(entry.get('br', entry['size']), entry.get('gzip', entry['size']))
+            self.stdout.write(f'  {name}  {entry["size"]:,} B -> {best:,} B')
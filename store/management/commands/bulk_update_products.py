@@ -0,0 +1,70 @@
+from django.core.management.base import BaseCommand, CommandError
+from store import bulk
+from store.models import Product
+
+
+OPERATIONS = {
+    'set-discount': (bulk.set_discount, True),
+    'adjust-discount': (bulk.adjust_discount, True),
+    'reprice': (bulk.reprice, True),
+    'restock': (bulk.restock, True),
+    'activate': (lambda qs: bulk.set_active(qs, True), False),
+    'deactivate': (lambda qs: bulk.set_active(qs, False), False),
+    'feature': (lambda qs: bulk.set_featured(qs, True), False),
+    'unfeature': (lambda qs: bulk.set_featured(qs, False), False),
+}
+
+
+class Command(BaseCommand):
+    help = 'Apply a pricing, stock or status change to many products in one UPDATE'
+
+    def add_arguments(self, parser):
+        parser.add_argument('operation', choices=sorted(OPERATIONS))
+        parser.add_argument(
+            'value', nargs='?',
+            help='Percentage or quantity for set-discount, adjust-discount, reprice and restock',
+        )
+        parser.add_argument('--category', action='append', default=[], help='Category slug (repeatable)')
+        parser.add_argument('--ids', help='Comma-separated product IDs')
+        parser.add_argument('--active-only', action='store_true', help='Only touch active products')
+        parser.add_argument('--featured-only', action='store_true', help='Only touch featured products')
+        parser.add_argument('--min-price', help='Only products priced at or above this')
+        parser.add_argument('--max-price', help='Only products priced at or below this')
+        parser.add_argument('--dry-run', action='store_true', help='Report matching products without updating')
+
+    def handle(self, *args, **options):
+        func, needs_value = OPERATIONS[options['operation']]
+        if needs_value and options['value'] is None:
+            raise CommandError(f"'{options['operation']}' requires a value.")
+
+        products = Product.objects.all()
+        if options['category']:
+            products = products.filter(category__slug__in=options['category'])
+        if options['ids']:
+            try:
+                ids = [int(pk) for pk in options['ids'].split(',') if pk.strip()]
+            except ValueError:
+                raise CommandError('--ids must be a comma-separated list of integers.')
+            products = products.filter(id__in=ids)
+        if options['active_only']:
+            products = products.filter(is_active=True)
+        if options['featured_only']:
+            products = products.filter(is_featured=True)
+        if options['min_price']:
+            products = products.filter(price__gte=options['min_price'])
+        if options['max_price']:
+            products = products.filter(price__lte=options['max_price'])
+
+        if options['dry_run']:
+            self.stdout.write(f'{products.count()} product(s) match.')
+            return
+
+        try:
+            if needs_value:
+                updated = func(products, options['value'])
+            else:
+                updated = func(products)
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        self.stdout.write(self.style.SUCCESS(f'Updated {updated} product(s).'))
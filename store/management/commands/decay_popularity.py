@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand, CommandError
+from store import popularity
+
+
+class Command(BaseCommand):
+    help = 'Decay product popularity scores; schedule it at a fixed period (e.g. hourly)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--half-life', type=float, default=168,
+            help='Hours after which an event counts half as much (default: one week)',
+        )
+        parser.add_argument(
+            '--period', type=float, default=1,
+            help='Hours between scheduled runs (default: 1)',
+        )
+
+    def handle(self, *args, **options):
+        if options['half_life'] <= 0 or options['period'] <= 0:
+            raise CommandError('--half-life and --period must be positive.')
+        factor = 0.5 ** (options['period'] / options['half_life'])
+        updated = popularity.decay(factor)
+        self.stdout.write(self.style.SUCCESS(f'Decayed {updated} score(s) by {factor:.6f}.'))
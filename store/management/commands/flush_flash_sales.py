@@ -0,0 +1,24 @@
+import time
+
+from django.core.management.base import BaseCommand
+from store import flash_sale
+
+
+class Command(BaseCommand):
+    help = 'Write pending flash-sale reservations back to product stock'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--interval', type=float, default=0,
+            help='Keep running and flush every INTERVAL seconds (default: flush once)',
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            flushed = flash_sale.flush()
+            if flushed:
+                units = sum(flushed.values())
+                self.stdout.write(f'Flushed {units} unit(s) across {len(flushed)} product(s).')
+            if not options['interval']:
+                break
+            time.sleep(options['interval'])
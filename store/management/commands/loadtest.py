@@ -0,0 +1,93 @@
+import json
+import random
+import subprocess
+from datetime import datetime, timezone as dt_timezone
+
+from django.core.management.base import BaseCommand, CommandError
+from stylette import loadtest
+
+
+class Command(BaseCommand):
+    help = (
+        'Replay an access log or a synthetic traffic mix against a running server and '
+        'report throughput and latency percentiles per URL pattern as JSON'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--base-url', default='http://127.0.0.1:8000', help='Server to load (default: %(default)s)')
+        parser.add_argument('--log', help='Access log to replay instead of the synthetic mix')
+        parser.add_argument('--include-static', action='store_true', help='Also replay /static/ and /media/ requests')
+        parser.add_argument(
+            '--include-posts', action='store_true',
+            help='Also replay logged POSTs (sent without their original bodies; they change data on the server)',
+        )
+        parser.add_argument(
+            '--mix', default=','.join(f'{action}={weight}' for action, weight in loadtest.DEFAULT_MIX.items()),
+            help='Synthetic action weights (default: %(default)s)',
+        )
+        parser.add_argument('--requests', type=int, default=1000, help='Synthetic requests to send (default: 1000)')
+        parser.add_argument('--concurrency', type=int, default=10, help='Concurrent connections (default: 10)')
+        parser.add_argument('--users', type=int, default=20, help='Virtual users (default: 20)')
+        parser.add_argument('--anonymous', action='store_true', help='Do not sign the virtual users in')
+        parser.add_argument('--seed', type=int, help='Random seed for a repeatable synthetic run')
+        parser.add_argument('--timeout', type=float, default=30, help='Per-request timeout in seconds (default: 30)')
+        parser.add_argument('--label', help='Label stored in the report (default: current git revision)')
+        parser.add_argument('--output', help='Write the JSON report to this file instead of stdout')
+
+    def handle(self, *args, **options):
+        if options['concurrency'] < 1 or options['users'] < 1 or options['requests'] < 1:
+            raise CommandError('--concurrency, --users and --requests must be positive.')
+
+        if options['log']:
+            try:
+                with open(options['log']) as f:
+                    requests = list(loadtest.parse_log(
+                        f, include_static=options['include_static'], include_posts=options['include_posts'],
+                    ))
+            except OSError as e:
+                raise CommandError(f'Cannot read {options["log"]}: {e}')
+            if not requests:
+                raise CommandError(f'No request lines found in {options["log"]}.')
+            source = {'log': options['log']}
+        else:
+            try:
+                mix = loadtest.parse_mix(options['mix'])
+                requests = list(loadtest.synthetic(options['requests'], mix, random.Random(options['seed'])))
+            except ValueError as e:
+                raise CommandError(str(e))
+            source = {'mix': mix, 'seed': options['seed']}
+
+        users = loadtest.create_users(options['users'], anonymous=options['anonymous'])
+        runner = loadtest.Runner(options['base_url'], users, options['concurrency'], options['timeout'])
+        started_at = datetime.now(dt_timezone.utc).isoformat(timespec='seconds')
+        duration = runner.run(requests)
+
+        result = loadtest.report(
+            runner.records, duration,
+            label=options['label'] or self.git_revision(),
+            started_at=started_at,
+            base_url=options['base_url'],
+            source=source,
+            concurrency=options['concurrency'],
+            users=options['users'],
+            anonymous=options['anonymous'],
+        )
+        output = json.dumps(result, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                f.write(output + '\n')
+            total = result['total']
+            self.stderr.write(self.style.SUCCESS(
+                f"{total['requests']} request(s), {total['throughput_rps']} req/s, p99 {total['p99_ms']} ms, "
+                f"{total['errors']} error(s); report written to {options['output']}."
+            ))
+        else:
+            self.stdout.write(output)
+
+    def git_revision(self):
+        try:
+            return subprocess.run(
+                ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True,
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
@@ -72,7 +72,7 @@ class Command(BaseCommand):
                 defaults={
                     'category': category,
                     'price': Decimal(str(product_data['price'])),
-                    'discount': product_data['discount'],
+                    'base_discount': product_data['discount'],
                     'stock_quantity': product_data['stock'],
                     'description': product_data['description'],
                     'is_active': True,
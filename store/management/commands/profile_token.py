@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+from stylette.profiling import MODES, make_token
+
+
+class Command(BaseCommand):
+    help = 'Print a signed X-Profile header that profiles any request it is sent with'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--mode', choices=sorted(MODES), default='speedscope')
+
+    def handle(self, *args, **options):
+        self.stdout.write(f'X-Profile: {make_token(options["mode"])}')
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from store import category_stats
+
+
+class Command(BaseCommand):
+    help = 'Recompute denormalized category stats from products; schedule it periodically (e.g. hourly)'
+
+    def handle(self, *args, **options):
+        changed = category_stats.refresh()
+        for category in changed:
+            self.stdout.write(f'  corrected {category.name}')
+        style = self.style.WARNING if changed else self.style.SUCCESS
+        self.stdout.write(style(f'{len(changed)} category stat row(s) had drifted and were corrected.'))
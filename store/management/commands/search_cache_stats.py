@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+from store import search_cache
+
+
+class Command(BaseCommand):
+    help = 'Show search result cache hit rate and sizing counters'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reset', action='store_true', help='Reset the counters after printing')
+
+    def handle(self, *args, **options):
+        stats = search_cache.stats()
+        self.stdout.write(f'Fresh hits:        {stats["hit"]}')
+        self.stdout.write(f'Stale hits:        {stats["stale"]}')
+        self.stdout.write(f'Misses:            {stats["miss"]}')
+        self.stdout.write(f'Hit rate:          {stats["hit_rate"]:.1%}')
+        self.stdout.write(f'Entries stored:    {stats["store"]}')
+        self.stdout.write(f'Avg IDs per entry: {stats["avg_ids_per_entry"]:.1f}')
+        self.stdout.write(f'Too large to cache: {stats["oversize"]}')
+        if options['reset']:
+            search_cache.reset_stats()
+            self.stdout.write('Counters reset.')
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+from stylette import sessions
+
+
+class Command(BaseCommand):
+    help = 'Show how many session saves were written and how many were skipped as unchanged'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reset', action='store_true', help='Reset the counters after printing')
+
+    def handle(self, *args, **options):
+        stats = sessions.stats()
+        self.stdout.write(f'Writes:    {stats["write"]}')
+        self.stdout.write(f'Skipped:   {stats["skip"]}')
+        self.stdout.write(f'Skip rate: {stats["skip_rate"]:.1%}')
+        if options['reset']:
+            sessions.reset_stats()
+            self.stdout.write('Counters reset.')
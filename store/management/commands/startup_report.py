@@ -0,0 +1,73 @@
+import os
+import subprocess
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+
+BOOT_SCRIPT = '''
+import os, time
+started = time.perf_counter()
+import stylette.wsgi
+booted = time.perf_counter()
+if os.getenv('STARTUP_REPORT_WARMUP'):
+    from stylette.warmup import warm_up
+    warm_up()
+print('BOOT %f %f' % (booted - started, time.perf_counter() - booted))
+'''
+
+
+class Command(BaseCommand):
+    help = 'Boot a fresh worker process and report import time per module'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top', type=int, default=25, help='Number of modules to list')
+        parser.add_argument(
+            '--sort', choices=['cumulative', 'self'], default='cumulative',
+            help='Order modules by cumulative (incl. sub-imports) or self time',
+        )
+        parser.add_argument('--warmup', action='store_true', help='Also time the warm-up step')
+
+    def handle(self, *args, **options):
+        env = dict(os.environ)
+        env.setdefault('DJANGO_SETTINGS_MODULE', 'stylette.settings')
+        env.pop('STYLETTE_WARMUP', None)
+        if options['warmup']:
+            env['STARTUP_REPORT_WARMUP'] = '1'
+
+        started = time.perf_counter()
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', BOOT_SCRIPT],
+            env=env, capture_output=True, text=True,
+        )
+        wall = time.perf_counter() - started
+        if result.returncode != 0:
+            raise CommandError(f'Worker boot failed:\n{result.stderr[-2000:]}')
+
+        modules = []
+        for line in result.stderr.splitlines():
+            # "import time:   self [us] | cumulative | imported package"
+            if not line.startswith('import time:') or 'imported package' in line:
+                continue
+            self_us, cumulative_us, name = line[len('import time:'):].split('|')
+            modules.append((name.rstrip(), int(self_us), int(cumulative_us)))
+
+        boot = warmup = None
+        for line in result.stdout.splitlines():
+            if line.startswith('BOOT '):
+                boot, warmup = (float(value) for value in line.split()[1:])
+
+        key = 2 if options['sort'] == 'cumulative' else 1
+        self.stdout.write(f'{"module":<60} {"self ms":>9} {"cumul. ms":>10}')
+        for name, self_us, cumulative_us in sorted(modules, key=lambda m: m[key], reverse=True)[:options['top']]:
+            self.stdout.write(f'{name.strip()[:60]:<60} {self_us / 1000:9.1f} {cumulative_us / 1000:10.1f}')
+
+        self.stdout.write('')
+        self.stdout.write(f'Modules imported:   {len(modules)}')
+        self.stdout.write(f'Total import time:  {sum(m[1] for m in modules) / 1000:.1f} ms')
+        if boot is not None:
+            self.stdout.write(f'WSGI app ready in:  {boot * 1000:.1f} ms')
+            if options['warmup']:
+                self.stdout.write(f'Warm-up took:       {warmup * 1000:.1f} ms')
+        self.stdout.write(f'Process wall time:  {wall * 1000:.1f} ms')
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+from stylette.warmup import warm_up
+
+
+class Command(BaseCommand):
+    help = 'Compile templates, resolve URLs and prime catalog caches'
+
+    def handle(self, *args, **options):
+        total = 0
+        for step, count, seconds in warm_up():
+            total += seconds
+            status = 'failed' if count is None else f'{count} item(s)'
+            self.stdout.write(f'{step:<10} {status:<14} {seconds * 1000:8.1f} ms')
+        self.stdout.write(self.style.SUCCESS(f'Warm-up finished in {total * 1000:.1f} ms'))
@@ -0,0 +1,22 @@
+"""Request-scoped memo for values several templates and context processors need.
+
+Badge data (cart totals, wishlist membership) is read by context
+processors, views and template fragments during one request; ``memoize``
+computes each value once per request and hands the same object to every
+caller.
+"""
+
+MEMO_ATTR = '_stylette_memo'
+
+
+def memoize(request, key, compute):
+    """Return ``compute()`` for ``key``, computing it at most once per request"""
+    memo = request.__dict__.setdefault(MEMO_ATTR, {})
+    if key not in memo:
+        memo[key] = compute()
+    return memo[key]
+
+
+def forget(request, key):
+    """Drop a memoised value after the request changed it"""
+    request.__dict__.get(MEMO_ATTR, {}).pop(key, None)
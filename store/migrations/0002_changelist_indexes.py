@@ -0,0 +1,44 @@
+# Generated by Django 5.2.6 on 2026-10-19 04:21
+
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations, models
+
+
+def search_index():
+    # Must match store.search.product_search_vector()
+    return GinIndex(
+        SearchVector('name', 'description', config='english'),
+        name='product_search_gin',
+    )
+
+
+def create_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.add_index(apps.get_model('store', 'Product'), search_index())
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.remove_index(apps.get_model('store', 'Product'), search_index())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['-created_at'], name='product_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='productimage',
+            index=models.Index(fields=['-is_primary', 'created_at'], name='productimage_order_idx'),
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-19 04:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0002_changelist_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='flash_sale',
+            field=models.BooleanField(default=False, help_text='Reserve stock through cache counters instead of the product row'),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.6 on 2026-10-19 04:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0004_recentlyviewed'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='cart_add_count',
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='popularity',
+            field=models.FloatField(default=0, help_text='Decayed score from views and cart adds'),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='view_count',
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['-popularity'], name='product_popularity_idx'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.6 on 2026-10-19 04:45
+
+from django.contrib.postgres.indexes import GinIndex
+from django.db import migrations
+
+
+def trigram_index():
+    # Serves the %> lookups in store.fuzzy.fuzzy_filter()
+    return GinIndex(fields=['name'], name='product_name_trgm', opclasses=['gin_trgm_ops'])
+
+
+def create_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    schema_editor.add_index(apps.get_model('store', 'Product'), trigram_index())
+
+
+def drop_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.remove_index(apps.get_model('store', 'Product'), trigram_index())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0005_product_popularity'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_trigram_index, drop_trigram_index),
+    ]
@@ -0,0 +1,75 @@
+# Generated by Django 5.2.6 on 2026-10-19 04:46
+
+from decimal import Decimal
+
+from django.db import migrations, models
+from django.db.models import Count, DecimalField, ExpressionWrapper, F, Max, Min, Q, Value
+from django.utils import timezone
+
+
+def fill_category_stats(apps, schema_editor):
+    Category = apps.get_model('store', 'Category')
+    Product = apps.get_model('store', 'Product')
+    effective_price = ExpressionWrapper(
+        F('price') * (Value(Decimal('100')) - F('discount')) / Value(Decimal('100')),
+        output_field=DecimalField(max_digits=10, decimal_places=2),
+    )
+    rows = (
+        Product.objects.filter(is_active=True)
+        .values('category_id')
+        .annotate(
+            product_count=Count('id'),
+            in_stock_count=Count('id', filter=Q(stock_quantity__gt=0)),
+            min_price=Min(effective_price),
+            max_price=Max(effective_price),
+            newest_product_at=Max('created_at'),
+        )
+        .order_by()
+    )
+    now = timezone.now()
+    for row in rows:
+        category_id = row.pop('category_id')
+        for field in ('min_price', 'max_price'):
+            row[field] = Decimal(row[field]).quantize(Decimal('0.01'))
+        Category.objects.filter(id=category_id).update(**row, stats_updated_at=now)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0006_product_name_trigram'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='category',
+            name='in_stock_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='category',
+            name='max_price',
+            field=models.DecimalField(decimal_places=2, editable=False, max_digits=10, null=True),
+        ),
+        migrations.AddField(
+            model_name='category',
+            name='min_price',
+            field=models.DecimalField(decimal_places=2, editable=False, max_digits=10, null=True),
+        ),
+        migrations.AddField(
+            model_name='category',
+            name='newest_product_at',
+            field=models.DateTimeField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='category',
+            name='product_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='category',
+            name='stats_updated_at',
+            field=models.DateTimeField(editable=False, null=True),
+        ),
+        migrations.RunPython(fill_category_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,61 @@
+# Generated by Django 5.2.6 on 2026-10-19 04:49
+
+import django.core.validators
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import F
+
+
+def copy_discounts(apps, schema_editor):
+    # Existing discounts were set by hand, so they become the base discount
+    Product = apps.get_model('store', 'Product')
+    Product.objects.update(base_discount=F('discount'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0007_category_stats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='base_discount',
+            field=models.DecimalField(decimal_places=2, default=0, help_text='Discount outside of promotions', max_digits=5, validators=[django.core.validators.MinValueValidator(0), django.core.validators.MaxValueValidator(100)]),
+        ),
+        migrations.AlterField(
+            model_name='product',
+            name='discount',
+            field=models.DecimalField(decimal_places=2, default=0, help_text='Effective discount: the base discount or the active promotion, whichever is higher', max_digits=5, validators=[django.core.validators.MinValueValidator(0), django.core.validators.MaxValueValidator(100)]),
+        ),
+        migrations.CreateModel(
+            name='Promotion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=200)),
+                ('percent', models.DecimalField(decimal_places=2, max_digits=5, validators=[django.core.validators.MinValueValidator(0), django.core.validators.MaxValueValidator(100)])),
+                ('starts_at', models.DateTimeField()),
+                ('ends_at', models.DateTimeField()),
+                ('is_enabled', models.BooleanField(default=True, help_text='Disabling a running promotion ends it')),
+                ('applied_at', models.DateTimeField(blank=True, editable=False, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, editable=False, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('categories', models.ManyToManyField(blank=True, related_name='promotions', to='store.category')),
+                ('products', models.ManyToManyField(blank=True, related_name='promotions', to='store.product')),
+            ],
+            options={
+                'ordering': ['-starts_at'],
+            },
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='promotion',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='products_on_sale', to='store.promotion'),
+        ),
+        migrations.AddIndex(
+            model_name='promotion',
+            index=models.Index(fields=['starts_at', 'ends_at'], name='promotion_window_idx'),
+        ),
+        migrations.RunPython(copy_discounts, migrations.RunPython.noop),
+    ]
@@ -1,8 +1,11 @@
 from django.db import models
 from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.urls import reverse
 
+from .querycache import CachingQuerySet
+
 
 class Category(models.Model):
     """Model for product categories"""
@@ -13,6 +16,16 @@ class Category(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    # Denormalized from active products by store.category_stats
+    product_count = models.PositiveIntegerField(default=0, editable=False)
+    in_stock_count = models.PositiveIntegerField(default=0, editable=False)
+    min_price = models.DecimalField(max_digits=10, decimal_places=2, null=True, editable=False)
+    max_price = models.DecimalField(max_digits=10, decimal_places=2, null=True, editable=False)
+    newest_product_at = models.DateTimeField(null=True, editable=False)
+    stats_updated_at = models.DateTimeField(null=True, editable=False)
+
+    objects = CachingQuerySet.as_manager()
+
     class Meta:
         verbose_name_plural = 'Categories'
         ordering = ['name']
@@ -24,28 +37,66 @@ class Category(models.Model):
         return reverse('store:category_detail', kwargs={'slug': self.slug})
 
 
+class ProductQuerySet(CachingQuerySet):
+    """QuerySet with projections for product listings"""
+
+    # Columns a product card renders; leaves out description and counters
+    CARD_FIELDS = [
+        'id', 'name', 'slug', 'price', 'discount', 'category', 'stock_quantity',
+        'image', 'is_active', 'is_featured', 'flash_sale', 'created_at',
+    ]
+
+    def cards(self):
+        """Load only the columns product cards need, with their images"""
+        return self.only(*self.CARD_FIELDS).prefetch_related('images')
+
+
 class Product(models.Model):
     """Model for products in the store"""
     name = models.CharField(max_length=200)
     slug = models.SlugField(max_length=200, unique=True)
     description = models.TextField()
     price = models.DecimalField(max_digits=10, decimal_places=2, validators=[MinValueValidator(0)])
+    base_discount = models.DecimalField(
+        max_digits=5,
+        decimal_places=2,
+        default=0,
+        validators=[MinValueValidator(0), MaxValueValidator(100)],
+        help_text='Discount outside of promotions',
+    )
     discount = models.DecimalField(
         max_digits=5, 
         decimal_places=2, 
         default=0, 
-        validators=[MinValueValidator(0), MaxValueValidator(100)]
+        validators=[MinValueValidator(0), MaxValueValidator(100)],
+        help_text='Effective discount: the base discount or the active promotion, whichever is higher',
+    )
+    promotion = models.ForeignKey(
+        'Promotion', on_delete=models.SET_NULL, null=True, blank=True, related_name='products_on_sale',
     )
     category = models.ForeignKey(Category, on_delete=models.CASCADE, related_name='products')
     stock_quantity = models.PositiveIntegerField(default=0)
     image = models.ImageField(upload_to='products/', blank=True, null=True)
     is_active = models.BooleanField(default=True)
     is_featured = models.BooleanField(default=False)
+    flash_sale = models.BooleanField(
+        default=False,
+        help_text='Reserve stock through cache counters instead of the product row',
+    )
+    view_count = models.PositiveBigIntegerField(default=0)
+    cart_add_count = models.PositiveBigIntegerField(default=0)
+    popularity = models.FloatField(default=0, help_text='Decayed score from views and cart adds')
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = ProductQuerySet.as_manager()
+
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['-created_at'], name='product_created_idx'),
+            models.Index(fields=['-popularity'], name='product_popularity_idx'),
+        ]
 
     def __str__(self):
         return self.name
@@ -127,6 +178,12 @@ class Product(models.Model):
         if not self.slug:
             from django.utils.text import slugify
             self.slug = slugify(self.name)
+        # Promotions only ever raise the discount above the base discount
+        self.discount = self.base_discount
+        if self.promotion_id:
+            percent = Promotion.objects.filter(pk=self.promotion_id).values_list('percent', flat=True).first()
+            if percent is not None and percent > self.discount:
+                self.discount = percent
         super().save(*args, **kwargs)
 
 
@@ -138,8 +195,13 @@ class ProductImage(models.Model):
     is_primary = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    objects = CachingQuerySet.as_manager()
+
     class Meta:
         ordering = ['-is_primary', 'created_at']
+        indexes = [
+            models.Index(fields=['-is_primary', 'created_at'], name='productimage_order_idx'),
+        ]
 
     def __str__(self):
         return f"{self.product.name} - Image {self.id}"
@@ -160,3 +222,61 @@ class ProductImage(models.Model):
             return bool(self.image)
         return False
 
+
+class RecentlyViewed(models.Model):
+    """Persisted recently-viewed products for signed-in users"""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='recently_viewed')
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='+')
+    viewed_at = models.DateTimeField()
+
+    class Meta:
+        verbose_name_plural = 'Recently viewed'
+        unique_together = ['user', 'product']
+        ordering = ['-viewed_at']
+        indexes = [
+            models.Index(fields=['user', '-viewed_at'], name='recentlyviewed_user_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.user} viewed {self.product_id}"
+
+
+class Promotion(models.Model):
+    """Percentage discount on categories and/or products for a time window.
+
+    Applied to ``Product.discount`` by ``store.promotions`` when it starts
+    and removed when it ends.
+    """
+    name = models.CharField(max_length=200)
+    percent = models.DecimalField(
+        max_digits=5, decimal_places=2, validators=[MinValueValidator(0), MaxValueValidator(100)],
+    )
+    categories = models.ManyToManyField(Category, blank=True, related_name='promotions')
+    products = models.ManyToManyField(Product, blank=True, related_name='promotions')
+    starts_at = models.DateTimeField()
+    ends_at = models.DateTimeField()
+    is_enabled = models.BooleanField(default=True, help_text='Disabling a running promotion ends it')
+    applied_at = models.DateTimeField(null=True, blank=True, editable=False)
+    finished_at = models.DateTimeField(null=True, blank=True, editable=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-starts_at']
+        indexes = [
+            models.Index(fields=['starts_at', 'ends_at'], name='promotion_window_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.name} ({self.percent}% off)"
+
+    def clean(self):
+        if self.starts_at and self.ends_at and self.ends_at <= self.starts_at:
+            raise ValidationError({'ends_at': 'The promotion must end after it starts.'})
+
+    @property
+    def status(self):
+        if self.finished_at:
+            return 'finished'
+        if self.applied_at:
+            return 'running'
+        return 'scheduled' if self.is_enabled else 'disabled'
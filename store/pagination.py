@@ -0,0 +1,54 @@
+import json
+
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models.query import QuerySet
+from django.utils.functional import cached_property
+
+
+def estimate_count(queryset):
+    """Return the Postgres planner's row estimate for a queryset, or None.
+
+    Unfiltered querysets read ``pg_class.reltuples`` for the table; filtered
+    ones use the top-level row estimate from ``EXPLAIN``. Neither scans the
+    table, so the cost stays flat as the table grows.
+    """
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return None
+
+    with connection.cursor() as cursor:
+        if not queryset.query.where:
+            cursor.execute(
+                'SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass',
+                [queryset.model._meta.db_table],
+            )
+            row = cursor.fetchone()
+            # reltuples is -1 for tables that were never vacuumed/analyzed
+            if row is None or row[0] < 0:
+                return None
+            return int(row[0])
+
+        sql, params = queryset.query.get_compiler(using=queryset.db).as_sql()
+        cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+        plan = cursor.fetchone()[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]['Plan']['Plan Rows'])
+
+
+class EstimatedCountPaginator(Paginator):
+    """Paginator that uses planner estimates instead of COUNT(*) on large tables.
+
+    Exact counts are still used when the estimate is below
+    ``exact_count_threshold`` or on databases without planner statistics.
+    """
+    exact_count_threshold = 10000
+
+    @cached_property
+    def count(self):
+        if isinstance(self.object_list, QuerySet):
+            estimate = estimate_count(self.object_list)
+            if estimate is not None and estimate >= self.exact_count_threshold:
+                return estimate
+        return super().count
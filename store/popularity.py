@@ -0,0 +1,85 @@
+"""Product view and add-to-cart counters with batched aggregation.
+
+Events are counted in memory per worker and flushed by a background
+thread as one UPDATE that adds to ``view_count``, ``cart_add_count`` and
+``popularity`` for every touched product. ``decay()`` scales all scores
+down periodically, so ``popularity`` favours recent activity and
+``sort=popular`` can read it straight from the indexed column.
+"""
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+from django.db.models import Case, F, FloatField, IntegerField, Value, When
+
+from .buffers import PeriodicFlusher
+from .models import Product
+
+
+VIEW_WEIGHT = 1.0
+CART_ADD_WEIGHT = 5.0
+
+_counts = defaultdict(lambda: [0, 0])
+_lock = threading.Lock()
+
+
+def _record(product_id, views=0, cart_adds=0):
+    with _lock:
+        counts = _counts[product_id]
+        counts[0] += views
+        counts[1] += cart_adds
+    flusher.start()
+
+
+def record_view(product_id):
+    _record(product_id, views=1)
+
+
+def record_cart_add(product_id):
+    _record(product_id, cart_adds=1)
+
+
+def _increments(values, output_field):
+    return Case(
+        *[When(id=product_id, then=Value(value)) for product_id, value in values.items()],
+        default=Value(0),
+        output_field=output_field,
+    )
+
+
+def flush():
+    """Write the buffered counts to the database in a single UPDATE"""
+    with _lock:
+        counts = dict(_counts)
+        _counts.clear()
+    if not counts:
+        return 0
+
+    views = {pk: c[0] for pk, c in counts.items() if c[0]}
+    cart_adds = {pk: c[1] for pk, c in counts.items() if c[1]}
+    scores = {pk: c[0] * VIEW_WEIGHT + c[1] * CART_ADD_WEIGHT for pk, c in counts.items()}
+    try:
+        # Counter updates deliberately leave updated_at, the catalog
+        # version and the query cache alone; they are not content changes
+        return Product.objects.filter(id__in=counts).update(
+            bump=False,
+            view_count=F('view_count') + _increments(views, IntegerField()),
+            cart_add_count=F('cart_add_count') + _increments(cart_adds, IntegerField()),
+            popularity=F('popularity') + _increments(scores, FloatField()),
+        )
+    except Exception:
+        # Put the counts back so the next flush retries them
+        with _lock:
+            for product_id, (view_total, cart_total) in counts.items():
+                _counts[product_id][0] += view_total
+                _counts[product_id][1] += cart_total
+        raise
+
+
+def decay(factor):
+    """Multiply every popularity score by ``factor`` (0 < factor <= 1)"""
+    # Scaling every score keeps the popularity order, so cached queries stay valid
+    return Product.objects.filter(popularity__gt=0).update(bump=False, popularity=F('popularity') * factor)
+
+
+flusher = PeriodicFlusher(flush, interval=getattr(settings, 'POPULARITY_FLUSH_INTERVAL', 15))
@@ -0,0 +1,119 @@
+"""Scheduled promotions applied to ``Product.discount`` in set-based batches.
+
+``Product.discount`` always holds the effective discount, so listings,
+caches and the catalog snapshot never evaluate promotion rules per
+request. ``base_discount`` keeps the product's own discount, and
+``Product.promotion`` records which promotion is currently applied.
+
+``apply()`` runs at promotion boundaries, from the ``store.apply_promotions``
+job queued for each start and end time and from ``manage.py
+apply_promotions``. It ends expired or disabled promotions with one
+UPDATE each (back to ``base_discount``) and applies every live promotion
+with one UPDATE each, highest percentage first. A product takes a
+promotion only if that raises its discount, so overlapping promotions
+resolve to the best one. Everything runs in one transaction, followed by
+a single catalog invalidation.
+"""
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from jobs.registry import enqueue
+
+from . import category_stats
+from .caching import invalidate_catalog
+from .models import Product, Promotion
+
+
+def _scope(promotion):
+    """Products covered by a promotion's categories and product list"""
+    categories = Promotion.categories.through.objects.filter(promotion=promotion).values('category_id')
+    products = Promotion.products.through.objects.filter(promotion=promotion).values('product_id')
+    return Q(category_id__in=categories) | Q(id__in=products)
+
+
+def _update(queryset, changed, **updates):
+    changed.update(queryset.values_list('id', 'category_id'))
+    queryset.update(**updates)
+
+
+def _withdraw(promotion, changed, now):
+    """Return the promotion's products to their base discount"""
+    _update(
+        Product.objects.filter(promotion=promotion), changed,
+        discount=F('base_discount'), promotion=None, updated_at=now,
+    )
+
+
+def _start(promotion, changed, now):
+    """Give the promotion to every covered product it would discount further"""
+    _update(
+        Product.objects.filter(_scope(promotion), discount__lt=promotion.percent), changed,
+        discount=promotion.percent, promotion=promotion, updated_at=now,
+    )
+
+
+def _catalog_changed(changed):
+    from .signals import schedule_catalog_refresh
+
+    def refresh():
+        invalidate_catalog([product_id for product_id, _ in changed])
+        category_stats.refresh({category_id for _, category_id in changed})
+        schedule_catalog_refresh()
+    transaction.on_commit(refresh)
+
+
+def apply(now=None, restart=()):
+    """Start due promotions and end finished ones; return ``(started, ended, products changed)``.
+
+    Promotions in ``restart`` (IDs) are withdrawn and applied again, for
+    running promotions whose percentage or scope was edited.
+    """
+    now = now or timezone.now()
+    changed = set()
+    with transaction.atomic():
+        running = Promotion.objects.select_for_update().filter(applied_at__isnull=False, finished_at__isnull=True)
+        ending = list(running.filter(Q(ends_at__lte=now) | Q(is_enabled=False)))
+        for promotion in ending:
+            _withdraw(promotion, changed, now)
+        for promotion in running.filter(id__in=restart).exclude(id__in=[p.id for p in ending]):
+            _withdraw(promotion, changed, now)
+        Promotion.objects.filter(id__in=[p.id for p in ending]).update(finished_at=now)
+        # Windows that passed entirely while no worker was running
+        Promotion.objects.filter(applied_at__isnull=True, finished_at__isnull=True, ends_at__lte=now).update(finished_at=now)
+
+        live = list(
+            Promotion.objects.select_for_update()
+            .filter(is_enabled=True, starts_at__lte=now, ends_at__gt=now, finished_at__isnull=True)
+            .order_by('-percent')
+        )
+        for promotion in live:
+            _start(promotion, changed, now)
+        started = [p.id for p in live if p.applied_at is None]
+        Promotion.objects.filter(id__in=started).update(applied_at=now)
+
+        if changed:
+            _catalog_changed(changed)
+    return len(started), len(ending), len({product_id for product_id, _ in changed})
+
+
+def withdraw(promotion):
+    """End a promotion now, e.g. before it is deleted"""
+    Promotion.objects.filter(pk=promotion.pk).update(is_enabled=False)
+    return apply()
+
+
+def schedule(promotion):
+    """Queue ``apply()`` for the promotion's boundaries; apply now if it is due or running"""
+    now = timezone.now()
+    for boundary in (promotion.starts_at, promotion.ends_at):
+        if boundary > now:
+            enqueue(
+                'store.apply_promotions',
+                dedupe_key=f'promotions:{boundary.timestamp():.0f}',
+                delay=(boundary - now).total_seconds(),
+                on_commit=True,
+            )
+    if promotion.applied_at or promotion.starts_at <= now:
+        restart = [promotion.pk] if promotion.applied_at and not promotion.finished_at else []
+        transaction.on_commit(lambda: apply(restart=restart))
@@ -0,0 +1,173 @@
+"""Read-through cache for querysets, invalidated by per-table versions.
+
+``Model.objects.filter(...).cached(ttl=300)`` stores the evaluated rows
+(model instances with their prefetched relations) in the cache. The key
+is built from the compiled SQL and parameters, the prefetch lookups and
+the current version of every table the query and its prefetches read.
+Any write to one of those tables bumps that table's version after commit,
+so stale entries are never read again and simply expire. Writes can come
+from ``save()``/``delete()`` (via signals connected in ``StoreConfig``) or
+from queryset ``update()`` (which ``bulk_update()`` uses), ``delete()``
+and ``bulk_create()``. Hot counter writes (stock, popularity) pass
+``update(..., bump=False)`` so they do not flush every cached query on the
+table; cached rows then show those counters up to ``ttl`` seconds old.
+"""
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import EmptyResultSet
+from django.db import models, transaction
+from django.db.models import Prefetch
+
+
+def _table_key(table):
+    return f'qc:table:{table}'
+
+
+def _initial_version():
+    # Restarting from a clock value means an evicted counter never
+    # repeats a version that older entries were stored under
+    return int(time.time() * 1000)
+
+
+def table_versions(tables):
+    """Return ``{table: version}`` with one cache round trip"""
+    keys = {_table_key(table): table for table in tables}
+    found = cache.get_many(keys)
+    versions = {keys[key]: value for key, value in found.items()}
+    for key, table in keys.items():
+        if table not in versions:
+            cache.add(key, _initial_version(), timeout=None)
+            versions[table] = cache.get(key)
+    return versions
+
+
+def bump_tables(tables):
+    """Invalidate cached querysets reading ``tables`` once the transaction commits"""
+    def bump():
+        for table in tables:
+            try:
+                cache.incr(_table_key(table))
+            except ValueError:
+                cache.add(_table_key(table), _initial_version(), timeout=None)
+    transaction.on_commit(bump)
+
+
+def _lookup_tables(model, lookup):
+    """Tables read by a prefetch lookup such as ``'images'`` or ``'items__product'``"""
+    tables = set()
+    if isinstance(lookup, Prefetch):
+        if lookup.queryset is not None:
+            tables.update(_query_tables(lookup.queryset.query))
+        lookup = lookup.prefetch_through
+    for part in lookup.split('__'):
+        try:
+            field = model._meta.get_field(part)
+        except Exception:
+            break
+        if field.many_to_many and getattr(field, 'remote_field', None) and field.remote_field.through:
+            tables.add(field.remote_field.through._meta.db_table)
+        model = field.related_model
+        if model is None:
+            break
+        tables.add(model._meta.db_table)
+    return tables
+
+
+def _query_tables(query):
+    tables = {query.get_meta().db_table}
+    tables.update(alias.table_name for alias in query.alias_map.values())
+    return tables
+
+
+class CachingQuerySet(models.QuerySet):
+    """QuerySet that can serve its results from the cache with ``cached()``"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._cache_ttl = None
+
+    def _clone(self):
+        clone = super()._clone()
+        clone._cache_ttl = self._cache_ttl
+        return clone
+
+    def cached(self, ttl=None):
+        """Serve this queryset's results from the cache for up to ``ttl`` seconds"""
+        clone = self._chain()
+        clone._cache_ttl = ttl if ttl is not None else getattr(settings, 'QUERY_CACHE_TTL', 300)
+        return clone
+
+    def _cache_key(self, kind):
+        """Cache key for the current query, or None if it cannot be compiled"""
+        try:
+            sql, params = self.query.get_compiler(using=self.db).as_sql()
+        except EmptyResultSet:
+            return None
+        tables = _query_tables(self.query)
+        for lookup in self._prefetch_related_lookups:
+            tables.update(_lookup_tables(self.model, lookup))
+        versions = table_versions(sorted(tables))
+        payload = repr((
+            kind, self.db, self.model._meta.label, self._iterable_class.__name__, sql, params,
+            [lookup.prefetch_to if isinstance(lookup, Prefetch) else lookup for lookup in self._prefetch_related_lookups],
+            sorted(versions.items()),
+        ))
+        return f'qc:{hashlib.sha1(payload.encode()).hexdigest()}'
+
+    def _fetch_all(self):
+        if self._cache_ttl is None or self._result_cache is not None:
+            return super()._fetch_all()
+        key = self._cache_key('rows')
+        if key is not None:
+            rows = cache.get(key)
+            if rows is not None:
+                self._result_cache = rows
+                self._prefetch_done = True
+                return
+        super()._fetch_all()
+        if key is not None:
+            cache.set(key, self._result_cache, timeout=self._cache_ttl)
+
+    def count(self):
+        if self._cache_ttl is None or self._result_cache is not None:
+            return super().count()
+        key = self._cache_key('count')
+        if key is None:
+            return super().count()
+        count = cache.get(key)
+        if count is None:
+            count = super().count()
+            cache.set(key, count, timeout=self._cache_ttl)
+        return count
+
+    # Queryset-level writes bypass model signals, so they bump the table here
+
+    def update(self, bump=True, **kwargs):
+        """``QuerySet.update``; ``bump=False`` keeps cached queries for counter-only writes"""
+        rows = super().update(**kwargs)
+        if bump:
+            bump_tables([self.model._meta.db_table])
+        return rows
+
+    update.alters_data = True
+
+    def delete(self):
+        result = super().delete()
+        bump_tables([self.model._meta.db_table])
+        return result
+
+    delete.alters_data = True
+    delete.queryset_only = True
+
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = super().bulk_create(objs, *args, **kwargs)
+        bump_tables([self.model._meta.db_table])
+        return objs
+
+
+def model_changed(sender, **kwargs):
+    """``post_save``/``post_delete`` receiver for models using CachingQuerySet"""
+    bump_tables([sender._meta.db_table])
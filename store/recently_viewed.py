@@ -0,0 +1,145 @@
+"""Recently-viewed products with write-behind persistence.
+
+The live list for each visitor is a bounded list of ``(product_id,
+timestamp)`` pairs in the cache, keyed by user (or by session for
+anonymous visitors that already have one). Views never write to the
+database: signed-in users are marked dirty in this worker, and a
+per-worker flusher persists their lists to ``RecentlyViewed`` in batches.
+"""
+import threading
+import time
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Q
+
+from .buffers import PeriodicFlusher
+from .models import Product, RecentlyViewed
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def _user_key(user_id):
+    return f'recent:user:{user_id}'
+
+
+def _cache_key(request):
+    if request.user.is_authenticated:
+        return _user_key(request.user.id)
+    # Never create a session just to track views
+    session_key = request.session.session_key
+    if session_key:
+        return f'recent:session:{session_key}'
+    return None
+
+
+_dirty = set()
+_dirty_lock = threading.Lock()
+
+
+def _load(request, key):
+    entries = cache.get(key)
+    if entries is None and request.user.is_authenticated:
+        # Cold cache: fall back to the persisted list once
+        entries = [
+            (product_id, viewed_at.timestamp())
+            for product_id, viewed_at in RecentlyViewed.objects.filter(user=request.user)
+            .values_list('product_id', 'viewed_at')[:_setting('RECENTLY_VIEWED_LIMIT', 12)]
+        ]
+        cache.set(key, entries, timeout=_setting('RECENTLY_VIEWED_TTL', 30 * 86400))
+    return entries or []
+
+
+def record_view(request, product_id):
+    """Move ``product_id`` to the front of the visitor's recently-viewed list"""
+    key = _cache_key(request)
+    if key is None:
+        return
+    entries = [entry for entry in _load(request, key) if entry[0] != product_id]
+    entries.insert(0, (product_id, time.time()))
+    del entries[_setting('RECENTLY_VIEWED_LIMIT', 12):]
+    cache.set(key, entries, timeout=_setting('RECENTLY_VIEWED_TTL', 30 * 86400))
+
+    if request.user.is_authenticated:
+        with _dirty_lock:
+            _dirty.add(request.user.id)
+        flusher.start()
+
+
+def recently_viewed_products(request, exclude=None, limit=None):
+    """Return the visitor's recently-viewed products with one bulk lookup"""
+    key = _cache_key(request)
+    if key is None:
+        return []
+    product_ids = [product_id for product_id, _ in _load(request, key) if product_id != exclude]
+    if limit:
+        product_ids = product_ids[:limit]
+    if not product_ids:
+        return []
+    products = Product.objects.filter(is_active=True).cards().in_bulk(product_ids)
+    return [products[product_id] for product_id in product_ids if product_id in products]
+
+
+def flush():
+    """Persist the lists of users marked dirty in this worker.
+
+    All rows are upserted with one ``bulk_create`` and rows that fell off
+    the lists are removed with one DELETE.
+    """
+    with _dirty_lock:
+        user_ids = list(_dirty)
+        _dirty.clear()
+    if not user_ids:
+        return 0
+
+    lists = cache.get_many([_user_key(user_id) for user_id in user_ids])
+    # Products deleted since they were viewed cannot be persisted
+    existing = set(Product.objects.filter(
+        id__in={product_id for entries in lists.values() for product_id, _ in entries}
+    ).values_list('id', flat=True))
+
+    rows, stale = [], Q()
+    for user_id in user_ids:
+        entries = lists.get(_user_key(user_id))
+        if entries is None:
+            continue
+        entries = [entry for entry in entries if entry[0] in existing]
+        stale |= Q(user_id=user_id) & ~Q(product_id__in=[product_id for product_id, _ in entries])
+        rows.extend(
+            RecentlyViewed(
+                user_id=user_id,
+                product_id=product_id,
+                viewed_at=datetime.fromtimestamp(viewed_at, tz=dt_timezone.utc),
+            )
+            for product_id, viewed_at in entries
+        )
+    if not stale:
+        return 0
+
+    try:
+        _persist(rows, stale)
+    except Exception:
+        # Keep the users dirty so the next flush retries them
+        with _dirty_lock:
+            _dirty.update(user_ids)
+        raise
+    return len(rows)
+
+
+def _persist(rows, stale):
+    with transaction.atomic():
+        if rows:
+            RecentlyViewed.objects.bulk_create(
+                rows,
+                update_conflicts=True,
+                unique_fields=['user', 'product'],
+                update_fields=['viewed_at'],
+            )
+        RecentlyViewed.objects.filter(stale).delete()
+
+
+flusher = PeriodicFlusher(flush, interval=_setting('RECENTLY_VIEWED_FLUSH_INTERVAL', 30))
@@ -0,0 +1,37 @@
+from django.contrib.postgres.search import SearchQuery, SearchVector
+from django.db import connections
+from django.db.models import Q
+
+
+SEARCH_CONFIG = 'english'
+SEARCH_INDEX_NAME = 'product_search_gin'
+
+
+def product_search_vector():
+    """Full-text vector over name and description.
+
+    The ``product_search_gin`` index in migration 0002 is built from this
+    exact expression, so Postgres can answer matches from the index.
+    """
+    return SearchVector('name', 'description', config=SEARCH_CONFIG)
+
+
+def uses_search_index(queryset):
+    """Return True if the queryset's database has the full-text index"""
+    return connections[queryset.db].vendor == 'postgresql'
+
+
+def search_products(queryset, query):
+    """Filter a Product queryset by a free-text query.
+
+    Uses the GIN-indexed full-text vector on Postgres and falls back to
+    ``icontains`` on other databases (SQLite in development).
+    """
+    query = (query or '').strip()
+    if not query:
+        return queryset
+    if uses_search_index(queryset):
+        return queryset.alias(search_vector=product_search_vector()).filter(
+            search_vector=SearchQuery(query, config=SEARCH_CONFIG, search_type='websearch')
+        )
+    return queryset.filter(Q(name__icontains=query) | Q(description__icontains=query))
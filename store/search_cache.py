@@ -0,0 +1,113 @@
+"""Cache of ordered product ID lists for search queries.
+
+Queries are normalised only as far as the search itself ignores the
+difference (case and surrounding whitespace), so "Dress" and " DRESS "
+share one entry while "dress" and "dresses", which match different
+products, do not. Entries are
+keyed on the catalog version and the filters and sort, and hold only the
+ordered IDs. Past ``SEARCH_CACHE_TTL`` an entry is still served for
+``SEARCH_CACHE_STALE_TTL`` seconds while a background thread recomputes it.
+"""
+import hashlib
+import json
+import logging
+import re
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+
+from .caching import get_catalog_version
+
+
+logger = logging.getLogger(__name__)
+
+STATS_KEYS = ['hit', 'stale', 'miss', 'store', 'stored_ids', 'oversize']
+TOKEN_RE = re.compile(r'[\w-]+')
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def normalize_query(query):
+    """Cache key form of a search query: stripped and lower-cased, as ``icontains`` compares"""
+    return (query or '').strip().lower()
+
+
+def _key(scope, query, filters, sort):
+    payload = json.dumps([scope, query, filters, sort], sort_keys=True, default=str)
+    digest = hashlib.sha1(payload.encode()).hexdigest()
+    return f'search:v{get_catalog_version()}:{digest}'
+
+
+def _record(stat, amount=1):
+    key = f'search:stats:{stat}'
+    try:
+        cache.incr(key, amount)
+    except ValueError:
+        cache.add(key, amount, timeout=None)
+
+
+def stats():
+    """Return the hit/miss counters and derived hit rate"""
+    values = cache.get_many([f'search:stats:{stat}' for stat in STATS_KEYS])
+    result = {stat: values.get(f'search:stats:{stat}', 0) for stat in STATS_KEYS}
+    lookups = result['hit'] + result['stale'] + result['miss']
+    result['hit_rate'] = (result['hit'] + result['stale']) / lookups if lookups else 0.0
+    result['avg_ids_per_entry'] = result['stored_ids'] / result['store'] if result['store'] else 0.0
+    return result
+
+
+def reset_stats():
+    cache.delete_many([f'search:stats:{stat}' for stat in STATS_KEYS])
+
+
+def _store(key, compute):
+    ids = list(compute())
+    if len(ids) > _setting('SEARCH_CACHE_MAX_IDS', 5000):
+        _record('oversize')
+        return ids
+    timeout = _setting('SEARCH_CACHE_TTL', 300) + _setting('SEARCH_CACHE_STALE_TTL', 3600)
+    cache.set(key, {'ids': ids, 'created': time.time()}, timeout=timeout)
+    _record('store')
+    _record('stored_ids', len(ids))
+    return ids
+
+
+def _refresh_in_background(key, compute):
+    # Only one worker refreshes a given entry at a time
+    if not cache.add(f'{key}:refreshing', 1, timeout=30):
+        return
+
+    def run():
+        try:
+            _store(key, compute)
+        except Exception:
+            logger.exception('Background search cache refresh failed')
+        finally:
+            cache.delete(f'{key}:refreshing')
+            connection.close()
+
+    threading.Thread(target=run, daemon=True).start()
+
+
+def product_ids(query, filters, sort, compute, scope='list'):
+    """Return the ordered product IDs for a search.
+
+    ``query`` should already be normalised; ``compute`` returns the IDs
+    and is only called on a miss (or in the background for stale entries).
+    """
+    key = _key(scope, query, filters, sort)
+    entry = cache.get(key)
+    if entry is None:
+        _record('miss')
+        return _store(key, compute)
+    if time.time() - entry['created'] > _setting('SEARCH_CACHE_TTL', 300):
+        _record('stale')
+        _refresh_in_background(key, compute)
+    else:
+        _record('hit')
+    return entry['ids']
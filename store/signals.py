@@ -0,0 +1,93 @@
+from django.apps import apps
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from jobs.registry import enqueue
+
+from . import category_stats, flash_sale, fuzzy, promotions
+from .jobs import process_product_image, refresh_derived_catalog
+from .caching import invalidate_catalog_on_commit
+from .models import Category, Product, ProductImage, Promotion
+from .querycache import CachingQuerySet, model_changed
+
+
+connection_created.connect(fuzzy.configure_connection, dispatch_uid='fuzzy_search_threshold')
+
+
+# Bump the query cache table version of every model that can be cached
+for model in apps.get_models():
+    if issubclass(getattr(model._default_manager, '_queryset_class', type(None)), CachingQuerySet):
+        post_save.connect(model_changed, sender=model, dispatch_uid=f'querycache_save_{model._meta.label}')
+        post_delete.connect(model_changed, sender=model, dispatch_uid=f'querycache_delete_{model._meta.label}')
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+def invalidate_product(sender, instance, **kwargs):
+    """Drop cached catalog data when a single product changes"""
+    invalidate_catalog_on_commit([instance.pk])
+    schedule_catalog_refresh()
+
+
+@receiver(pre_save, sender=Product)
+def remember_previous_category(sender, instance, raw=False, **kwargs):
+    """Note the stored category so a moved product refreshes both categories' stats"""
+    if instance.pk and not raw:
+        instance._previous_category_id = (
+            Product.objects.filter(pk=instance.pk).values_list('category_id', flat=True).first()
+        )
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+def refresh_category_stats(sender, instance, **kwargs):
+    """Recompute the stats of the product's category (and the one it left)"""
+    category_stats.refresh_on_commit([instance.category_id, getattr(instance, '_previous_category_id', None)])
+
+
+@receiver(post_save, sender=Product)
+def resync_flash_sale_stock(sender, instance, **kwargs):
+    """Keep the flash-sale counter in step with stock edited in the admin"""
+    if instance.flash_sale:
+        flash_sale.resync(instance)
+
+
+@receiver(post_save, sender=ProductImage)
+@receiver(post_delete, sender=ProductImage)
+def invalidate_product_image(sender, instance, **kwargs):
+    """Product images feed card thumbnails, so refresh their product"""
+    invalidate_catalog_on_commit([instance.product_id])
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_category(sender, instance, **kwargs):
+    """Category changes affect navigation, listings and cached product entries"""
+    invalidate_catalog_on_commit(Product.objects.filter(category_id=instance.pk).values_list('id', flat=True))
+    schedule_catalog_refresh()
+
+
+@receiver(pre_delete, sender=Promotion)
+def withdraw_promotion(sender, instance, **kwargs):
+    """Restore base discounts before a promotion disappears"""
+    if instance.applied_at and not instance.finished_at:
+        promotions.withdraw(instance)
+
+
+@receiver(post_save, sender=ProductImage)
+def queue_image_processing(sender, instance, created, **kwargs):
+    """Process new uploads in the background instead of in the admin request"""
+    if created and instance.image:
+        enqueue(process_product_image, {'image_id': instance.pk}, dedupe_key=str(instance.pk), on_commit=True)
+
+
+def schedule_catalog_refresh():
+    """Queue one sitemap/snapshot rebuild for a burst of catalog edits"""
+    enqueue(
+        refresh_derived_catalog,
+        dedupe_key='catalog',
+        delay=getattr(settings, 'CATALOG_REFRESH_DELAY', 30),
+        on_commit=True,
+    )
@@ -0,0 +1,159 @@
+"""XML sitemaps for the catalog, written to disk in shards.
+
+Products are split into shards by ID range (``SITEMAP_SHARD_SIZE`` IDs per
+shard, at most 50,000 URLs each), so an edit only changes the shard that
+holds the product. A build computes a fingerprint (active count and
+latest ``updated_at``) for every shard in one grouped query and rewrites
+only the shards whose fingerprint changed since the last build; the
+fingerprints are kept in ``state.json`` next to the files. Shards are
+written by streaming rows with ``iterator()`` into a temporary file that
+replaces the old one atomically.
+"""
+import json
+import os
+import tempfile
+from xml.sax.saxutils import escape
+
+from django.conf import settings
+from django.contrib.sites.models import Site
+from django.db.models import Count, F, Max, Value
+from django.urls import reverse
+
+from .models import Category, Product
+
+
+MAX_URLS_PER_SHARD = 50000
+STATE_FILE = 'state.json'
+INDEX_FILE = 'sitemap.xml'
+XMLNS = 'http://www.sitemaps.org/schemas/sitemap/0.9'
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def sitemap_root():
+    return str(_setting('SITEMAP_ROOT', settings.BASE_DIR / 'sitemaps'))
+
+
+def shard_size():
+    return min(_setting('SITEMAP_SHARD_SIZE', MAX_URLS_PER_SHARD), MAX_URLS_PER_SHARD)
+
+
+def shard_filename(name):
+    return f'sitemap-{name}.xml'
+
+
+def base_url():
+    protocol = _setting('SITEMAP_PROTOCOL', 'https')
+    return f'{protocol}://{Site.objects.get_current().domain}'
+
+
+def _lastmod(value):
+    return value.isoformat(timespec='seconds') if value else None
+
+
+def fingerprints():
+    """Return ``{shard name: (url count, latest updated_at)}`` for every shard"""
+    size = shard_size()
+    shards = {}
+    buckets = (
+        Product.objects.filter(is_active=True)
+        .annotate(bucket=(F('id') - 1) / Value(size))
+        .values('bucket')
+        .annotate(count=Count('id'), last=Max('updated_at'))
+        .order_by('bucket')
+    )
+    for row in buckets:
+        shards[f'products-{row["bucket"] + 1}'] = (row['count'], _lastmod(row['last']))
+    categories = Category.objects.aggregate(count=Count('id'), last=Max('updated_at'))
+    if categories['count']:
+        shards['categories'] = (categories['count'], _lastmod(categories['last']))
+    return shards
+
+
+def _shard_queryset(name):
+    if name == 'categories':
+        return Category.objects.only('slug', 'updated_at').order_by('id')
+    size = shard_size()
+    number = int(name.rsplit('-', 1)[1])
+    return (
+        Product.objects.filter(is_active=True, id__gt=(number - 1) * size, id__lte=number * size)
+        .only('slug', 'updated_at')
+        .order_by('id')
+    )
+
+
+def _write_atomic(path, lines):
+    # A unique temporary file, so concurrent builds never write the same one
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.sitemap-', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.writelines(lines)
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def _shard_lines(name, base):
+    yield f'<?xml version="1.0" encoding="UTF-8"?>\n<urlset xmlns="{XMLNS}">\n'
+    for obj in _shard_queryset(name).iterator(chunk_size=2000):
+        yield (
+            f'<url><loc>{escape(base + obj.get_absolute_url())}</loc>'
+            f'<lastmod>{_lastmod(obj.updated_at)}</lastmod></url>\n'
+        )
+    yield '</urlset>\n'
+
+
+def _index_lines(shards, base):
+    yield f'<?xml version="1.0" encoding="UTF-8"?>\n<sitemapindex xmlns="{XMLNS}">\n'
+    for name, (_, lastmod) in sorted(shards.items()):
+        loc = escape(base + reverse('store:sitemap_shard', kwargs={'name': name}))
+        yield f'<sitemap><loc>{loc}</loc><lastmod>{lastmod}</lastmod></sitemap>\n'
+    yield '</sitemapindex>\n'
+
+
+def load_state():
+    try:
+        with open(os.path.join(sitemap_root(), STATE_FILE)) as f:
+            return {name: tuple(value) for name, value in json.load(f).items()}
+    except (OSError, ValueError):
+        return {}
+
+
+def build(force=False):
+    """Rewrite changed shards and the index; return ``(written, removed, unchanged)``"""
+    root = sitemap_root()
+    os.makedirs(root, exist_ok=True)
+    previous = {} if force else load_state()
+    shards = fingerprints()
+    base = base_url()
+
+    written = []
+    for name, fingerprint in shards.items():
+        path = os.path.join(root, shard_filename(name))
+        if previous.get(name) == fingerprint and os.path.exists(path):
+            continue
+        _write_atomic(path, _shard_lines(name, base))
+        written.append(name)
+
+    removed = []
+    for name in set(previous) - set(shards):
+        try:
+            os.remove(os.path.join(root, shard_filename(name)))
+        except FileNotFoundError:
+            pass
+        removed.append(name)
+
+    if written or removed or not os.path.exists(os.path.join(root, INDEX_FILE)):
+        _write_atomic(os.path.join(root, INDEX_FILE), _index_lines(shards, base))
+    _write_atomic(os.path.join(root, STATE_FILE), [json.dumps(shards, indent=1, sort_keys=True)])
+    return written, removed, len(shards) - len(written)
+
+
+def file_path(name=None):
+    """Path of the built index (or of shard ``name``), or None if missing"""
+    path = os.path.join(sitemap_root(), shard_filename(name) if name else INDEX_FILE)
+    return path if os.path.isfile(path) else None
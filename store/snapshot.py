@@ -0,0 +1,372 @@
+"""Read-only catalog snapshot shared by all workers through ``mmap``.
+
+The snapshot holds the active products as typed columns (``array`` data)
+plus a string table for names, slugs and image URLs, and one precomputed
+row order per listing sort. Every worker maps the same file, so the data
+is stored once in the page cache instead of once per process, and cold
+workers do not have to query the database to fill a cache.
+
+``build()`` rewrites the file incrementally. Rows come from the previous
+snapshot, and only products whose ``updated_at`` moved, plus new and
+removed IDs, are re-read. Changed products are found by comparing each
+recently updated row's ``updated_at`` with the snapshot, looking back
+``CATALOG_SNAPSHOT_OVERLAP`` seconds before the newest timestamp seen, so
+transactions that commit after a build with an earlier ``updated_at`` are
+still picked up. The new file is written to a unique temporary file next
+to the old one and swapped in with ``os.replace``, so readers never see a
+partial file and keep using their old mapping until they notice the new
+inode. Builds hold a cache lock (``build_locked()``), so the refresher,
+the catalog job and ``manage.py build_catalog_snapshot`` never race.
+
+File layout: ``MAGIC``, a little-endian u32 header length, a JSON header
+describing the columns, then the 8-byte aligned column data.
+"""
+import json
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import time
+from array import array
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Max
+
+from .buffers import PeriodicFlusher
+from .models import Category, Product
+
+
+MAGIC = b'STYSNAP1'
+LOCK_KEY = 'catalog:snapshot:refreshing'
+LOCK_TIMEOUT = 300
+SORTS = ['newest', 'price', 'name', 'discount', 'popular']
+# Column name -> array typecode
+COLUMNS = {
+    'id': 'q',
+    'category': 'i',
+    'price': 'd',
+    'effective_price': 'd',
+    'discount': 'd',
+    'in_stock': 'B',
+    'is_featured': 'B',
+    'created': 'd',
+    'updated': 'd',
+    'popularity': 'd',
+    'name': 'I',
+    'slug': 'I',
+    'image': 'i',
+}
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def snapshot_path():
+    return str(_setting('CATALOG_SNAPSHOT_PATH', settings.BASE_DIR / 'snapshots' / 'catalog.bin'))
+
+
+def _timestamp(value):
+    return value.timestamp() if value else 0.0
+
+
+class CatalogSnapshot:
+    """A mapped snapshot file; columns are zero-copy ``memoryview`` casts"""
+
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(self._mmap)
+        if bytes(view[:len(MAGIC)]) != MAGIC:
+            raise ValueError(f'{path} is not a catalog snapshot')
+        (header_length,) = struct.unpack_from('<I', view, len(MAGIC))
+        start = len(MAGIC) + 4
+        self.header = json.loads(bytes(view[start:start + header_length]))
+        data = _align(start + header_length)
+        self.columns = {
+            name: view[data + offset:data + offset + length].cast(typecode)
+            for name, (typecode, offset, length) in self.header['columns'].items()
+        }
+        self.categories = {slug: index for index, slug in enumerate(self.header['categories'])}
+        self._stat = os.stat(path)
+
+    def __len__(self):
+        return self.header['count']
+
+    def string(self, ref):
+        if ref < 0:
+            return None
+        offsets = self.columns['string_offsets']
+        return bytes(self.columns['strings'][offsets[ref]:offsets[ref + 1]]).decode()
+
+    def row(self, index):
+        """Decode one row into a dict of plain values"""
+        row = {name: self.columns[name][index] for name in COLUMNS}
+        row['name'] = self.string(row['name'])
+        row['slug'] = self.string(row['slug'])
+        row['image'] = self.string(row['image'])
+        row['category'] = self.header['categories'][row['category']]
+        row['in_stock'] = bool(row['in_stock'])
+        row['is_featured'] = bool(row['is_featured'])
+        return row
+
+    def rows(self):
+        return [self.row(index) for index in range(len(self))]
+
+    def query(self, category=None, min_price=None, max_price=None, sort='newest'):
+        """Ordered product IDs for a listing, mirroring ``filter_products``.
+
+        Returns None if the snapshot cannot answer (e.g. unparseable price
+        bounds), so the caller can fall back to SQL.
+        """
+        try:
+            low = float(min_price) if min_price else None
+            high = float(max_price) if max_price else None
+        except ValueError:
+            return None
+        if category:
+            if category not in self.categories:
+                return []
+            category = self.categories[category]
+        else:
+            category = None
+
+        if sort in ('price_low', 'price_high'):
+            order = self.columns['order_price']
+        elif sort in SORTS:
+            order = self.columns[f'order_{sort}']
+        else:
+            order = self.columns['order_newest']
+        if sort == 'price_high':
+            order = reversed(order)
+
+        ids, prices, categories = self.columns['id'], self.columns['price'], self.columns['category']
+        return [
+            ids[index] for index in order
+            if (category is None or categories[index] == category)
+            and (low is None or prices[index] >= low)
+            and (high is None or prices[index] <= high)
+        ]
+
+
+def _align(offset):
+    return (offset + 7) & ~7
+
+
+def _image_url(product):
+    """Primary image URL from the row and its prefetched gallery, without storage lookups"""
+    if product.image:
+        return product.image.url
+    # Gallery images are ordered primary first
+    images = product.images.all()
+    return images[0].image.url if images else None
+
+
+def _product_row(product):
+    return {
+        'id': product.id,
+        'slug': product.slug,
+        'name': product.name,
+        'category': product.category.slug,
+        'price': float(product.price),
+        'effective_price': float(product.discounted_price),
+        'discount': float(product.discount),
+        'in_stock': product.stock_quantity > 0,
+        'is_featured': product.is_featured,
+        'created': _timestamp(product.created_at),
+        'updated': _timestamp(product.updated_at),
+        'popularity': product.popularity,
+        'image': _image_url(product),
+    }
+
+
+def _load_products(queryset):
+    return {
+        product.id: _product_row(product)
+        for product in queryset.select_related('category').prefetch_related('images').iterator(chunk_size=1000)
+    }
+
+
+def write(path, rows, meta):
+    """Write ``rows`` to ``path`` atomically"""
+    rows = sorted(rows, key=lambda row: row['id'])
+    categories = sorted({row['category'] for row in rows})
+    category_index = {slug: index for index, slug in enumerate(categories)}
+
+    strings, string_offsets, blob_length = [], array('I', [0]), 0
+
+    def add_string(value):
+        nonlocal blob_length
+        if value is None:
+            return -1
+        encoded = value.encode()
+        strings.append(encoded)
+        blob_length += len(encoded)
+        string_offsets.append(blob_length)
+        return len(string_offsets) - 2
+
+    columns = {name: array(typecode) for name, typecode in COLUMNS.items()}
+    for row in rows:
+        for name in COLUMNS:
+            if name in ('name', 'slug', 'image'):
+                columns[name].append(add_string(row[name]))
+            elif name == 'category':
+                columns[name].append(category_index[row[name]])
+            else:
+                columns[name].append(int(row[name]) if COLUMNS[name] in 'qiB' else float(row[name]))
+
+    positions = range(len(rows))
+    sort_keys = {
+        'newest': lambda i: -rows[i]['created'],
+        'price': lambda i: (rows[i]['price'], -rows[i]['created']),
+        'name': lambda i: rows[i]['name'],
+        'discount': lambda i: (-rows[i]['discount'], -rows[i]['created']),
+        'popular': lambda i: (-rows[i]['popularity'], -rows[i]['created']),
+    }
+    for sort, key in sort_keys.items():
+        columns[f'order_{sort}'] = array('I', sorted(positions, key=key))
+    columns['string_offsets'] = string_offsets
+    columns['strings'] = array('B', b''.join(strings))
+
+    layout, offset = {}, 0
+    for name, values in columns.items():
+        length = len(values) * values.itemsize
+        layout[name] = [values.typecode, offset, length]
+        offset = _align(offset + length)
+    header = json.dumps({
+        **meta,
+        'count': len(rows),
+        'categories': categories,
+        'columns': layout,
+    }).encode()
+
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.catalog-', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(MAGIC)
+            f.write(struct.pack('<I', len(header)))
+            f.write(header)
+            f.write(b'\0' * (_align(f.tell()) - f.tell()))
+            for values in columns.values():
+                values.tofile(f)
+                f.write(b'\0' * (_align(f.tell()) - f.tell()))
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def build(full=False):
+    """Bring the snapshot up to date; return ``(rows re-read, rows removed)``.
+
+    Returns ``(0, 0)`` without rewriting the file when nothing changed.
+    """
+    path = snapshot_path()
+    previous = None
+    if not full:
+        try:
+            previous = CatalogSnapshot(path)
+        except (OSError, ValueError):
+            previous = None
+    if previous is not None:
+        full_age = time.time() - previous.header['full_built_at']
+        category_changed = _timestamp(Category.objects.aggregate(last=Max('updated_at'))['last'])
+        if full_age > _setting('CATALOG_SNAPSHOT_FULL_REBUILD_INTERVAL', 3600) or \
+                category_changed > previous.header['max_updated']:
+            # Image and category edits do not touch Product.updated_at
+            previous = None
+
+    active = Product.objects.filter(is_active=True)
+    if previous is None:
+        rows = _load_products(active)
+        removed = 0
+        full_built_at = time.time()
+    else:
+        # A transaction that commits late can carry an updated_at older than
+        # the high-water mark, so look back by a margin and compare timestamps
+        since = datetime.fromtimestamp(
+            previous.header['max_updated'] - _setting('CATALOG_SNAPSHOT_OVERLAP', 300), tz=dt_timezone.utc,
+        )
+        rows = {row['id']: row for row in previous.rows()}
+        active_ids = set(active.values_list('id', flat=True))
+        removed = len(rows.keys() - active_ids)
+        rows = {pk: row for pk, row in rows.items() if pk in active_ids}
+        stale = {
+            pk for pk, updated_at in active.filter(updated_at__gte=since).values_list('id', 'updated_at')
+            if pk not in rows or rows[pk]['updated'] != _timestamp(updated_at)
+        }
+        reread = (active_ids - rows.keys()) | stale
+        rows.update(_load_products(active.filter(id__in=reread)))
+        full_built_at = previous.header['full_built_at']
+        if not reread and not removed:
+            os.utime(path)
+            return 0, 0
+
+    max_updated = max([row['updated'] for row in rows.values()], default=0.0)
+    category_updated = _timestamp(Category.objects.aggregate(last=Max('updated_at'))['last'])
+    write(path, rows.values(), {
+        'built_at': time.time(),
+        'full_built_at': full_built_at,
+        'max_updated': max(max_updated, category_updated),
+    })
+    return (len(rows) if previous is None else len(reread)), removed
+
+
+_current = None
+_current_lock = threading.Lock()
+
+
+def get_snapshot():
+    """The current mapped snapshot, or None if missing or too old.
+
+    The file's inode is checked on every call, so a rebuilt snapshot is
+    picked up by every worker on its next request.
+    """
+    global _current
+    path = snapshot_path()
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    if time.time() - stat.st_mtime > _setting('CATALOG_SNAPSHOT_MAX_AGE', 900):
+        return None
+    current = _current
+    if current is None or (current._stat.st_ino, current._stat.st_dev) != (stat.st_ino, stat.st_dev):
+        with _current_lock:
+            try:
+                current = _current = CatalogSnapshot(path)
+            except (OSError, ValueError):
+                return None
+    if _setting('CATALOG_SNAPSHOT_REFRESH_INTERVAL', 0):
+        refresher.start()
+    return current
+
+
+def build_locked(full=False, wait=0):
+    """``build()`` under the shared build lock, waiting up to ``wait`` seconds for it.
+
+    Returns None if another process kept the lock the whole time.
+    """
+    deadline = time.monotonic() + wait
+    while not cache.add(LOCK_KEY, 1, timeout=LOCK_TIMEOUT):
+        if time.monotonic() >= deadline:
+            return None
+        time.sleep(0.5)
+    try:
+        return build(full=full)
+    finally:
+        cache.delete(LOCK_KEY)
+
+
+def refresh():
+    """Background refresher: one worker at a time rebuilds the shared file"""
+    build_locked()
+
+
+refresher = PeriodicFlusher(refresh, interval=_setting('CATALOG_SNAPSHOT_REFRESH_INTERVAL', 0) or 60)
@@ -0,0 +1,179 @@
+"""Token-bucket rate limiting for hot endpoints.
+
+Every request takes one token from a bucket per client IP and, for
+signed-in users, one per user; a request is refused with ``429`` and a
+``Retry-After`` header when either bucket is empty. With the Redis cache
+backend both buckets are checked and updated atomically by one Lua
+script, which is a single round trip. Other cache backends fall back to
+in-process buckets, which is what tests and single-process development
+servers use.
+
+Limits are set per view with the ``throttle`` decorator and can be
+overridden per scope with the ``THROTTLE_RATES`` setting.
+"""
+import logging
+import math
+import threading
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.redis import RedisCache
+from django.http import JsonResponse
+
+
+logger = logging.getLogger(__name__)
+
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+# KEYS: bucket keys; ARGV: rate (tokens/s), burst, now, ttl.
+# Returns the seconds to wait as a string, "0" if the request is allowed.
+TOKEN_BUCKET_LUA = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local ttl = tonumber(ARGV[4])
+local wait = 0
+local levels = {}
+for i, key in ipairs(KEYS) do
+    local state = redis.call('HMGET', key, 'tokens', 'ts')
+    local tokens = tonumber(state[1]) or burst
+    local ts = tonumber(state[2]) or now
+    tokens = math.min(burst, tokens + math.max(0, now - ts) * rate)
+    levels[i] = tokens
+    if tokens < 1 then
+        wait = math.max(wait, (1 - tokens) / rate)
+    end
+end
+for i, key in ipairs(KEYS) do
+    local tokens = levels[i]
+    if wait == 0 then
+        tokens = tokens - 1
+    end
+    redis.call('HSET', key, 'tokens', tostring(tokens), 'ts', tostring(now))
+    redis.call('EXPIRE', key, ttl)
+end
+return tostring(wait)
+"""
+
+
+def parse_rate(rate):
+    """Parse ``'<count>/<s|m|h|d>'`` into ``(tokens per second, count)``"""
+    count, _, period = rate.partition('/')
+    try:
+        return int(count) / PERIODS[period.strip().lower()[:1]], int(count)
+    except (ValueError, KeyError):
+        raise ValueError(f'Invalid throttle rate {rate!r}; expected e.g. "10/s" or "60/m"')
+
+
+class LocalBuckets:
+    """In-process token buckets with the same semantics as the Lua script"""
+    max_buckets = 10000
+
+    def __init__(self):
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def consume(self, keys, rate, burst, now, ttl):
+        with self._lock:
+            if len(self._buckets) > self.max_buckets:
+                self._buckets = {k: v for k, v in self._buckets.items() if now - v[1] <= ttl}
+            levels = []
+            wait = 0.0
+            for key in keys:
+                tokens, ts = self._buckets.get(key, (burst, now))
+                if now - ts > ttl:
+                    tokens, ts = burst, now
+                tokens = min(burst, tokens + max(0.0, now - ts) * rate)
+                levels.append(tokens)
+                if tokens < 1:
+                    wait = max(wait, (1 - tokens) / rate)
+            for key, tokens in zip(keys, levels):
+                self._buckets[key] = (tokens - 1 if wait == 0 else tokens, now)
+            return wait
+
+    def clear(self):
+        with self._lock:
+            self._buckets.clear()
+
+
+local_buckets = LocalBuckets()
+_script = None
+
+
+def _token_bucket_script():
+    """The Lua script, created once per process and run against any client"""
+    global _script
+    if _script is None:
+        from redis.commands.core import Script
+
+        _script = Script(None, TOKEN_BUCKET_LUA)
+    return _script
+
+
+def _redis_consume(cache, keys, rate, burst, now, ttl):
+    keys = [cache.make_and_validate_key(key) for key in keys]
+    client = cache._cache.get_client(keys[0], write=True)
+    # EVALSHA with a transparent EVAL fallback the first time a server sees it
+    script = _token_bucket_script()
+    return float(script(keys=keys, args=[rate, burst, now, ttl], client=client))
+
+
+def consume(keys, rate, burst):
+    """Take a token from each bucket in ``keys``; return seconds to wait (0 if allowed)"""
+    cache = caches[getattr(settings, 'THROTTLE_CACHE', 'default')]
+    now = time.time()
+    # Idle buckets expire once they would have refilled anyway
+    ttl = max(1, math.ceil(burst / rate))
+    if isinstance(cache, RedisCache):
+        return _redis_consume(cache, keys, rate, burst, now, ttl)
+    return local_buckets.consume(keys, rate, burst, now, ttl)
+
+
+def client_ip(request):
+    """Client IP, taken from ``THROTTLE_IP_HEADER`` when behind a trusted proxy"""
+    header = getattr(settings, 'THROTTLE_IP_HEADER', None)
+    if header and request.headers.get(header):
+        return request.headers[header].split(',')[0].strip()
+    return request.META.get('REMOTE_ADDR', '')
+
+
+def bucket_keys(request, scope):
+    keys = [f'throttle:{scope}:ip:{client_ip(request)}']
+    if request.user.is_authenticated:
+        keys.append(f'throttle:{scope}:user:{request.user.id}')
+    return keys
+
+
+def throttle(scope, rate, burst=None):
+    """Limit a view to ``rate`` requests per client with bursts of ``burst``.
+
+    ``THROTTLE_RATES = {scope: (rate, burst)}`` overrides the decorator's
+    limits without a code change.
+    """
+    def decorator(view_func):
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            if not getattr(settings, 'THROTTLE_ENABLED', True):
+                return view_func(request, *args, **kwargs)
+            scope_rate, scope_burst = getattr(settings, 'THROTTLE_RATES', {}).get(scope, (rate, burst))
+            tokens_per_second, count = parse_rate(scope_rate)
+            try:
+                # Without an explicit burst a full period's worth may arrive at once
+                wait = consume(bucket_keys(request, scope), tokens_per_second, scope_burst or count)
+            except Exception:
+                # Fail open: an unavailable cache must not take the endpoint down
+                logger.exception('Throttle check failed for %s', scope)
+                wait = 0
+            if wait > 0:
+                retry_after = max(1, math.ceil(wait))
+                response = JsonResponse(
+                    {'success': False, 'message': 'Too many requests. Please slow down.', 'retry_after': retry_after},
+                    status=429,
+                )
+                response['Retry-After'] = str(retry_after)
+                return response
+            return view_func(request, *args, **kwargs)
+        return wrapper
+    return decorator
@@ -9,5 +9,9 @@ urlpatterns = [
     path('product/<slug:slug>/', views.product_detail, name='product_detail'),
     path('category/<slug:slug>/', views.category_detail, name='category_detail'),
     path('api/search/', views.product_search_api, name='product_search_api'),
+    path('api/products/', views.product_list_api, name='product_list_api'),
+    path('api/products/batch/', views.product_batch_api, name='product_batch_api'),
+    path('sitemap.xml', views.sitemap, name='sitemap'),
+    path('sitemaps/sitemap-<slug:name>.xml', views.sitemap, name='sitemap_shard'),
 ]
 
@@ -1,9 +1,15 @@
+from django.conf import settings
 from django.shortcuts import render, get_object_or_404
 from django.core.paginator import Paginator
 from django.db.models import Q
 from django.contrib.auth.decorators import login_required
-from django.http import JsonResponse
+from django.http import FileResponse, Http404, JsonResponse
 from django.views.decorators.http import require_http_methods
+from . import fuzzy, popularity, search_cache, sitemaps
+from .snapshot import get_snapshot
+from .throttling import throttle
+from .api import json_response, lookup_products, parse_fields, serialize_product_ids, serialize_products
+from .recently_viewed import record_view, recently_viewed_products
 from .models import Product, Category
 
 
@@ -11,24 +17,25 @@ def home(request):
     """Home page view displaying featured products and categories"""
     featured_products = (
         Product.objects.filter(is_featured=True, is_active=True)
-        .prefetch_related('images')
-        .order_by('-created_at')[:8]
+        .cards()
+        .order_by('-created_at')
+        .cached()[:8]
     )
-    categories = Category.objects.all()[:6]
+    categories = Category.objects.cached()[:6]
     
     context = {
         'featured_products': featured_products,
         'categories': categories,
+        'recently_viewed': recently_viewed_products(request, limit=8),
     }
     return render(request, 'store/home.html', context)
 
 
-def product_list(request):
-    """View for displaying all products with filtering and pagination"""
+def filter_products(search_query=None, category_slug=None, min_price=None, max_price=None, sort_by='newest'):
+    """Build the product listing queryset for the given filters and sort"""
     products = Product.objects.filter(is_active=True)
     
     # Search functionality
-    search_query = request.GET.get('search')
     if search_query:
         products = products.filter(
             Q(name__icontains=search_query) | 
@@ -37,20 +44,16 @@ def product_list(request):
         )
     
     # Category filtering
-    category_slug = request.GET.get('category')
     if category_slug:
         products = products.filter(category__slug=category_slug)
     
     # Price filtering
-    min_price = request.GET.get('min_price')
-    max_price = request.GET.get('max_price')
     if min_price:
         products = products.filter(price__gte=min_price)
     if max_price:
         products = products.filter(price__lte=max_price)
     
     # Sorting
-    sort_by = request.GET.get('sort', 'newest')
     if sort_by == 'price_low':
         products = products.order_by('price')
     elif sort_by == 'price_high':
@@ -59,13 +62,80 @@ def product_list(request):
         products = products.order_by('name')
     elif sort_by == 'discount':
         products = products.order_by('-discount')
+    elif sort_by == 'popular':
+        products = products.order_by('-popularity')
     else:  # newest
         products = products.order_by('-created_at')
     
-    # Pagination
-    paginator = Paginator(products, 12)
+    return products
+
+
+def fuzzy_product_ids(search_query, category_slug=None, min_price=None, max_price=None, sort_by='newest', limit=None):
+    """Typo-tolerant fallback for searches that matched nothing, cached like exact searches"""
+    query = ' '.join(fuzzy.tokenize(search_query))
+    if not query:
+        return []
+    
+    def compute():
+        products = fuzzy.fuzzy_filter(
+            filter_products(None, category_slug, min_price, max_price, sort_by), query
+        ).values_list('id', flat=True)
+        return products[:limit] if limit else products
+    
+    return search_cache.product_ids(
+        query,
+        {'category': category_slug, 'min_price': min_price, 'max_price': max_price, 'limit': limit},
+        sort_by,
+        compute,
+        scope='fuzzy',
+    )
+
+
+def page_from_ids(product_ids, page_number, per_page=12):
+    """Paginate an ordered list of product IDs and load only the current page"""
+    page_obj = Paginator(product_ids, per_page).get_page(page_number)
+    products = Product.objects.filter(is_active=True).cards().in_bulk(page_obj.object_list)
+    page_obj.object_list = [products[pk] for pk in page_obj.object_list if pk in products]
+    return page_obj
+
+
+def product_list(request):
+    """View for displaying all products with filtering and pagination"""
+    search_query = request.GET.get('search')
+    category_slug = request.GET.get('category')
+    min_price = request.GET.get('min_price')
+    max_price = request.GET.get('max_price')
+    sort_by = request.GET.get('sort', 'newest')
     page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    
+    did_you_mean = None
+    normalized_query = search_cache.normalize_query(search_query)
+    if normalized_query:
+        # Popular searches are served from the normalised result cache
+        product_ids = search_cache.product_ids(
+            normalized_query,
+            {'category': category_slug, 'min_price': min_price, 'max_price': max_price},
+            sort_by,
+            lambda: filter_products(
+                search_query.strip(), category_slug, min_price, max_price, sort_by
+            ).values_list('id', flat=True),
+        )
+        if not product_ids:
+            did_you_mean = fuzzy.suggest(search_query)
+            product_ids = fuzzy_product_ids(search_query, category_slug, min_price, max_price, sort_by)
+        page_obj = page_from_ids(product_ids, page_number)
+    else:
+        # Filter and sort against the shared catalog snapshot when it is fresh
+        catalog = get_snapshot()
+        product_ids = catalog.query(category_slug, min_price, max_price, sort_by) if catalog else None
+        if product_ids is not None:
+            page_obj = page_from_ids(product_ids, page_number)
+        else:
+            products = filter_products(None, category_slug, min_price, max_price, sort_by).cards()
+            
+            # Pagination
+            paginator = Paginator(products, 12)
+            page_obj = paginator.get_page(page_number)
     
     categories = Category.objects.all()
     
@@ -73,6 +143,7 @@ def product_list(request):
         'page_obj': page_obj,
         'categories': categories,
         'search_query': search_query,
+        'did_you_mean': did_you_mean,
         'selected_category': category_slug,
         'min_price': min_price,
         'max_price': max_price,
@@ -90,21 +161,24 @@ def product_detail(request, slug):
             is_active=True
         )
         .exclude(id=product.id)
-        .prefetch_related('images')
-        [:4]
+        .cards()
+        .cached()[:4]
     )
+    record_view(request, product.id)
+    popularity.record_view(product.id)
     
     context = {
         'product': product,
         'related_products': related_products,
+        'recently_viewed': recently_viewed_products(request, exclude=product.id, limit=8),
     }
     return render(request, 'store/product_detail.html', context)
 
 
 def category_detail(request, slug):
     """View for displaying products in a specific category"""
-    category = get_object_or_404(Category, slug=slug)
-    products = Product.objects.filter(category=category, is_active=True)
+    category = get_object_or_404(Category.objects.cached(), slug=slug)
+    products = Product.objects.filter(category=category, is_active=True).cards().cached()
     
     # Sorting
     sort_by = request.GET.get('sort', 'newest')
@@ -116,6 +190,8 @@ def category_detail(request, slug):
         products = products.order_by('name')
     elif sort_by == 'discount':
         products = products.order_by('-discount')
+    elif sort_by == 'popular':
+        products = products.order_by('-popularity')
     else:  # newest
         products = products.order_by('-created_at')
     
@@ -133,28 +209,114 @@ def category_detail(request, slug):
 
 
 @require_http_methods(["GET"])
+@throttle('search', rate='5/s', burst=20)
 def product_search_api(request):
     """API endpoint for product search suggestions"""
     query = request.GET.get('q', '')
     if len(query) < 2:
         return JsonResponse({'products': []})
     
-    products = Product.objects.filter(
-        Q(name__icontains=query) | 
-        Q(description__icontains=query),
-        is_active=True
-    )[:5]
-    
-    results = []
-    for product in products:
-        results.append({
-            'id': product.id,
-            'name': product.name,
-            'price': float(product.price),
-            'discounted_price': float(product.discounted_price),
-            'image': product.image.url if product.image else None,
-            'url': product.get_absolute_url(),
-        })
-    
-    return JsonResponse({'products': results})
+    normalized_query = search_cache.normalize_query(query)
+    product_ids = search_cache.product_ids(
+        normalized_query, {}, 'relevance',
+        lambda: Product.objects.filter(
+            Q(name__icontains=query.strip()) | 
+            Q(description__icontains=query.strip()),
+            is_active=True
+        ).values_list('id', flat=True)[:5],
+        scope='suggest',
+    )
+    did_you_mean = None
+    if not product_ids:
+        did_you_mean = fuzzy.suggest(query)
+        product_ids = fuzzy_product_ids(query, sort_by='relevance', limit=5)
+    results = serialize_product_ids(list(product_ids), ['id', 'name', 'price', 'discounted_price', 'image', 'url'])
+    
+    return json_response({'products': results, 'did_you_mean': did_you_mean})
+
+
+@require_http_methods(["GET"])
+@throttle('product_api', rate='5/s', burst=20)
+def product_list_api(request):
+    """JSON product listing with the same filters as product_list and sparse fields"""
+    try:
+        fields = parse_fields(request.GET.get('fields'))
+        per_page = min(max(int(request.GET.get('per_page', 24)), 1), 100)
+    except ValueError as e:
+        return json_response({'error': str(e)}, status=400)
+    
+    search_query = request.GET.get('search')
+    category_slug = request.GET.get('category')
+    min_price = request.GET.get('min_price')
+    max_price = request.GET.get('max_price')
+    sort_by = request.GET.get('sort', 'newest')
+    
+    normalized_query = search_cache.normalize_query(search_query)
+    if normalized_query:
+        product_ids = search_cache.product_ids(
+            normalized_query,
+            {'category': category_slug, 'min_price': min_price, 'max_price': max_price},
+            sort_by,
+            lambda: filter_products(
+                search_query.strip(), category_slug, min_price, max_price, sort_by
+            ).values_list('id', flat=True),
+        )
+        page_obj = Paginator(product_ids, per_page).get_page(request.GET.get('page'))
+        results = serialize_product_ids(list(page_obj.object_list), fields)
+    else:
+        products = filter_products(None, category_slug, min_price, max_price, sort_by)
+        page_obj = Paginator(products, per_page).get_page(request.GET.get('page'))
+        results = serialize_products(page_obj.object_list, fields)
+    
+    return json_response({
+        'count': page_obj.paginator.count,
+        'page': page_obj.number,
+        'num_pages': page_obj.paginator.num_pages,
+        'products': results,
+    })
+
+
+@require_http_methods(["GET"])
+@throttle('product_api', rate='5/s', burst=20)
+def product_batch_api(request):
+    """JSON products for a list of ``ids`` or ``slugs``, in the order requested"""
+    max_items = getattr(settings, 'PRODUCT_BATCH_MAX', 300)
+    try:
+        fields = parse_fields(request.GET.get('fields'))
+    except ValueError as e:
+        return json_response({'error': str(e)}, status=400)
+    try:
+        ids = [int(pk) for pk in request.GET.get('ids', '').split(',') if pk.strip()]
+    except ValueError:
+        return json_response({'error': 'ids must be integers.'}, status=400)
+    slugs = [slug.strip() for slug in request.GET.get('slugs', '').split(',') if slug.strip()]
+    if not ids and not slugs:
+        return json_response({'error': 'Pass ids or slugs.'}, status=400)
+    if len(ids) + len(slugs) > max_items:
+        return json_response({'error': f'At most {max_items} products per request.'}, status=400)
+
+    found = lookup_products(list(dict.fromkeys(ids)), list(dict.fromkeys(slugs)))
+    products, missing = [], []
+    for kind, keys in (('id', ids), ('slug', slugs)):
+        for key in keys:
+            entry = found[kind].get(key)
+            if entry is None:
+                missing.append(key)
+            else:
+                products.append({name: entry[name] for name in fields})
+    return json_response({'products': products, 'missing': missing})
+
 
+@require_http_methods(["GET", "HEAD"])
+def sitemap(request, name=None):
+    """Serve the sitemap index or one shard as written by build_sitemaps"""
+    path = sitemaps.file_path(name)
+    if path is None and name is None:
+        # First request on a fresh deployment: build everything once
+        sitemaps.build()
+        path = sitemaps.file_path()
+    if path is None:
+        raise Http404('Sitemap not found')
+    response = FileResponse(open(path, 'rb'), content_type='application/xml')
+    response['Cache-Control'] = 'public, max-age=3600'
+    return response
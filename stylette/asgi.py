@@ -3,6 +3,10 @@ ASGI config for stylette project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+The cart events stream (``/cart/events/``) needs an ASGI server, e.g.
+``uvicorn stylette.asgi:application``; under WSGI it answers 204 and
+clients fall back to polling ``/cart/count/``.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/4.2/howto/deployment/asgi/
 """
@@ -15,3 +19,7 @@ os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'stylette.settings')
 
 application = get_asgi_application()
 
+if os.getenv('STYLETTE_WARMUP'):
+    from stylette.warmup import warm_up
+    warm_up()
+
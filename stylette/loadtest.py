@@ -0,0 +1,279 @@
+"""Load testing by replaying traffic against a running server.
+
+Traffic comes either from an access log (combined log format or the
+``runserver`` log format; only the request line is used, and only GET and
+HEAD requests unless POSTs are asked for, since a log has no request
+bodies and replaying writes changes data on the target) or from a
+synthetic mix of search, listing, product detail and cart actions drawn
+from the catalog in the local database. The server must use the same
+database, since signed-in sessions are created directly in the session
+store for ``loadtest-<n>`` users. Every virtual user also gets a CSRF
+cookie and sends the matching ``X-CSRFToken`` header, so cart POSTs pass
+the CSRF check.
+
+Each virtual user sends its own ``X-Forwarded-For`` address; run the server
+with ``THROTTLE_IP_HEADER = 'X-Forwarded-For'`` (or ``THROTTLE_ENABLED =
+False``) so rate limits apply per user rather than to the whole run.
+
+Results are grouped by URL name (e.g. ``store:product_detail``) and
+reported as JSON, so runs against two versions can be diffed. Session
+writes per request are included when the server sends ``X-Session-Writes``
+(``SESSION_WRITES_HEADER``).
+"""
+import http.client
+import math
+import re
+import threading
+import time
+from importlib import import_module
+from urllib.parse import urlencode, urlsplit
+
+from django.conf import settings
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY, get_user_model
+from django.middleware.csrf import CSRF_ALLOWED_CHARS, CSRF_SECRET_LENGTH
+from django.urls import Resolver404, resolve, reverse
+from django.utils.crypto import get_random_string
+
+
+LOG_LINE_RE = re.compile(
+    r'^(?:(?P<host>\S+) \S+ \S+ )?\[[^\]]+\] '
+    r'"(?P<method>GET|HEAD|POST) (?P<path>\S+) HTTP/[\d.]+"'
+)
+STATIC_PREFIXES = ('/static/', '/media/', '/favicon.ico')
+DEFAULT_MIX = {'search': 20, 'list': 30, 'detail': 35, 'cart': 10, 'cart_view': 5}
+SORTS = ['newest', 'price_low', 'price_high', 'name', 'popular']
+
+
+class VirtualUser:
+    """Cookies and headers identifying one simulated visitor"""
+
+    def __init__(self, number, session_key=None):
+        self.csrf_token = get_random_string(CSRF_SECRET_LENGTH, allowed_chars=CSRF_ALLOWED_CHARS)
+        cookies = {settings.CSRF_COOKIE_NAME: self.csrf_token}
+        if session_key:
+            cookies[settings.SESSION_COOKIE_NAME] = session_key
+        self.headers = {
+            'Cookie': '; '.join(f'{name}={value}' for name, value in cookies.items()),
+            'X-Forwarded-For': f'10.{number >> 16 & 255}.{number >> 8 & 255}.{number & 255}',
+            'User-Agent': 'stylette-loadtest',
+        }
+
+
+def create_users(count, anonymous=False):
+    """``count`` virtual users, signed in through new sessions unless ``anonymous``"""
+    if anonymous:
+        return [VirtualUser(number) for number in range(count)]
+    User = get_user_model()
+    store = import_module(settings.SESSION_ENGINE).SessionStore
+    users = []
+    for number in range(count):
+        user, created = User.objects.get_or_create(
+            username=f'loadtest-{number}', defaults={'email': f'loadtest-{number}@example.com'},
+        )
+        if created:
+            user.set_unusable_password()
+            user.save(update_fields=['password'])
+        session = store()
+        session[SESSION_KEY] = user._meta.pk.value_to_string(user)
+        session[BACKEND_SESSION_KEY] = settings.AUTHENTICATION_BACKENDS[0]
+        session[HASH_SESSION_KEY] = user.get_session_auth_hash()
+        session.create()
+        users.append(VirtualUser(number, session.session_key))
+    return users
+
+
+def parse_log(lines, include_static=False, include_posts=False):
+    """Yield ``(method, path, data, client)`` for each GET/HEAD (and optionally POST) line in an access log"""
+    for line in lines:
+        match = LOG_LINE_RE.match(line)
+        if not match or (not include_static and match['path'].startswith(STATIC_PREFIXES)):
+            continue
+        if match['method'] == 'POST' and not include_posts:
+            continue
+        yield match['method'], match['path'], None, match['host']
+
+
+def parse_mix(value):
+    """Parse ``'search=20,list=30'`` into ``{action: weight}``"""
+    mix = {}
+    for part in value.split(','):
+        action, _, weight = part.partition('=')
+        action = action.strip()
+        if action not in DEFAULT_MIX:
+            raise ValueError(f'Unknown action {action!r}; choose from {", ".join(DEFAULT_MIX)}')
+        mix[action] = float(weight or 1)
+    return mix
+
+
+def synthetic(count, mix, rng):
+    """Yield ``count`` requests for a weighted ``mix`` of actions over the local catalog"""
+    from store.fuzzy import MIN_WORD_LENGTH, tokenize
+    from store.models import Category, Product
+
+    products = list(Product.objects.filter(is_active=True).values_list('id', 'slug', 'name'))
+    categories = list(Category.objects.values_list('slug', flat=True))
+    if not products:
+        raise ValueError('The catalog is empty; seed the database first (manage.py populate_data)')
+    words = sorted({word for *_, name in products for word in tokenize(name) if len(word) >= MIN_WORD_LENGTH})
+    actions, weights = zip(*mix.items())
+
+    for _ in range(count):
+        action = rng.choices(actions, weights)[0]
+        product_id, slug, _ = rng.choice(products)
+        if action == 'search':
+            query = {'search': rng.choice(words)}
+            yield 'GET', f"{reverse('store:product_list')}?{urlencode(query)}", None, None
+        elif action == 'list':
+            query = {'sort': rng.choice(SORTS), 'page': rng.randint(1, 3)}
+            if categories and rng.random() < 0.5:
+                path = reverse('store:category_detail', kwargs={'slug': rng.choice(categories)})
+            else:
+                path = reverse('store:product_list')
+            yield 'GET', f'{path}?{urlencode(query)}', None, None
+        elif action == 'detail':
+            yield 'GET', reverse('store:product_detail', kwargs={'slug': slug}), None, None
+        elif action == 'cart':
+            yield 'POST', reverse('cart:add_to_cart'), {'product_id': product_id, 'quantity': 1}, None
+        else:
+            yield 'GET', reverse('cart:cart_view'), None, None
+
+
+class Runner:
+    """Sends requests from a shared iterator on ``concurrency`` threads"""
+
+    def __init__(self, base_url, users, concurrency=10, timeout=30):
+        url = urlsplit(base_url)
+        connection_class = http.client.HTTPSConnection if url.scheme == 'https' else http.client.HTTPConnection
+        self.connect = lambda: connection_class(url.hostname, url.port, timeout=timeout)
+        self.prefix = url.path.rstrip('/')
+        self.users = users
+        self.concurrency = concurrency
+        self.records = []
+        self._lock = threading.Lock()
+        self._clients = {}
+
+    def _user(self, index, client):
+        if client is not None:
+            # Requests from the same logged client share a virtual user
+            index = self._clients.setdefault(client, len(self._clients))
+        return self.users[index % len(self.users)]
+
+    def _send(self, connection, method, path, body, headers):
+        connection.request(method, self.prefix + path, body=body, headers=headers)
+        response = connection.getresponse()
+        response.read()
+        writes = response.getheader('X-Session-Writes')
+        return response.status, int(writes) if writes is not None else None
+
+    def _worker(self, requests):
+        connection = None
+        while True:
+            with self._lock:
+                try:
+                    index, (method, path, data, client) = next(requests)
+                except StopIteration:
+                    break
+                user = self._user(index, client)
+            headers = dict(user.headers)
+            body = None
+            if method == 'POST':
+                body = urlencode(data or {})
+                headers.update({
+                    'Content-Type': 'application/x-www-form-urlencoded',
+                    'X-CSRFToken': user.csrf_token,
+                    'X-Requested-With': 'XMLHttpRequest',
+                })
+            started = time.perf_counter()
+            for attempt in range(2):
+                reused = connection is not None
+                if connection is None:
+                    connection = self.connect()
+                try:
+                    status, writes = self._send(connection, method, path, body, headers)
+                    break
+                except (OSError, http.client.HTTPException) as error:
+                    connection.close()
+                    connection = None
+                    status, writes = type(error).__name__, None
+                    if not reused:
+                        break
+                    # The server closed an idle keep-alive connection; retry once
+                    started = time.perf_counter()
+            self.records.append((path, status, (time.perf_counter() - started) * 1000, writes))
+        if connection is not None:
+            connection.close()
+
+    def run(self, requests):
+        """Send every request; return the wall-clock duration in seconds"""
+        requests = enumerate(requests)
+        threads = [
+            threading.Thread(target=self._worker, args=(requests,), name=f'loadtest-{n}', daemon=True)
+            for n in range(self.concurrency)
+        ]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return time.perf_counter() - started
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    return sorted_values[max(math.ceil(pct / 100 * len(sorted_values)) - 1, 0)]
+
+
+_url_names = {}
+
+
+def url_name(path):
+    """URL pattern name for a request path, e.g. ``store:product_detail``"""
+    path = urlsplit(path).path
+    if path not in _url_names:
+        try:
+            _url_names[path] = resolve(path).view_name
+        except Resolver404:
+            _url_names[path] = 'unresolved'
+    return _url_names[path]
+
+
+def _is_error(status):
+    return not isinstance(status, int) or status >= 400
+
+
+def _stats(records, duration):
+    timings = sorted(record[2] for record in records)
+    errors = sum(1 for record in records if _is_error(record[1]))
+    statuses = {}
+    for record in records:
+        statuses[str(record[1])] = statuses.get(str(record[1]), 0) + 1
+    # Reported by servers running with SESSION_WRITES_HEADER
+    writes = [record[3] for record in records if record[3] is not None]
+    return {
+        'requests': len(records),
+        'throughput_rps': round(len(records) / duration, 2) if duration else None,
+        'errors': errors,
+        'error_rate': round(errors / len(records), 4) if records else 0.0,
+        'p50_ms': round(percentile(timings, 50), 2) if timings else None,
+        'p95_ms': round(percentile(timings, 95), 2) if timings else None,
+        'p99_ms': round(percentile(timings, 99), 2) if timings else None,
+        'mean_ms': round(sum(timings) / len(timings), 2) if timings else None,
+        'max_ms': round(timings[-1], 2) if timings else None,
+        'status': dict(sorted(statuses.items())),
+        'session_writes_per_request': round(sum(writes) / len(writes), 3) if writes else None,
+    }
+
+
+def report(records, duration, **meta):
+    """JSON-ready summary of a run, overall and per URL name"""
+    groups = {}
+    for record in records:
+        groups.setdefault(url_name(record[0]), []).append(record)
+    return {
+        **meta,
+        'duration_s': round(duration, 3),
+        'total': _stats(records, duration),
+        'patterns': {name: _stats(group, duration) for name, group in sorted(groups.items())},
+    }
@@ -0,0 +1,228 @@
+"""On-demand request profiling.
+
+``ProfilingMiddleware`` profiles a request when:
+
+* a staff user adds ``?_profile=1`` (or ``?_profile=pstats``) to a URL,
+* the request carries an ``X-Profile`` header signed with ``make_token``
+  (see the ``profile_token`` command), or
+* it is picked by random sampling, one in ``PROFILING_SAMPLE_RATE`` requests.
+
+The default mode is a stack-sampling profiler: a helper thread records the
+request thread's stack every ``PROFILING_INTERVAL`` seconds, which costs
+the request almost nothing and covers the view, ORM, template rendering and
+context processors alike. The result is written as a speedscope file
+(https://www.speedscope.app). ``pstats`` mode runs ``cProfile`` instead,
+which is exact but slower. Files are written to ``PROFILING_DIR`` and
+listed at ``/admin/profiles/``.
+"""
+import cProfile
+import json
+import logging
+import os
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.contrib import admin
+from django.contrib.admin.views.decorators import staff_member_required
+from django.core import signing
+from django.http import FileResponse, Http404
+from django.shortcuts import render
+
+
+logger = logging.getLogger(__name__)
+
+TOKEN_SALT = 'stylette.profiling'
+MODES = {'speedscope': '.speedscope.json', 'pstats': '.prof'}
+SAFE_NAME_RE = re.compile(r'^[\w.-]+$')
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def profiling_dir():
+    return str(_setting('PROFILING_DIR', settings.BASE_DIR / 'profiles'))
+
+
+def make_token(mode='speedscope'):
+    """Signed value for the ``X-Profile`` header"""
+    return signing.dumps({'mode': mode}, salt=TOKEN_SALT)
+
+
+class StackSampler:
+    """Samples one thread's Python stack from a background thread"""
+
+    def __init__(self, thread_id, interval):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='stack-sampler', daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append((code.co_name, code.co_filename, code.co_firstlineno))
+                frame = frame.f_back
+            if stack:
+                self.stacks[tuple(reversed(stack))] += 1
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def speedscope(self, name, duration_ms):
+        """Return the samples as a speedscope "sampled" profile"""
+        frames, index = [], {}
+        samples, weights = [], []
+        for stack, count in self.stacks.items():
+            sample = []
+            for frame in stack:
+                if frame not in index:
+                    index[frame] = len(frames)
+                    frames.append({'name': frame[0], 'file': frame[1], 'line': frame[2]})
+                sample.append(index[frame])
+            samples.append(sample)
+            weights.append(count * self.interval * 1000)
+        return {
+            '$schema': 'https://www.speedscope.app/file-format-schema.json',
+            'exporter': 'stylette.profiling',
+            'name': name,
+            'shared': {'frames': frames},
+            'profiles': [{
+                'type': 'sampled',
+                'name': name,
+                'unit': 'milliseconds',
+                'startValue': 0,
+                'endValue': duration_ms,
+                'samples': samples,
+                'weights': weights,
+            }],
+        }
+
+
+class ProfilingMiddleware:
+    """Profile requests chosen by staff flag, signed header or sampling"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def requested_mode(self, request):
+        token = request.headers.get('X-Profile')
+        if token:
+            try:
+                mode = signing.loads(token, salt=TOKEN_SALT, max_age=_setting('PROFILING_TOKEN_MAX_AGE', 3600))['mode']
+            except (signing.BadSignature, KeyError, TypeError):
+                mode = None
+            if mode in MODES:
+                return mode
+        flag = request.GET.get('_profile')
+        if flag and request.user.is_staff:
+            return flag if flag in MODES else 'speedscope'
+        rate = _setting('PROFILING_SAMPLE_RATE', 0)
+        if rate and random.randrange(rate) == 0:
+            return 'speedscope'
+        return None
+
+    def __call__(self, request):
+        mode = self.requested_mode(request) if _setting('PROFILING_ENABLED', True) else None
+        if mode is None:
+            return self.get_response(request)
+
+        started = time.perf_counter()
+        if mode == 'pstats':
+            profiler = cProfile.Profile()
+            response = profiler.runcall(self.get_response, request)
+        else:
+            profiler = StackSampler(threading.get_ident(), _setting('PROFILING_INTERVAL', 0.005))
+            profiler.start()
+            try:
+                response = self.get_response(request)
+            finally:
+                profiler.stop()
+        duration_ms = (time.perf_counter() - started) * 1000
+
+        try:
+            filename = write_profile(request, mode, profiler, duration_ms)
+        except OSError:
+            logger.exception('Could not write profile for %s', request.path)
+        else:
+            if request.user.is_staff:
+                response['X-Profile-File'] = filename
+        return response
+
+
+def write_profile(request, mode, profiler, duration_ms):
+    """Write a profile to ``PROFILING_DIR`` and prune old files"""
+    directory = profiling_dir()
+    os.makedirs(directory, exist_ok=True)
+    slug = re.sub(r'[^\w-]+', '-', request.path).strip('-')[:60] or 'root'
+    now = time.time()
+    stamp = f"{time.strftime('%Y%m%d-%H%M%S', time.localtime(now))}.{int(now * 1000) % 1000:03d}"
+    filename = f'{stamp}-{request.method}-{slug}-{duration_ms:.0f}ms{MODES[mode]}'
+    path = os.path.join(directory, filename)
+    if mode == 'pstats':
+        profiler.dump_stats(path)
+    else:
+        with open(path, 'w') as f:
+            json.dump(profiler.speedscope(f'{request.method} {request.get_full_path()}', duration_ms), f)
+    _prune(directory, _setting('PROFILING_MAX_FILES', 200))
+    return filename
+
+
+def _prune(directory, keep):
+    entries = sorted(os.scandir(directory), key=lambda entry: entry.stat().st_mtime, reverse=True)
+    for entry in entries[keep:]:
+        try:
+            os.remove(entry.path)
+        except OSError:
+            pass
+
+
+def list_profiles():
+    directory = profiling_dir()
+    if not os.path.isdir(directory):
+        return []
+    profiles = [
+        {
+            'name': entry.name,
+            'size': entry.stat().st_size,
+            'modified_at': datetime.fromtimestamp(entry.stat().st_mtime, tz=dt_timezone.utc),
+        }
+        for entry in os.scandir(directory)
+        if entry.is_file() and entry.name.endswith(tuple(MODES.values()))
+    ]
+    return sorted(profiles, key=lambda profile: profile['modified_at'], reverse=True)
+
+
+@staff_member_required
+def profile_index(request):
+    """Admin page listing the captured profiles"""
+    context = {
+        **admin.site.each_context(request),
+        'title': 'Request profiles',
+        'profiles': list_profiles(),
+        'profiling_dir': profiling_dir(),
+    }
+    return render(request, 'admin/profiles.html', context)
+
+
+@staff_member_required
+def profile_download(request, name):
+    """Download one profile file"""
+    path = os.path.join(profiling_dir(), name)
+    if not SAFE_NAME_RE.match(name) or not os.path.isfile(path):
+        raise Http404('Profile not found')
+    return FileResponse(open(path, 'rb'), as_attachment=True, filename=name)
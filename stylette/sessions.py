@@ -0,0 +1,104 @@
+"""Session and message storage that avoid needless session writes.
+
+``SESSION_ENGINE = 'stylette.sessions'`` selects a cached-database store
+(reads come from the cache, the database is the durable copy) that skips
+the write when a modified session still holds the data it was loaded
+with. Code often reassigns unchanged values, for example message storage
+re-saving the same list, and each of those used to cost a row UPDATE plus
+a cache set.
+
+``AjaxMessageStorage`` drops messages added while handling an AJAX request
+(``X-Requested-With: XMLHttpRequest``) that is answered with JSON. Those
+responses carry their message in the body, so storing it would only show
+it again on the next full page load. AJAX requests answered with a
+redirect or a page keep their messages.
+
+``SessionWritesMiddleware`` counts the writes each request caused and, if
+``SESSION_WRITES_HEADER`` is set, reports them in an ``X-Session-Writes``
+response header (which ``manage.py loadtest`` aggregates per URL). Totals
+across processes are kept in the cache; see ``manage.py session_stats``.
+"""
+import hashlib
+
+from django.conf import settings
+from django.contrib.messages.storage.fallback import FallbackStorage
+from django.contrib.sessions.backends.cached_db import SessionStore as CachedDBStore
+from django.core.cache import cache
+
+
+STATS_KEYS = ['write', 'skip']
+
+
+def is_ajax(request):
+    return request.headers.get('x-requested-with') == 'XMLHttpRequest'
+
+
+def _record(stat):
+    key = f'session:stats:{stat}'
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, 1, timeout=None)
+
+
+def stats():
+    """Return the write/skip counters and the share of saves skipped"""
+    values = cache.get_many([f'session:stats:{stat}' for stat in STATS_KEYS])
+    result = {stat: values.get(f'session:stats:{stat}', 0) for stat in STATS_KEYS}
+    saves = result['write'] + result['skip']
+    result['skip_rate'] = result['skip'] / saves if saves else 0.0
+    return result
+
+
+def reset_stats():
+    cache.delete_many([f'session:stats:{stat}' for stat in STATS_KEYS])
+
+
+class SessionStore(CachedDBStore):
+    """Cached database sessions that are only written when their data changed"""
+
+    def __init__(self, session_key=None):
+        super().__init__(session_key)
+        self._loaded_digest = None
+        self.writes = 0
+
+    def _digest(self, data):
+        return hashlib.sha1(self.serializer().dumps(data)).hexdigest()
+
+    def load(self):
+        data = super().load()
+        self._loaded_digest = self._digest(data) if data else None
+        return data
+
+    def save(self, must_create=False):
+        if not must_create and self._loaded_digest is not None and \
+                self._digest(self._get_session()) == self._loaded_digest:
+            _record('skip')
+            return
+        super().save(must_create)
+        self._loaded_digest = self._digest(self._session)
+        self.writes += 1
+        _record('write')
+
+
+class AjaxMessageStorage(FallbackStorage):
+    """Cookie/session message storage that ignores messages of AJAX requests answered with JSON"""
+
+    def update(self, response):
+        if is_ajax(self.request) and response.get('Content-Type', '').startswith('application/json'):
+            self._queued_messages = []
+        return super().update(response)
+
+
+class SessionWritesMiddleware:
+    """Report the session writes a request caused; place before SessionMiddleware"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        writes = getattr(getattr(request, 'session', None), 'writes', None)
+        if writes is not None and getattr(settings, 'SESSION_WRITES_HEADER', False):
+            response['X-Session-Writes'] = str(writes)
+        return response
@@ -55,15 +55,19 @@ INSTALLED_APPS = [
     # Local apps
     'store',
     'cart',
+    'orders',
+    'jobs',
     'wishlist',
 ]
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'stylette.sessions.SessionWritesMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'stylette.profiling.ProfilingMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'allauth.account.middleware.AccountMiddleware',
@@ -83,6 +87,7 @@ TEMPLATES = [
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
                 'cart.context_processors.cart',
+                'wishlist.context_processors.wishlist',
                 'store.context_processors.categories',
             ],
         },
@@ -116,6 +121,136 @@ if os.getenv('DATABASE_URL'):
     DATABASES['default'] = dj_database_url.parse(os.getenv('DATABASE_URL'))
 
 
+# Cache
+# Shared Redis cache when REDIS_URL is set, otherwise a per-process in-memory cache
+
+if os.getenv('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.getenv('REDIS_URL'),
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'stylette',
+        }
+    }
+
+
+# Per-product cache entries behind the batch lookup API (store.api), and the
+# most IDs/slugs one request may ask for
+
+PRODUCT_CACHE_TTL = 3600
+PRODUCT_BATCH_MAX = 300
+
+
+# Fuzzy search fallback (store.fuzzy): trigram similarity threshold, cap on
+# in-process matches, and minimum seconds between word index rebuilds
+
+FUZZY_SEARCH_THRESHOLD = 0.3
+FUZZY_SEARCH_MAX_RESULTS = 500
+FUZZY_INDEX_MIN_AGE = 60
+
+
+# Default lifetime of querysets cached with .cached() (store.querycache)
+
+QUERY_CACHE_TTL = 300
+
+
+# Search result cache (seconds fresh, then seconds served stale while refreshing)
+
+SEARCH_CACHE_TTL = 300
+SEARCH_CACHE_STALE_TTL = 3600
+SEARCH_CACHE_MAX_IDS = 5000
+
+
+# Recently viewed products (list length, cache lifetime, per-worker flush interval)
+
+RECENTLY_VIEWED_LIMIT = 12
+RECENTLY_VIEWED_TTL = 30 * 86400
+RECENTLY_VIEWED_FLUSH_INTERVAL = 30
+
+
+# XML sitemaps written by build_sitemaps and served from disk
+
+SITEMAP_ROOT = BASE_DIR / 'sitemaps'
+SITEMAP_SHARD_SIZE = 50000
+SITEMAP_PROTOCOL = 'https'
+
+
+# Background jobs (jobs app, run by `manage.py run_jobs`): seconds before a
+# crashed worker's jobs are retried, how long finished jobs are kept, and
+# how long catalog edits are coalesced before sitemaps/snapshot are rebuilt
+
+JOBS_LOCK_TIMEOUT = 600
+JOBS_RETENTION = 86400
+CATALOG_REFRESH_DELAY = 30
+PRODUCT_IMAGE_MAX_SIZE = 1600
+
+
+# Memory-mapped catalog snapshot (store.snapshot) built by build_catalog_snapshot;
+# listings ignore it once it is older than CATALOG_SNAPSHOT_MAX_AGE seconds.
+# Set CATALOG_SNAPSHOT_REFRESH_INTERVAL to rebuild it from the web workers instead
+
+CATALOG_SNAPSHOT_PATH = BASE_DIR / 'snapshots' / 'catalog.bin'
+CATALOG_SNAPSHOT_MAX_AGE = 900
+CATALOG_SNAPSHOT_REFRESH_INTERVAL = 0
+CATALOG_SNAPSHOT_FULL_REBUILD_INTERVAL = 3600
+# Incremental builds re-check products updated this many seconds before the
+# newest change they saw, to catch transactions that committed late
+CATALOG_SNAPSHOT_OVERLAP = 300
+
+
+# Request profiling (stylette.profiling): staff ?_profile=1, signed X-Profile
+# header, or one in PROFILING_SAMPLE_RATE requests (0 disables sampling)
+
+PROFILING_ENABLED = True
+PROFILING_DIR = BASE_DIR / 'profiles'
+PROFILING_SAMPLE_RATE = 0
+PROFILING_INTERVAL = 0.005
+PROFILING_MAX_FILES = 200
+
+
+# Rate limiting (store.throttling); override per scope as {scope: (rate, burst)}
+# and set THROTTLE_IP_HEADER (e.g. 'X-Forwarded-For') behind a trusted proxy
+
+THROTTLE_ENABLED = True
+THROTTLE_RATES = {}
+
+
+# Lifetime of each user's cached set of wishlisted product IDs
+
+WISHLIST_CACHE_TTL = 86400
+
+
+# Seconds between per-worker flushes of product view/add-to-cart counters
+
+POPULARITY_FLUSH_INTERVAL = 15
+
+
+# Warm-up
+# Callables run by stylette.warmup to prime caches when a worker boots
+
+WARMUP_CACHE_PRIMERS = [
+    'store.caching.prime_catalog_caches',
+]
+
+
+# Carts idle (no cart, item or sign-in activity) for this many days are
+# deleted by `manage.py purge_carts`
+
+CART_RETENTION_DAYS = 90
+
+
+# Cart events broker
+# In-process pub/sub; swap for a shared broker when running several ASGI processes
+
+CART_EVENTS_BROKER = 'cart.events.LocalBroker'
+
+
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
 
@@ -156,6 +291,17 @@ STATICFILES_DIRS = [
     BASE_DIR / 'static',
 ]
 
+# Hash file names and write gzip/brotli variants during collectstatic;
+# stylette.staticfiles.serve serves them with immutable caching
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'stylette.staticfiles.CompressedManifestStaticFilesStorage',
+    },
+}
+
 # Media files
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
@@ -210,6 +356,11 @@ SECURE_CONTENT_TYPE_NOSNIFF = True
 X_FRAME_OPTIONS = 'DENY'
 
 # Session Configuration
+# Cached-database sessions that skip writes when the data did not change,
+# and messages that are not stored for AJAX requests (stylette.sessions)
+SESSION_ENGINE = 'stylette.sessions'
+MESSAGE_STORAGE = 'stylette.sessions.AjaxMessageStorage'
+SESSION_WRITES_HEADER = DEBUG
 SESSION_COOKIE_AGE = 86400  # 24 hours
 SESSION_COOKIE_SECURE = False  # Set to True in production with HTTPS
 SESSION_COOKIE_HTTPONLY = True
@@ -0,0 +1,224 @@
+"""Content-hashed, precompressed static files served by the app itself.
+
+``CompressedManifestStaticFilesStorage`` extends Django's manifest storage:
+after ``collectstatic`` hashes the files it writes ``.gz`` (and ``.br`` when
+the optional ``brotli`` package is installed) next to every compressible
+hashed file, and records the sizes in ``compressed.json``.
+
+``serve`` answers ``STATIC_URL`` requests from ``STATIC_ROOT`` with the
+best precompressed variant the client accepts, far-future immutable caching
+for hashed names, conditional requests and single byte ranges.
+"""
+import gzip
+import json
+import mimetypes
+import os
+import posixpath
+import re
+from functools import lru_cache
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files.base import ContentFile
+from django.http import (
+    FileResponse, Http404, HttpResponse, HttpResponseNotModified, StreamingHttpResponse,
+)
+from django.utils._os import safe_join
+from django.utils.http import http_date, parse_etags
+from django.views.decorators.http import require_http_methods
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+COMPRESSED_MANIFEST_NAME = 'compressed.json'
+COMPRESSIBLE_EXTENSIONS = {
+    '.css', '.js', '.mjs', '.map', '.json', '.svg', '.txt', '.html', '.xml', '.ico', '.ttf', '.eot',
+}
+ENCODINGS = [('br', '.br'), ('gzip', '.gz')]
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+DEFAULT_CACHE_CONTROL = 'public, max-age=3600'
+HASHED_NAME_RE = re.compile(r'\.[0-9a-f]{12}\.[^./]+$')
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """Manifest storage that also writes gzip and brotli variants"""
+    min_compress_size = 256
+    # Only keep a variant if it saves at least this fraction of the size
+    min_saving = 0.05
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run, **options)
+        if dry_run:
+            return
+        files = {}
+        for hashed_name in set(self.hashed_files.values()):
+            entry = self.compress(hashed_name)
+            if entry:
+                files[hashed_name] = entry
+        self.save_compressed_manifest(files)
+
+    def save_compressed_manifest(self, files):
+        if self.exists(COMPRESSED_MANIFEST_NAME):
+            self.delete(COMPRESSED_MANIFEST_NAME)
+        self._save(
+            COMPRESSED_MANIFEST_NAME,
+            ContentFile(json.dumps({'version': 1, 'files': files}, indent=1, sort_keys=True).encode()),
+        )
+
+    def compress(self, name):
+        """Write compressed variants of ``name`` and return their sizes"""
+        if os.path.splitext(name)[1].lower() not in COMPRESSIBLE_EXTENSIONS or not self.exists(name):
+            return None
+        with self.open(name) as f:
+            content = f.read()
+        if len(content) < self.min_compress_size:
+            return None
+
+        entry = {'size': len(content)}
+        variants = {'gzip': gzip.compress(content, compresslevel=9, mtime=0)}
+        if brotli is not None:
+            variants['br'] = brotli.compress(content, quality=11)
+        for encoding, suffix in ENCODINGS:
+            data = variants.get(encoding)
+            compressed_name = name + suffix
+            if self.exists(compressed_name):
+                self.delete(compressed_name)
+            if data is not None and len(data) <= len(content) * (1 - self.min_saving):
+                self._save(compressed_name, ContentFile(data))
+                entry[encoding] = len(data)
+        return entry if len(entry) > 1 else None
+
+
+@lru_cache(maxsize=4)
+def _load_compressed_manifest(path, mtime):
+    try:
+        with open(path) as f:
+            return json.load(f).get('files', {})
+    except (OSError, ValueError):
+        return {}
+
+
+def compressed_manifest():
+    """Return the compressed-variant manifest, reloading it when it changes"""
+    path = os.path.join(settings.STATIC_ROOT, COMPRESSED_MANIFEST_NAME)
+    try:
+        mtime = os.stat(path).st_mtime
+    except OSError:
+        return {}
+    return _load_compressed_manifest(path, mtime)
+
+
+def _accepted_encodings(request):
+    """Content codings the client accepts, ignoring those with ``q=0``"""
+    accepted = set()
+    for part in request.headers.get('Accept-Encoding', '').split(','):
+        coding, *params = [p.strip() for p in part.split(';')]
+        quality = 1.0
+        for param in params:
+            key, _, value = param.partition('=')
+            if key.strip().lower() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if coding and quality > 0:
+            accepted.add(coding.lower())
+    return accepted
+
+
+def _parse_range(header, size):
+    """Return ``(start, end)`` for a single satisfiable byte range.
+
+    Returns None when there is no usable Range header (multi-range
+    requests are served in full) and raises ValueError if the range
+    cannot be satisfied.
+    """
+    match = RANGE_RE.match(header.strip()) if header else None
+    if not match or match.group(1) == match.group(2) == '':
+        return None
+    start, end = match.groups()
+    if start == '':
+        length = int(end)
+        if length == 0:
+            raise ValueError('Unsatisfiable range')
+        start, end = max(size - length, 0), size - 1
+    else:
+        start = int(start)
+        end = min(int(end), size - 1) if end else size - 1
+    if start >= size or start > end:
+        raise ValueError('Unsatisfiable range')
+    return start, end
+
+
+def _file_range(path, start, length, chunk_size=64 * 1024):
+    """Yield ``length`` bytes of ``path`` starting at ``start``"""
+    with open(path, 'rb') as f:
+        f.seek(start)
+        while length > 0:
+            chunk = f.read(min(chunk_size, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+
+
+@require_http_methods(["GET", "HEAD"])
+def serve(request, path):
+    """Serve a collected static file with precompression and caching headers"""
+    path = posixpath.normpath(path).lstrip('/')
+    fullpath = safe_join(settings.STATIC_ROOT, path)
+    if not os.path.isfile(fullpath):
+        raise Http404(f'"{path}" does not exist')
+
+    encoding = None
+    variants = compressed_manifest().get(path, {})
+    accepted = _accepted_encodings(request)
+    for candidate, suffix in ENCODINGS:
+        if candidate in variants and candidate in accepted and os.path.isfile(fullpath + suffix):
+            encoding, fullpath = candidate, fullpath + suffix
+            break
+
+    stat = os.stat(fullpath)
+    etag = f'"{int(stat.st_mtime):x}-{stat.st_size:x}{"-" + encoding if encoding else ""}"'
+    cache_control = IMMUTABLE_CACHE_CONTROL if HASHED_NAME_RE.search(path) else DEFAULT_CACHE_CONTROL
+
+    if etag in parse_etags(request.headers.get('If-None-Match', '')):
+        response = HttpResponseNotModified()
+        response['ETag'] = etag
+        response['Cache-Control'] = cache_control
+        response['Vary'] = 'Accept-Encoding'
+        return response
+
+    size = stat.st_size
+    try:
+        byte_range = _parse_range(request.headers.get('Range'), size)
+    except ValueError:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{size}'
+        return response
+    if byte_range and request.headers.get('If-Range') not in (None, etag):
+        byte_range = None
+
+    if byte_range:
+        start, end = byte_range
+        response = StreamingHttpResponse(_file_range(fullpath, start, end - start + 1), status=206)
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+        response['Content-Length'] = str(end - start + 1)
+    else:
+        response = FileResponse(open(fullpath, 'rb'))
+        response['Content-Length'] = str(size)
+
+    content_type, _ = mimetypes.guess_type(path)
+    response['Content-Type'] = content_type or 'application/octet-stream'
+    if encoding:
+        response['Content-Encoding'] = encoding
+    response['Vary'] = 'Accept-Encoding'
+    response['Accept-Ranges'] = 'bytes'
+    response['Cache-Control'] = cache_control
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(stat.st_mtime)
+    return response
@@ -15,20 +15,26 @@ Including another URLconf
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, re_path, include
 from django.conf import settings
 from django.conf.urls.static import static
+from stylette.profiling import profile_download, profile_index
+from stylette.staticfiles import serve as serve_static
 
 urlpatterns = [
+    path('admin/profiles/', profile_index, name='profile_index'),
+    path('admin/profiles/<str:name>', profile_download, name='profile_download'),
     path('admin/', admin.site.urls),
     path('accounts/', include('allauth.urls')),
     path('', include('store.urls')),
     path('cart/', include('cart.urls')),
+    path('orders/', include('orders.urls')),
     path('wishlist/', include('wishlist.urls')),
+    # Collected static files, precompressed and cached (see stylette.staticfiles)
+    re_path(r'^%s(?P<path>.*)$' % settings.STATIC_URL.lstrip('/'), serve_static),
 ]
 
 # Serve media files during development
 if settings.DEBUG:
     urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
-    urlpatterns += static(settings.STATIC_URL, document_root=settings.STATIC_ROOT)
 
@@ -0,0 +1,108 @@
+"""Boot-time warm-up for web workers.
+
+Pays the first-request costs up front: opening the database connection,
+compiling every template into the cached loader, importing every view by
+walking the URL resolver, and priming the catalog caches. Enabled in
+``wsgi.py``/``asgi.py`` by setting ``STYLETTE_WARMUP=1``, or run by hand
+with ``manage.py warmup``.
+"""
+import logging
+import os
+import time
+
+from django.conf import settings
+from django.db import connections
+from django.template import engines
+from django.template.backends.django import DjangoTemplates
+from django.urls import URLResolver, get_resolver
+from django.utils.module_loading import import_string
+
+
+logger = logging.getLogger(__name__)
+
+TEMPLATE_EXTENSIONS = ('.html', '.txt', '.xml')
+
+
+def warm_database():
+    """Open the default database connection (TLS handshake included)"""
+    connections['default'].ensure_connection()
+    return 1
+
+
+def _template_names(directory):
+    for root, _, files in os.walk(directory):
+        for filename in files:
+            if filename.endswith(TEMPLATE_EXTENSIONS):
+                yield os.path.relpath(os.path.join(root, filename), directory).replace(os.sep, '/')
+
+
+def warm_templates():
+    """Compile every template so the cached loader holds it"""
+    compiled = 0
+    for engine in engines.all():
+        if not isinstance(engine, DjangoTemplates):
+            continue
+        seen = set()
+        for directory in engine.template_dirs:
+            for name in _template_names(directory):
+                if name in seen:
+                    continue
+                seen.add(name)
+                try:
+                    engine.get_template(name)
+                    compiled += 1
+                except Exception as e:
+                    # Typically third-party templates for features that are not enabled
+                    logger.debug('Could not compile template %s: %s', name, e)
+    return compiled
+
+
+def _walk(resolver):
+    count = 0
+    resolver.reverse_dict  # noqa: B018 - populates the reverse lookup tables
+    for pattern in resolver.url_patterns:
+        if isinstance(pattern, URLResolver):
+            count += _walk(pattern)
+        else:
+            pattern.callback  # noqa: B018 - imports the view
+            count += 1
+    return count
+
+
+def warm_urls():
+    """Import every URLconf and view and build the reverse lookup tables"""
+    return _walk(get_resolver())
+
+
+def warm_caches():
+    """Run the cache primers listed in WARMUP_CACHE_PRIMERS"""
+    primers = getattr(settings, 'WARMUP_CACHE_PRIMERS', [])
+    for path in primers:
+        import_string(path)()
+    return len(primers)
+
+
+STEPS = [
+    ('database', warm_database),
+    ('templates', warm_templates),
+    ('urls', warm_urls),
+    ('caches', warm_caches),
+]
+
+
+def warm_up():
+    """Run every warm-up step and return ``[(step, count, seconds)]``.
+
+    A failing step is logged and skipped so warm-up never stops a worker
+    from booting.
+    """
+    results = []
+    for name, step in STEPS:
+        started = time.perf_counter()
+        try:
+            count = step()
+        except Exception:
+            logger.exception('Warm-up step %s failed', name)
+            count = None
+        results.append((name, count, time.perf_counter() - started))
+    return results
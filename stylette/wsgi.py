@@ -15,3 +15,7 @@ os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'stylette.settings')
 
 application = get_wsgi_application()
 
+if os.getenv('STYLETTE_WARMUP'):
+    from stylette.warmup import warm_up
+    warm_up()
+
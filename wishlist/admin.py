@@ -0,0 +1,11 @@
+from django.contrib import admin
+from .models import WishlistItem
+
+
+@admin.register(WishlistItem)
+class WishlistItemAdmin(admin.ModelAdmin):
+    """Admin configuration for WishlistItem model"""
+    list_display = ['user', 'product', 'added_at']
+    list_select_related = ['user', 'product']
+    search_fields = ['user__email', 'user__username', 'product__name']
+    raw_id_fields = ['user', 'product']
@@ -0,0 +1,10 @@
+from .membership import request_product_ids
+
+
+def wishlist(request):
+    """Context processor for wishlist hearts on product cards and the header badge"""
+    ids = request_product_ids(request)
+    return {
+        'wishlist_product_ids': ids,
+        'wishlist_count': len(ids),
+    }
@@ -0,0 +1,69 @@
+"""Wishlist membership for whole product grids.
+
+Each user's wishlisted product IDs are cached as one set, so a page of
+product cards is resolved with a single cache read (or one query on a
+miss) instead of one lookup per card. Within a request the set is served
+from the request memo shared with the cart badge.
+
+Deactivated products stay on the wishlist (and can still be removed) but
+are left out of the visitor's set, and so of the header count. They are
+subtracted using one set of inactive product IDs shared by every user and
+keyed by the catalog version, which every product change bumps, bulk
+admin actions included.
+"""
+from django.conf import settings
+from django.core.cache import cache
+
+from store.caching import get_catalog_version
+from store.memo import forget, memoize
+from store.models import Product
+
+from .models import WishlistItem
+
+
+MEMO_KEY = 'wishlist_ids'
+
+
+def _cache_key(user_id):
+    return f'wishlist:ids:{user_id}'
+
+
+def product_ids(user_id):
+    """Return the set of product IDs on a user's wishlist"""
+    key = _cache_key(user_id)
+    ids = cache.get(key)
+    if ids is None:
+        ids = frozenset(WishlistItem.objects.filter(user_id=user_id).values_list('product_id', flat=True))
+        cache.set(key, ids, timeout=getattr(settings, 'WISHLIST_CACHE_TTL', 86400))
+    return ids
+
+
+def invalidate(user_id):
+    cache.delete(_cache_key(user_id))
+
+
+def inactive_product_ids():
+    """Return the set of inactive product IDs for the current catalog version"""
+    key = f'wishlist:inactive:{get_catalog_version()}'
+    ids = cache.get(key)
+    if ids is None:
+        ids = frozenset(Product.objects.filter(is_active=False).values_list('id', flat=True))
+        cache.set(key, ids, timeout=getattr(settings, 'WISHLIST_CACHE_TTL', 86400))
+    return ids
+
+
+def active_product_ids(user_id):
+    """Return the set of active product IDs on a user's wishlist"""
+    ids = product_ids(user_id)
+    return ids - inactive_product_ids() if ids else ids
+
+
+def request_product_ids(request):
+    """Active wishlisted product IDs for the current visitor, memoised per request"""
+    if not request.user.is_authenticated:
+        return frozenset()
+    return memoize(request, MEMO_KEY, lambda: active_product_ids(request.user.id))
+
+
+def forget_request(request):
+    forget(request, MEMO_KEY)
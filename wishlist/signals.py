@@ -0,0 +1,12 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .membership import invalidate
+from .models import WishlistItem
+
+
+@receiver(post_save, sender=WishlistItem)
+@receiver(post_delete, sender=WishlistItem)
+def wishlist_changed(sender, instance, **kwargs):
+    """Drop the cached membership set of the affected user"""
+    invalidate(instance.user_id)
@@ -0,0 +1,12 @@
+from django.urls import path
+from . import views
+
+app_name = 'wishlist'
+
+urlpatterns = [
+    path('', views.wishlist_view, name='wishlist_view'),
+    path('add/', views.add_to_wishlist, name='add_to_wishlist'),
+    path('remove/', views.remove_from_wishlist, name='remove_from_wishlist'),
+    path('toggle/', views.toggle_wishlist, name='toggle_wishlist'),
+    path('count/', views.wishlist_count, name='wishlist_count'),
+]
@@ -0,0 +1,94 @@
+from django.shortcuts import render, get_object_or_404, redirect
+from django.contrib.auth.decorators import login_required
+from django.http import JsonResponse
+from django.views.decorators.http import require_http_methods
+from django.contrib import messages
+from django.utils.http import url_has_allowed_host_and_scheme
+from store.models import Product
+from .membership import forget_request, request_product_ids
+from .models import WishlistItem
+
+
+def _is_ajax(request):
+    return request.headers.get('x-requested-with') == 'XMLHttpRequest'
+
+
+def _redirect_back(request):
+    """Return to the page the heart was clicked on, if it is safe"""
+    next_url = request.POST.get('next')
+    if next_url and url_has_allowed_host_and_scheme(next_url, {request.get_host()}, request.is_secure()):
+        return redirect(next_url)
+    return redirect('wishlist:wishlist_view')
+
+
+def _respond(request, product, in_wishlist, message):
+    forget_request(request)
+    messages.success(request, message)
+    if _is_ajax(request):
+        return JsonResponse({
+            'success': True,
+            'message': message,
+            'product_id': product.id,
+            'in_wishlist': in_wishlist,
+            'wishlist_count': len(request_product_ids(request)),
+        })
+    return _redirect_back(request)
+
+
+def _get_product(request, active_only=True):
+    try:
+        product_id = int(request.POST.get('product_id', ''))
+    except ValueError:
+        product_id = None
+    products = Product.objects.filter(is_active=True) if active_only else Product.objects.all()
+    return get_object_or_404(products, id=product_id)
+
+
+@login_required
+def wishlist_view(request):
+    """View for displaying the user's wishlist"""
+    wishlist_items = WishlistItem.objects.filter(
+        user=request.user, product__is_active=True
+    ).select_related('product__category').prefetch_related('product__images')
+
+    context = {
+        'wishlist_items': wishlist_items,
+    }
+    return render(request, 'wishlist/wishlist.html', context)
+
+
+@login_required
+@require_http_methods(["POST"])
+def add_to_wishlist(request):
+    """Add product to wishlist"""
+    product = _get_product(request)
+    WishlistItem.objects.get_or_create(user=request.user, product=product)
+    return _respond(request, product, True, f'{product.name} added to your wishlist.')
+
+
+@login_required
+@require_http_methods(["POST"])
+def remove_from_wishlist(request):
+    """Remove product from wishlist"""
+    # Deactivated products can still be taken off the list
+    product = _get_product(request, active_only=False)
+    WishlistItem.objects.filter(user=request.user, product=product).delete()
+    return _respond(request, product, False, f'{product.name} removed from your wishlist.')
+
+
+@login_required
+@require_http_methods(["POST"])
+def toggle_wishlist(request):
+    """Add or remove a product, for heart buttons on product cards"""
+    product = _get_product(request)
+    item, created = WishlistItem.objects.get_or_create(user=request.user, product=product)
+    if created:
+        return _respond(request, product, True, f'{product.name} added to your wishlist.')
+    item.delete()
+    return _respond(request, product, False, f'{product.name} removed from your wishlist.')
+
+
+@require_http_methods(["GET"])
+def wishlist_count(request):
+    """API endpoint to get wishlist item count"""
+    return JsonResponse({'count': len(request_product_ids(request))})